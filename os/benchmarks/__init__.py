@@ -0,0 +1,4 @@
+# Benchmarks Module
+"""
+Performance benchmarks for the OS simulator.
+"""
@@ -0,0 +1,44 @@
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch import WorkloadSpec, run_batch, sweep
+from src.process import Syscall, SyscallType
+from labs.lab1 import sequential_scheduler
+from labs.lab2 import priority_scheduler
+from examples.main import random_scheduler
+
+WORKLOADS = 32
+PROCESSES = 50
+STEPS = 200
+
+def make_workloads():
+    workloads = []
+    for w in range(WORKLOADS):
+        programs = [
+            [Syscall(SyscallType.SYS_WRITE, chr(ord('A') + p % 26))] * STEPS + [Syscall(SyscallType.SYS_EXIT)]
+            for p in range(PROCESSES)
+        ]
+        workloads.append(WorkloadSpec(f"w{w}", programs, sequential_scheduler,
+                                      priorities=[p % 5 for p in range(PROCESSES)], seed=w))
+    return workloads
+
+def main():
+    specs = sweep(make_workloads(), [random_scheduler, sequential_scheduler, priority_scheduler])
+    print(f"{len(specs)} simulations")
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8}")
+    baseline = None
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        run_batch(specs, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.3f} {baseline / elapsed:>8.2f}")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import sys
+import os
+import time
+from io import StringIO
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Program, Syscall, SyscallType
+from src.schedulers import CFSScheduler, LotteryScheduler, MLFQScheduler, StrideScheduler
+from labs.lab2 import priority_scheduler
+from examples.main import random_scheduler
+
+PROCESS_COUNTS = [10, 100, 1000, 10000, 100000]
+DECISIONS = 200000
+
+SCHEDULERS = {
+    'mlfq': MLFQScheduler,
+    'cfs': CFSScheduler,
+    'lottery': LotteryScheduler,
+    'stride': StrideScheduler,
+    'priority': lambda: priority_scheduler,
+    'random': lambda: random_scheduler,
+}
+
+def decision_cost(make_scheduler, procs: int, decisions: int = DECISIONS) -> float:
+    """Microseconds per scheduling decision with `procs` processes that never finish"""
+    program = Program.compile([Syscall(SyscallType.SYS_WRITE, 'A')] * (decisions + 1) +
+                              [Syscall(SyscallType.SYS_EXIT)])
+    scheduler = make_scheduler()
+    kernel = Kernel(scheduler, [Process(program, priority=i % 8) for i in range(procs)],
+                    Console('exit', stream=StringIO()), accounting=False)
+    schedule = kernel.process_schedule
+    start = time.perf_counter()
+    for _ in range(decisions):
+        kernel.process_step(schedule())
+    return (time.perf_counter() - start) / decisions * 1e6
+
+def main():
+    print(f"{'processes':>10}" + ''.join(f"{name:>12}" for name in SCHEDULERS) + "  (us/decision)")
+    for procs in PROCESS_COUNTS:
+        costs = [decision_cost(make, procs) for make in SCHEDULERS.values()]
+        print(f"{procs:>10}" + ''.join(f"{cost:>12.3f}" for cost in costs))
+
+if __name__ == "__main__":
+    main()
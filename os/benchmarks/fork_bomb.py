@@ -0,0 +1,41 @@
+import sys
+import os
+import time
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.process import Process, Syscall, SyscallType
+
+PROGRAM_LENGTHS = [10, 100, 1000, 10000, 100000]
+FORKS = 10000
+
+def make_program(length: int):
+    """A program of `length` writes followed by an exit"""
+    return [Syscall(SyscallType.SYS_WRITE, 'A')] * length + [Syscall(SyscallType.SYS_EXIT)]
+
+def fork_bomb(length: int, forks: int = FORKS):
+    """Fork one process `forks` times, return (seconds, bytes) per fork"""
+    parent = Process(make_program(length))
+    children = []
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    for _ in range(forks):
+        children.append(parent.__copy__())
+    elapsed = time.perf_counter() - start
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed / forks, (after - before) / forks
+
+def main():
+    print(f"{'length':>10} {'us/fork':>10} {'bytes/fork':>12}")
+    for length in PROGRAM_LENGTHS:
+        seconds, memory = fork_bomb(length)
+        print(f"{length:>10} {seconds * 1e6:>10.2f} {memory:>12.1f}")
+
+if __name__ == "__main__":
+    main()
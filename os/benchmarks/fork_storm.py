@@ -0,0 +1,40 @@
+import sys
+import os
+import time
+from io import StringIO
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Syscall, SyscallType
+from src.schedulers import round_robin_scheduler
+
+FORKS = [8, 12, 16, 20, 24]
+PLAIN_LIMIT = 16  # Beyond this the unmerged run takes minutes
+
+def storm(forks: int) -> Process:
+    """`forks` forks each followed by a write, 2 ** forks processes"""
+    program = []
+    for _ in range(forks):
+        program += [Syscall(SyscallType.SYS_FORK), Syscall(SyscallType.SYS_WRITE, 'f')]
+    return Process(program + [Syscall(SyscallType.SYS_EXIT)])
+
+def run(forks: int, dedup: bool):
+    """Seconds, decisions and steps for one fork storm"""
+    kernel = Kernel(round_robin_scheduler, [storm(forks)], Console('exit', stream=StringIO()),
+                    accounting=False, dedup=dedup)
+    start = time.perf_counter()
+    kernel.run()
+    return time.perf_counter() - start, kernel.decisions, kernel.clock
+
+def main():
+    print(f"{'forks':>6}{'processes':>12}{'steps':>14}{'plain s':>10}{'dedup s':>10}{'decisions':>11}")
+    for forks in FORKS:
+        plain = f"{run(forks, False)[0]:>10.3f}" if forks <= PLAIN_LIMIT else f"{'-':>10}"
+        seconds, decisions, steps = run(forks, True)
+        print(f"{forks:>6}{1 << forks:>12}{steps:>14}{plain}{seconds:>10.3f}{decisions:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import sys
+import os
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.process import Process, Syscall, SyscallType
+
+PROGRAM_LENGTH = 1000000
+
+def make_syscalls(length: int):
+    """Distinct Syscall objects, as a generated workload would produce"""
+    chars = 'ABCDEFGH'
+    calls = [Syscall(SyscallType.SYS_WRITE, chars[i % len(chars)]) for i in range(length)]
+    calls.append(Syscall(SyscallType.SYS_EXIT))
+    return calls
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+def main():
+    syscalls, list_size = measure(lambda: make_syscalls(PROGRAM_LENGTH))
+    _, program_size = measure(lambda: Process(syscalls))
+    print(f"{'representation':>16} {'bytes/step':>12}")
+    print(f"{'list[Syscall]':>16} {list_size / PROGRAM_LENGTH:>12.1f}")
+    print(f"{'Program':>16} {program_size / PROGRAM_LENGTH:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import sys
+import os
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Program, Syscall, SyscallType
+from src.schedulers import CFSScheduler, LotteryScheduler, MLFQScheduler, StrideScheduler, round_robin_scheduler
+from labs.lab1 import sequential_scheduler
+from labs.lab2 import priority_scheduler
+from examples.main import random_scheduler
+
+# Steps/sec depend on the machine, so the baseline is recorded locally on
+# the first run and kept out of git
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# A run fails when its steps/sec drops more than this below the baseline
+THRESHOLD = 0.3
+
+# Cases with more steps than this are skipped to keep a run in minutes
+MAX_STEPS = 2000000
+
+# Small cases are repeated until they have run at least this long
+MIN_SECONDS = 0.2
+
+# Every case is measured this many times and the fastest sample kept, so a
+# single sample slowed down by something else on the machine does not fail
+SAMPLES = 3
+
+# A case that looks regressed is measured again up to this many times
+# before it counts, the best measurement wins
+RETRIES = 2
+
+TIERS = {
+    'quick': {'procs': [10, 1000, 10000], 'lengths': [10, 100]},
+    'full': {'procs': [10, 1000, 100000, 1000000], 'lengths': [1, 10, 1000]},
+}
+
+SCHEDULERS = {
+    'random': random_scheduler,
+    'sequential': sequential_scheduler,
+    'priority': priority_scheduler,
+    'round_robin': round_robin_scheduler,
+    'mlfq': MLFQScheduler,  # Classes are instantiated afresh for every run
+    'cfs': CFSScheduler,
+    'lottery': LotteryScheduler,
+    'stride': StrideScheduler,
+}
+
+class TimedScheduler:
+    """Wraps a scheduler to measure the time spent deciding"""
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.sticky = getattr(scheduler, 'sticky', False)
+        self.seconds = 0.0
+
+    def __getattr__(self, name):
+        # enqueue/dequeue of stateful schedulers
+        return getattr(self.scheduler, name)
+
+    def __call__(self, procs):
+        start = time.perf_counter()
+        proc = self.scheduler(procs)
+        self.seconds += time.perf_counter() - start
+        return proc
+
+def run_case(scheduler_name: str, procs: int, length: int) -> dict:
+    """Run one case, meant to be called in a fresh worker process, and keep the best of SAMPLES"""
+    writes = [Syscall(SyscallType.SYS_WRITE, chr(ord('A') + i % 26)) for i in range(length)]
+    program = Program.compile(writes + [Syscall(SyscallType.SYS_EXIT)])
+    samples = [run_sample(scheduler_name, procs, program) for _ in range(SAMPLES)]
+    best = max(samples, key=lambda sample: sample['steps_per_sec'])
+
+    rss = None
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024  # KiB -> MiB on Linux
+    best['peak_rss_mb'] = rss
+    return best
+
+def run_sample(scheduler_name: str, procs: int, program: Program) -> dict:
+    """Run the case until it has taken at least MIN_SECONDS"""
+    random.seed(0)
+    steps = decisions = 0
+    elapsed = deciding = 0.0
+    while elapsed < MIN_SECONDS:
+        processes = [Process(program, priority=i % 8) for i in range(procs)]
+        scheduler = SCHEDULERS[scheduler_name]
+        if isinstance(scheduler, type):
+            scheduler = scheduler()
+        scheduler = TimedScheduler(scheduler)
+        kernel = Kernel(scheduler, processes, Console('block', stream=StringIO()))
+        start = time.perf_counter()
+        kernel.run()
+        elapsed += time.perf_counter() - start
+        deciding += scheduler.seconds
+        steps += kernel.clock
+        decisions += kernel.decisions
+
+    return {
+        'steps': steps,
+        'decisions': decisions,
+        'seconds': elapsed,
+        'steps_per_sec': steps / elapsed,
+        'us_per_decision': deciding / decisions * 1e6,
+    }
+
+def measure(scheduler_name: str, procs: int, length: int) -> dict:
+    """Run a case in a worker process of its own, so peak RSS belongs to that case alone"""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run_case, scheduler_name, procs, length).result()
+
+def cases(tier: str):
+    for name in SCHEDULERS:
+        for procs in TIERS[tier]['procs']:
+            for length in TIERS[tier]['lengths']:
+                if procs * (length + 1) <= MAX_STEPS:
+                    yield name, procs, length
+
+def load_baseline() -> dict:
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f)
+
+def save_baseline(results: dict):
+    baseline = load_baseline()
+    baseline.update(results)
+    with open(BASELINE_FILE, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+def main(tier: str = 'quick', update: bool = False, threshold: float = THRESHOLD) -> bool:
+    """Run a tier of benchmarks, return False if any case regressed"""
+    baseline = load_baseline()
+    results = {}
+    regressions = []
+
+    print(f"{'case':>30} {'steps/s':>12} {'us/decision':>12} {'peak MB':>8} {'vs base':>8}")
+    for name, procs, length in cases(tier):
+        key = f"{name}/{procs}/{length}"
+        result = measure(name, procs, length)
+        ratio = ''
+        if key in baseline:
+            expected = baseline[key]['steps_per_sec']
+            for _ in range(RETRIES):
+                if result['steps_per_sec'] >= (1 - threshold) * expected:
+                    break
+                result = max(result, measure(name, procs, length), key=lambda r: r['steps_per_sec'])
+            change = result['steps_per_sec'] / expected
+            ratio = f"{change:.2f}x"
+            if change < 1 - threshold:
+                regressions.append(key)
+                ratio += ' !'
+        results[key] = result
+        rss = result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-'
+        print(f"{key:>30} {result['steps_per_sec']:>12.0f} {result['us_per_decision']:>12.3f} {rss:>8} {ratio:>8}")
+
+    # Cases first run on this machine become its baseline
+    recorded = results if update else {key: result for key, result in results.items() if key not in baseline}
+    if recorded:
+        save_baseline(recorded)
+        print(f"Baseline for {len(recorded)} case(s) written to {BASELINE_FILE}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} case(s) regressed more than {threshold:.0%}: {', '.join(regressions)}")
+        return False
+    return True
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    update = '--update' in args
+    args = [arg for arg in args if arg != '--update']
+    sys.exit(0 if main(args[0] if args else 'quick', update) else 1)
@@ -0,0 +1,52 @@
+import sys
+import os
+import time
+from io import StringIO
+from contextlib import redirect_stdout
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.myos as myos
+from src.process import Process, RunLengthProgram, Syscall, SyscallType
+from labs.lab1 import sequential_scheduler
+
+STEPS = 1000000
+
+def workload(encoded: bool):
+    """Three processes, each writing one character STEPS // 3 times"""
+    procs = []
+    for char in "ABC":
+        runs = [(Syscall(SyscallType.SYS_WRITE, char), STEPS // 3), (Syscall(SyscallType.SYS_EXIT), 1)]
+        if encoded:
+            procs.append(Process(RunLengthProgram.from_runs(runs)))
+        else:
+            procs.append(Process([call for call, count in runs for _ in range(count)]))
+    return procs
+
+def mixed_workload():
+    """Three processes writing a different character at every step, no runs to batch"""
+    procs = []
+    for char in "ABC":
+        calls = [Syscall(SyscallType.SYS_WRITE, char), Syscall(SyscallType.SYS_WRITE_DOUBLE, char.lower()),
+                 Syscall(SyscallType.SYS_WRITE, "-")]
+        procs.append(Process(calls * (STEPS // 9) + [Syscall(SyscallType.SYS_EXIT)]))
+    return procs
+
+def timed_run(scheduler, procs) -> float:
+    myos.init(scheduler, procs)
+    start = time.perf_counter()
+    with redirect_stdout(StringIO()):
+        myos.kernel_run()
+    return time.perf_counter() - start
+
+def main():
+    print(f"{'mode':>24} {'seconds':>10}")
+    print(f"{'stepped':>24} {timed_run(lambda procs: procs[0], workload(False)):>10.3f}")
+    print(f"{'sticky, Program':>24} {timed_run(sequential_scheduler, workload(False)):>10.3f}")
+    print(f"{'sticky, RunLengthProgram':>24} {timed_run(sequential_scheduler, workload(True)):>10.4f}")
+    print(f"{'mixed, stepped':>24} {timed_run(lambda procs: procs[0], mixed_workload()):>10.3f}")
+    print(f"{'mixed, sticky':>24} {timed_run(sequential_scheduler, mixed_workload()):>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import sys
+import os
+import time
+from io import StringIO
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.process import Process, Program, Syscall, SyscallType
+from src.schedulers import round_robin_scheduler
+from src.smp import SMPKernel
+
+CPU_COUNTS = [1, 2, 4, 8, 16]
+FORKS = 8      # 256 processes, all born on CPU 0
+LENGTH = 200
+
+def workload():
+    """One process whose descendants all start on its CPU, so the others must steal"""
+    program = Program.compile([Syscall(SyscallType.SYS_FORK)] * FORKS +
+                              [Syscall(SyscallType.SYS_WRITE, 'A')] * LENGTH + [Syscall(SyscallType.SYS_EXIT)])
+    return [Process(program)]
+
+def run(cpus: int):
+    kernel = SMPKernel(round_robin_scheduler, workload(), Console('exit', stream=StringIO()), cpus=cpus)
+    start = time.perf_counter()
+    kernel.run()
+    return kernel, time.perf_counter() - start
+
+def main():
+    print(f"{'cpus':>5} {'time':>8} {'speedup':>8} {'util':>6} {'steals':>7} {'turnaround':>11} {'us/step':>8}")
+    base = None
+    for cpus in CPU_COUNTS:
+        kernel, seconds = run(cpus)
+        base = base or kernel.time
+        stats = kernel.cpu_stats()
+        utilization = sum(s['utilization'] for s in stats) / cpus
+        steals = sum(s['steals'] for s in stats)
+        turnaround = kernel.stats()['turnaround']['mean']
+        print(f"{cpus:>5} {kernel.time:>8} {base / kernel.time:>8.2f} {utilization:>6.0%} {steals:>7} "
+              f"{turnaround:>11.0f} {seconds / kernel.clock * 1e6:>8.2f}")
+
+if __name__ == "__main__":
+    main()
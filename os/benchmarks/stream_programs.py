@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Program, StreamProgram, Syscall, SyscallType
+from src.schedulers import round_robin_scheduler
+
+STEPS = [10 ** 4, 10 ** 5, 10 ** 6]
+PROCS = 4
+
+def writer(length: int):
+    """`length` writes alternating two characters, then an exit"""
+    a, b = Syscall(SyscallType.SYS_WRITE, "a"), Syscall(SyscallType.SYS_WRITE, "b")
+    for step in range(length):
+        yield a if step % 2 else b
+    yield Syscall(SyscallType.SYS_EXIT)
+
+class NullStream:
+    """Drops the output, so only the programs take memory"""
+    def write(self, text: str):
+        pass
+
+    def flush(self):
+        pass
+
+def run(steps: int, stream: bool, measure: bool):
+    """Seconds for PROCS processes of `steps` steps each, or the peak memory in bytes"""
+    if measure:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if stream:
+        programs = [StreamProgram.from_function(writer, steps)] * PROCS
+    else:
+        programs = [Program.compile(writer(steps))] * PROCS
+    kernel = Kernel(round_robin_scheduler, [Process(p) for p in programs], Console('block', stream=NullStream()),
+                    quantum=1000, accounting=False)
+    kernel.run()
+    seconds = time.perf_counter() - start
+    if measure:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+    return seconds
+
+def main():
+    print(f"{'steps':>10}{'compiled s':>12}{'compiled KB':>13}{'stream s':>10}{'stream KB':>11}")
+    for steps in STEPS:
+        compiled = f"{run(steps, False, False):>12.3f}{run(steps, False, True) // 1024:>13}"
+        print(f"{steps:>10}{compiled}{run(steps, True, False):>10.3f}{run(steps, True, True) // 1024:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import sys
+import os
+import heapq
+import random
+import time
+from io import StringIO
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Program, Syscall, SyscallType
+from src.timers import TimerWheel
+
+TIMER_COUNTS = [1000, 10000, 100000, 1000000, 3000000]
+HORIZON = 1 << 24
+
+def wheel_cost(count: int):
+    """Nanoseconds per insert and per expiry with `count` pending timers"""
+    rng = random.Random(1)
+    deadlines = [rng.randrange(1, HORIZON) for _ in range(count)]
+    wheel = TimerWheel()
+    schedule = wheel.schedule
+    start = time.perf_counter()
+    for when in deadlines:
+        schedule(when, when)
+    inserted = time.perf_counter()
+    fired = 0
+    while len(wheel):
+        fired += len(wheel.advance(wheel.next_deadline()))
+    expired = time.perf_counter()
+    assert fired == count
+    return (inserted - start) / count * 1e9, (expired - inserted) / count * 1e9
+
+def heap_cost(count: int):
+    """The same with a binary heap, for comparison"""
+    rng = random.Random(1)
+    deadlines = [rng.randrange(1, HORIZON) for _ in range(count)]
+    heap = []
+    start = time.perf_counter()
+    for when in deadlines:
+        heapq.heappush(heap, (when, when))
+    inserted = time.perf_counter()
+    while heap:
+        heapq.heappop(heap)
+    expired = time.perf_counter()
+    return (inserted - start) / count * 1e9, (expired - inserted) / count * 1e9
+
+def sleepers(count: int):
+    """Seconds to run `count` processes that each sleep once for up to HORIZON ticks"""
+    rng = random.Random(2)
+    programs = [Program.compile([Syscall(SyscallType.SYS_SLEEP, rng.randrange(1, HORIZON)),
+                                 Syscall(SyscallType.SYS_EXIT)]) for _ in range(100)]
+    procs = [Process(programs[i % 100]) for i in range(count)]
+    kernel = Kernel(lambda procs: procs[0], procs, Console('exit', stream=StringIO()), accounting=False)
+    start = time.perf_counter()
+    kernel.run()
+    return time.perf_counter() - start, kernel.now()
+
+def main():
+    print(f"{'timers':>10}{'wheel ins':>12}{'wheel exp':>12}{'heap ins':>12}{'heap exp':>12}  (ns/timer)")
+    for count in TIMER_COUNTS:
+        wheel = wheel_cost(count)
+        heap = heap_cost(count)
+        print(f"{count:>10}{wheel[0]:>12.0f}{wheel[1]:>12.0f}{heap[0]:>12.0f}{heap[1]:>12.0f}")
+
+    seconds, now = sleepers(100000)
+    print(f"\n100000 sleeping processes: {seconds:.2f}s for {now} ticks of virtual time")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import sys
+import os
+import random
+import time
+from io import BytesIO, StringIO
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Program, Syscall, SyscallType
+from labs.lab1 import sequential_scheduler
+from examples.main import random_scheduler
+
+PROCESSES = 1000
+STEPS = 200
+
+def make_procs():
+    program = Program.compile([Syscall(SyscallType.SYS_WRITE, 'A')] * STEPS + [Syscall(SyscallType.SYS_EXIT)])
+    return [Process(program) for _ in range(PROCESSES)]
+
+def timed(action) -> float:
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+def main():
+    print(f"{'scheduler':>12} {'run s':>8} {'replay s':>9} {'records':>9} {'trace KB':>9} {'identical':>10}")
+    for scheduler in [random_scheduler, sequential_scheduler]:
+        random.seed(0)
+        output, trace = StringIO(), BytesIO()
+        kernel = Kernel(scheduler, make_procs(), Console('block', stream=output))
+        kernel.record_trace(trace)
+        records = kernel.trace
+        recorded = timed(kernel.run)
+
+        replayed_output = StringIO()
+        kernel = Kernel(None, make_procs(), Console('block', stream=replayed_output))
+        replayed = timed(lambda: kernel.replay(BytesIO(trace.getvalue())))
+
+        identical = replayed_output.getvalue() == output.getvalue()
+        print(f"{scheduler.__name__[:-10]:>12} {recorded:>8.3f} {replayed:>9.3f} {records.records:>9} "
+              f"{len(trace.getvalue()) / 1024:>9.1f} {str(identical):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import sys
+import os
+import random
+import time
+from io import StringIO
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Program, Syscall, SyscallType
+from src.schedulers import round_robin_scheduler
+from src.vectorized import VectorKernel, np
+
+# (processes, steps per process)
+CASES = [(10, 1000), (100, 1000), (1000, 1000), (10000, 100), (100, 10000)]
+QUANTUMS = [1, 10]
+
+def workload(procs: int, length: int):
+    """Programs of random writes and double writes, like the lab 3 tests"""
+    rng = random.Random(procs * length)
+    programs = [Program.compile([Syscall(rng.choice([SyscallType.SYS_WRITE, SyscallType.SYS_WRITE_DOUBLE]), c)
+                                 for c in rng.choices("ABCDEF", k=length)] + [Syscall(SyscallType.SYS_EXIT)])
+                for _ in range(16)]
+    return [Process(programs[i % len(programs)]) for i in range(procs)]
+
+def timed(kernel) -> float:
+    start = time.perf_counter()
+    kernel.run()
+    return time.perf_counter() - start
+
+def main():
+    if np is None:
+        print("NumPy is not installed, VectorKernel falls back to stepping")
+    print(f"{'case':>14}{'quantum':>9}{'kernel s':>11}{'vector s':>11}{'speedup':>9}")
+    for procs, length in CASES:
+        for quantum in QUANTUMS:
+            plain = timed(Kernel(round_robin_scheduler, workload(procs, length), Console('exit', stream=StringIO()),
+                                 quantum, accounting=False))
+            bulk = timed(VectorKernel(workload(procs, length), Console('exit', stream=StringIO()),
+                                      quantum, accounting=False))
+            print(f"{procs:>7}x{length:<6}{quantum:>9}{plain:>11.3f}{bulk:>11.3f}{plain / bulk:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,13 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.myos import *
 from src.process import SyscallType, Process, Syscall
+from src.runqueue import RunQueue
 
 def random_scheduler(procs):
     """A random scheduler that selects a process randomly"""
+    if isinstance(procs, RunQueue):
+        # Skips the compaction random.choice() would trigger after an exit
+        return procs.choice()
     return random.choice(procs)
 
 def run():
@@ -29,9 +33,10 @@ def run():
             process_exit(current)
         elif call.syscall == SyscallType.SYS_WRITE:
             # Write the character from syscall arg to the console
-            print(call.arg, end='', flush=True)
+            console_write(str(call.arg))
     
-    print()  # Print newline at the end
+    console_write('\n')  # Print newline at the end
+    console_flush()
 
 
 def main():
@@ -54,7 +59,16 @@ def main():
     )
     
     # Start running
-    run()
+    # python3 examples/main.py --record run.trace  saves the interleaving
+    # python3 examples/main.py --replay run.trace  reproduces it exactly
+    args = sys.argv[1:]
+    if len(args) == 2 and args[0] == '--record':
+        kernel_record(args[1])
+        kernel_run()
+    elif len(args) == 2 and args[0] == '--replay':
+        kernel_replay(args[1])
+    else:
+        run()
 
 if __name__ == "__main__":
     main()
@@ -12,4 +12,6 @@ def sequential_scheduler(procs: List[Process]) -> Optional[Process]:
         raise NotImplementedError("sequential_scheduler is not implemented yet")
     return procs[0]
 
-    
+# The first process keeps running until it exits, so the kernel may run
+# several of its steps per scheduling decision
+sequential_scheduler.sticky = True
@@ -3,6 +3,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.process import Process
+from src.runqueue import RunQueue
 from typing import List
 
 def priority_scheduler(procs: List[Process]) -> Process:
@@ -10,6 +11,10 @@ def priority_scheduler(procs: List[Process]) -> Process:
     if not procs:
         raise ValueError("No processes available to schedule")
     
+    if isinstance(procs, RunQueue):
+        # The kernel's run queue keeps a heap, O(log n) instead of a scan
+        return procs.highest_priority()
+
     selected_process = max(procs, key=lambda proc: proc.priority)
 
     return selected_process
\ No newline at end of file
@@ -63,15 +63,37 @@ def run_all_tests():
     
     return result.wasSuccessful()
 
+def run_benchmarks(args):
+    """Run the scheduler throughput benchmarks against the stored baseline"""
+    from benchmarks import scheduler_throughput
+
+    update = '--update' in args
+    args = [arg for arg in args if arg != '--update']
+    tier = args[0] if args else 'quick'
+    if tier not in scheduler_throughput.TIERS:
+        print(f"❌ Unknown benchmark tier {tier}")
+        return False
+
+    print(f"⏱️  Running {tier} Benchmarks for OS Simulator")
+    print("=" * 50)
+    success = scheduler_throughput.main(tier, update)
+    if success:
+        print("\n" + "=" * 50)
+        print("🎉 No Benchmark Regressions!")
+    return success
+
 def output_help():
     """Output help message"""
     print("Usage: python3 run_tests.py [lab_name|all]")
+    print("       python3 run_tests.py bench [quick|full] [--update]")
     print("Examples:")
     print("  python3 run_tests.py        # Run all tests")
     print("  python3 run_tests.py all    # Run all tests")
     print("  python3 run_tests.py lab1   # Run lab1 tests only")
     print("  python3 run_tests.py lab2   # Run lab2 tests only")
     print("  python3 run_tests.py lab3   # Run lab3 tests only")
+    print("  python3 run_tests.py bench  # Run quick benchmarks, fail on regressions")
+    print("  python3 run_tests.py bench full --update  # Run all benchmarks and record a new baseline")
 
 def main():
     """Main entry point"""
@@ -80,6 +102,8 @@ def main():
     if len(sys.argv) == 1:
         # No arguments, run all tests
         success = run_all_tests()
+    elif sys.argv[1] == "bench":
+        success = run_benchmarks(sys.argv[2:])
     elif len(sys.argv) == 2:
         lab_name = sys.argv[1]
         if lab_name in ["--help", "-h", "help"]:
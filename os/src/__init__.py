@@ -5,26 +5,92 @@ This package contains the core components of the operating system simulator.
 """
 
 # 导入核心模块
-from .process import Process, Syscall, SyscallType
+from .process import Process, Program, RunLengthProgram, StreamCursor, StreamProgram, Syscall, SyscallType
+from .runqueue import RunQueue
+from .console import Console
+from .kernel import Kernel
+from .timers import TimerWheel
+from .smp import CPU, SMPKernel
+from .coroutines import AsyncKernel, AsyncProcess
+from .vectorized import VectorKernel
+from .schedulers import CFSScheduler, LotteryScheduler, MLFQScheduler, StrideScheduler, round_robin_scheduler
+from .snapshot import Snapshot
+from .batch import WorkloadSpec, SimulationResult, run_batch, run_simulation, sweep
 from .myos import (
     init, 
     process_count, 
     process_schedule, 
     process_step, 
     process_exit,
+    process_sleep,
+    process_wait,
+    process_push,
+    process_step_run,
+    process_step_n,
+    set_quantum,
+    kernel_run,
+    kernel_stats,
+    kernel_record,
+    kernel_replay,
+    kernel_snapshot,
+    kernel_restore,
+    register_syscall,
+    process_syscall,
+    console_write,
+    console_flush,
     running_procs,
     scheduler
 )
 
 __all__ = [
     'Process',
+    'Program',
+    'RunLengthProgram',
+    'StreamProgram',
+    'StreamCursor',
     'Syscall', 
     'SyscallType',
+    'RunQueue',
+    'Console',
+    'Kernel',
+    'TimerWheel',
+    'CPU',
+    'SMPKernel',
+    'AsyncKernel',
+    'AsyncProcess',
+    'VectorKernel',
+    'MLFQScheduler',
+    'CFSScheduler',
+    'LotteryScheduler',
+    'StrideScheduler',
+    'round_robin_scheduler',
+    'Snapshot',
+    'WorkloadSpec',
+    'SimulationResult',
+    'run_batch',
+    'run_simulation',
+    'sweep',
     'init',
     'process_count',
     'process_schedule', 
     'process_step',
     'process_exit',
+    'process_sleep',
+    'process_wait',
+    'process_push',
+    'process_step_run',
+    'process_step_n',
+    'set_quantum',
+    'kernel_run',
+    'kernel_stats',
+    'kernel_record',
+    'kernel_replay',
+    'kernel_snapshot',
+    'kernel_restore',
+    'register_syscall',
+    'process_syscall',
+    'console_write',
+    'console_flush',
     'running_procs',
     'scheduler'
 ]
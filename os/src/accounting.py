@@ -0,0 +1,70 @@
+from array import array
+from typing import Dict
+
+class ProcessAccount:
+    """
+    Per-process counters, in virtual time (steps of the kernel clock).
+
+    Only plain integer fields updated when a process arrives, is scheduled
+    or exits, so keeping them costs nothing per step.
+    """
+    __slots__ = ('arrival', 'first_run', 'completion', 'start_step', 'switches')
+
+    def __init__(self, arrival: int, start_step: int):
+        self.arrival = arrival        # Clock when the process entered the run queue
+        self.first_run = -1           # Clock when it was first scheduled
+        self.completion = -1          # Clock when it exited
+        self.start_step = start_step  # Its step on arrival, forked processes start midway
+        self.switches = 0             # Times it was switched in
+
+    def response(self) -> int:
+        """Time from arrival until first scheduled"""
+        return self.first_run - self.arrival
+
+    def turnaround(self) -> int:
+        """Time from arrival until exit"""
+        return self.completion - self.arrival
+
+    def __repr__(self):
+        return (f"ProcessAccount(arrival={self.arrival}, first_run={self.first_run}, "
+                f"completion={self.completion}, switches={self.switches})")
+
+class Accounting:
+    """Collects the accounts of exited processes for aggregate statistics"""
+    METRICS = ('turnaround', 'response', 'wait', 'switches')
+
+    def __init__(self):
+        self.samples = {metric: array('q') for metric in self.METRICS}
+
+    def complete(self, account: ProcessAccount, steps_run: int, count: int = 1):
+        """Record a process (or `count` identical ones) that just exited after running `steps_run` steps"""
+        turnaround = account.completion - account.arrival
+        samples = self.samples
+        if count == 1:
+            samples['turnaround'].append(turnaround)
+            samples['response'].append(account.first_run - account.arrival)
+            samples['wait'].append(turnaround - steps_run)
+            samples['switches'].append(account.switches)
+            return
+        samples['turnaround'].extend(array('q', [turnaround]) * count)
+        samples['response'].extend(array('q', [account.first_run - account.arrival]) * count)
+        samples['wait'].extend(array('q', [turnaround - steps_run]) * count)
+        samples['switches'].extend(array('q', [account.switches]) * count)
+
+    def completed(self) -> int:
+        """Number of processes recorded so far"""
+        return len(self.samples['turnaround'])
+
+    def summary(self, percentiles=(50, 90, 99)) -> Dict[str, Dict[str, float]]:
+        """Mean, max and percentiles (nearest rank) of every metric"""
+        result = {}
+        for metric, values in self.samples.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            n = len(ordered)
+            stats = {'mean': sum(ordered) / n, 'max': ordered[-1]}
+            for p in percentiles:
+                stats[f'p{p}'] = ordered[max(0, -(-p * n // 100) - 1)]
+            result[metric] = stats
+        return result
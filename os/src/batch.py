@@ -0,0 +1,123 @@
+import copy
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from .console import Console
+from .kernel import Kernel
+from .process import Process, Program, RunLengthProgram, StreamProgram, Syscall
+from .smp import SMPKernel
+
+def scheduler_name(scheduler) -> str:
+    """A function's name, or the class name of a scheduler object"""
+    return getattr(scheduler, '__name__', type(scheduler).__name__)
+
+class WorkloadSpec:
+    """
+    A picklable description of one simulation.
+
+    `scheduler` must be picklable too, i.e. a module-level function such
+    as sequential_scheduler, not a lambda, or a scheduler object such as
+    MLFQScheduler, which every run copies so they do not share state.
+    Programs are compiled once here and shared by every Process built
+    from the spec.
+    """
+    def __init__(
+        self,
+        name: str,
+        programs: Iterable[Sequence[Syscall]],
+        scheduler: Callable,
+        priorities: Optional[Sequence[int]] = None,
+        quantum: int = 1,
+        seed: Optional[int] = None,
+        cpus: int = 1
+    ):
+        self.name = name
+        self.programs = [
+            p if isinstance(p, (Program, RunLengthProgram, StreamProgram)) else Program.compile(p)
+            for p in programs
+        ]
+        self.scheduler = scheduler
+        self.priorities = list(priorities) if priorities is not None else [0] * len(self.programs)
+        self.quantum = quantum
+        self.seed = seed
+        self.cpus = cpus
+
+    def processes(self) -> List[Process]:
+        """Fresh processes, ready to run"""
+        return [Process(program, priority) for program, priority in zip(self.programs, self.priorities)]
+
+    def __repr__(self):
+        return f"WorkloadSpec({self.name!r}, {len(self.programs)} processes, {scheduler_name(self.scheduler)})"
+
+class SimulationResult:
+    """What one simulation printed and how much work it took"""
+    def __init__(self, name: str, scheduler: str, quantum: int, output: str,
+                 steps: int, decisions: int, seconds: float, stats: dict,
+                 cpus: int = 1, time: Optional[int] = None):
+        self.name = name
+        self.scheduler = scheduler
+        self.quantum = quantum
+        self.output = output
+        self.steps = steps
+        self.decisions = decisions
+        self.seconds = seconds
+        self.stats = stats  # Kernel.stats(): turnaround, response, wait, switches
+        self.cpus = cpus
+        self.time = steps if time is None else time  # Elapsed virtual time
+
+    def __repr__(self):
+        return (f"SimulationResult({self.name!r}, {self.scheduler}, steps={self.steps}, "
+                f"decisions={self.decisions}, seconds={self.seconds:.4f})")
+
+def run_simulation(spec: WorkloadSpec) -> SimulationResult:
+    """Run one simulation in a kernel of its own"""
+    if spec.seed is not None:
+        random.seed(spec.seed)  # The schedulers draw from the global RNG
+    output = StringIO()
+    scheduler = copy.deepcopy(spec.scheduler)  # Functions are returned as is
+    console = Console('exit', stream=output)
+    if spec.cpus > 1:
+        kernel = SMPKernel(scheduler, spec.processes(), console, spec.quantum, cpus=spec.cpus)
+    else:
+        kernel = Kernel(scheduler, spec.processes(), console, spec.quantum)
+    start = time.perf_counter()
+    kernel.run()
+    seconds = time.perf_counter() - start
+    return SimulationResult(spec.name, scheduler_name(spec.scheduler), spec.quantum, output.getvalue(),
+                            kernel.clock, kernel.decisions, seconds, kernel.stats(),
+                            spec.cpus, kernel.now())
+
+def sweep(workloads: Iterable[WorkloadSpec], schedulers: Iterable[Callable],
+          quantums: Iterable[int] = (1,), cpus: Iterable[int] = (1,)) -> List[WorkloadSpec]:
+    """Every workload under every scheduler, quantum and CPU count"""
+    specs = []
+    for workload, scheduler, quantum, n in itertools.product(workloads, schedulers, quantums, cpus):
+        spec = copy.copy(workload)  # Programs are immutable, share them
+        spec.scheduler = scheduler
+        spec.quantum = quantum
+        spec.cpus = n
+        specs.append(spec)
+    return specs
+
+def run_batch(specs: Sequence[WorkloadSpec], workers: Optional[int] = None,
+              chunksize: Optional[int] = None) -> List[SimulationResult]:
+    """
+    Run simulations across a pool of worker processes.
+
+    Results come back in the order of `specs`. Specs are sent to workers
+    in chunks to keep pickling overhead low; by default each worker gets
+    about four chunks. With workers=1 everything runs in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1 or len(specs) <= 1:
+        return [run_simulation(spec) for spec in specs]
+    if chunksize is None:
+        chunksize = max(1, len(specs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_simulation, specs, chunksize=chunksize))
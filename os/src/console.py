@@ -0,0 +1,60 @@
+import sys
+from typing import List, Optional, TextIO
+
+class Console:
+    """
+    The kernel's console device.
+
+    Writes are collected in a buffer and handed to the stream in one go:
+      - 'unbuffered': every write goes straight to the stream
+      - 'line':       flush when a newline is written or the buffer is full
+      - 'block':      flush when the buffer is full
+      - 'exit':       flush only when asked to, i.e. when the OS shuts down
+    The bytes written are the same in every mode, only the number of real
+    writes changes. With no stream the current sys.stdout is used at flush
+    time, so redirect_stdout keeps working.
+    """
+    MODES = ('unbuffered', 'line', 'block', 'exit')
+
+    def __init__(self, mode: str = 'line', buffer_size: int = 8192, stream: Optional[TextIO] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown console mode {mode!r}, expected one of {self.MODES}")
+        self.mode = mode
+        self.buffer_size = buffer_size
+        self.stream = stream
+        self._buffer: List[str] = []
+        self._buffered = 0
+
+    def __getstate__(self):
+        # Streams do not pickle: a restored console writes to sys.stdout
+        # until it is given a new stream, pending text is kept
+        state = self.__dict__.copy()
+        state['stream'] = None
+        return state
+
+    def write(self, text: str):
+        """Write text to the console"""
+        self._buffer.append(text)
+        self._buffered += len(text)
+        mode = self.mode
+        if mode == 'unbuffered':
+            self.flush()
+        elif mode == 'exit':
+            pass
+        elif self._buffered >= self.buffer_size or (mode == 'line' and '\n' in text):
+            self.flush()
+
+    def flush(self):
+        """Hand everything buffered to the stream"""
+        if not self._buffer:
+            return
+        text = ''.join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(text)
+        stream.flush()
+
+    def pending(self) -> str:
+        """Text written but not flushed yet"""
+        return ''.join(self._buffer)
@@ -0,0 +1,225 @@
+import asyncio
+import functools
+import math
+from typing import Any, AsyncGenerator, Optional
+
+from .kernel import Kernel, sys_fork
+from .process import Process, Syscall, SyscallType
+
+class AsyncProcess(Process):
+    """
+    A process whose program is an async generator.
+
+    The generator yields the Syscalls it makes and receives each one's
+    result (what the handler returned, e.g. the child's pid for a fork)
+    as the value of the yield expression:
+
+        async def shell():
+            while True:
+                line = await commands.get()   # Waits without blocking others
+                yield Syscall(SyscallType.SYS_WRITE, line)
+                if line == 'exit':
+                    yield Syscall(SyscallType.SYS_EXIT)
+
+    Returning from the generator exits the process too. `step` counts the
+    syscalls made so far. Generators cannot be copied, so a coroutine
+    process forks by yielding Syscall(SYS_FORK, generator_function): the
+    child runs generator_function() and the parent receives its pid.
+    """
+    __slots__ = ('agen', 'result', 'ready')
+
+    def __init__(self, agen: AsyncGenerator[Syscall, Any], priority: int = 0):
+        self.program = None
+        self.step = 0
+        self._queue = None
+        self.priority = priority
+        self.pid = -1
+        self.ppid = -1
+        self.acct = None
+        self.cursor = None
+        self.agen = agen
+        self.result = None  # Sent into the generator on its next step
+        self.ready = None   # Task that finished the last await, if it blocked
+
+    def __copy__(self):
+        raise TypeError("a coroutine process cannot be copied, fork with Syscall(SYS_FORK, generator_function)")
+
+def sys_spawn(kernel: Kernel, proc: Process, call: Syscall, count: int):
+    if not isinstance(proc, AsyncProcess):
+        return sys_fork(kernel, proc, call, count)
+    if not callable(call.arg):
+        raise ValueError("a coroutine process forks with Syscall(SYS_FORK, generator_function)")
+    child = AsyncProcess(call.arg(), proc.priority)
+    kernel.process_push(child, proc)
+    return child.pid
+
+class AsyncKernel(Kernel):
+    """
+    A kernel running on an asyncio event loop, for AsyncProcess processes.
+
+    Scheduling works as in Kernel, with the same scheduler callables.
+    Generator steps are driven directly, without a Task per process: a
+    step that completes without waiting costs no loop iteration at all.
+    When a process awaits something that is not ready yet, it leaves the
+    run queue (stateful schedulers see it dequeued) and a callback on the
+    awaited future resumes it, queueing the process again once its next
+    syscall is known. The kernel yields to the loop between decisions
+    while any process is waiting, and sleeps when all of them are.
+    Ordinary Processes can run alongside.
+    SYS_SLEEP works as on Kernel: virtual time jumps over the sleep as soon
+    as nothing else can run, without waiting for the event loop.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.register_syscall(SyscallType.SYS_FORK, sys_spawn)
+        self.waiting = 0  # Processes blocked on an await
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._own_loop: Optional[asyncio.AbstractEventLoop] = None  # run()'s, kept while paused
+
+    def __getstate__(self):
+        raise TypeError("an AsyncKernel cannot be snapshotted, generators do not pickle")
+
+    def _deliver(self, proc: Process, result: Any):
+        if isinstance(proc, AsyncProcess):
+            proc.result = result
+
+    def _next_call(self, proc: AsyncProcess) -> Optional[Syscall]:
+        """The next syscall of `proc`, None if it is now waiting or finished"""
+        outcome = proc.ready
+        if outcome is not None:
+            proc.ready = None
+            call = outcome.result()  # Raises what the process raised
+        else:
+            coro = proc.agen.asend(proc.result)
+            try:
+                yielded = coro.send(None)
+            except StopIteration as stop:
+                call = stop.value
+            except StopAsyncIteration:
+                call = None
+            else:
+                self.running_procs.remove(proc)
+                self._dequeue(proc)
+                self.waiting += 1
+                self._suspend(proc, coro, yielded)
+                return None
+        if call is None:
+            self.process_exit(proc)  # Returned without SYS_EXIT
+        elif not isinstance(call, Syscall):
+            raise TypeError(f"process {proc.pid} yielded {call!r}, not a Syscall")
+        return call
+
+    def _suspend(self, proc: AsyncProcess, coro, yielded):
+        # Resume the generator step once what it awaits is done, the way
+        # asyncio.Task does, without a task of its own
+        if yielded is None:
+            self._loop.call_soon(self._resume, proc, coro)  # A bare yield
+        else:
+            yielded._asyncio_future_blocking = False
+            yielded.add_done_callback(functools.partial(self._resume, proc, coro))
+
+    def _resume(self, proc: AsyncProcess, coro, _future=None):
+        outcome = self._loop.create_future()
+        try:
+            yielded = coro.send(None)
+        except StopIteration as stop:
+            outcome.set_result(stop.value)
+        except StopAsyncIteration:
+            outcome.set_result(None)
+        except BaseException as error:
+            outcome.set_exception(error)
+        else:
+            self._suspend(proc, coro, yielded)
+            return
+        # Its next syscall is known, queue it again
+        self.waiting -= 1
+        proc.ready = outcome
+        self.running_procs.append(proc)
+        self._enqueue(proc)
+        self._wakeup.set()
+
+    def run(self, max_decisions: Optional[int] = None) -> bool:
+        """
+        Run until all processes exit, in an event loop of the kernel's own.
+
+        `max_decisions` pauses the run as in Kernel.run. Closing the loop
+        would finalize the generators, so a paused run keeps it for the
+        next run(), which also resumes processes blocked on an await.
+        """
+        if self._own_loop is None:
+            self._own_loop = asyncio.new_event_loop()
+        loop = self._own_loop
+        paused = False
+        try:
+            paused = not loop.run_until_complete(self.run_async(max_decisions))
+        finally:
+            if not paused:
+                self._own_loop = None
+                try:
+                    loop.run_until_complete(loop.shutdown_asyncgens())
+                finally:
+                    loop.close()
+        return not paused
+
+    async def run_async(self, max_decisions: Optional[int] = None) -> bool:
+        """Run until all processes exit, in the running event loop, pausing as in Kernel.run"""
+        if self.trace is not None:
+            raise ValueError("tracing is not supported on an AsyncKernel")
+        if self.dedup:
+            raise ValueError("dedup is not supported on an AsyncKernel")
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        sticky = getattr(self.scheduler, 'sticky', False)
+        handlers = self.syscall_handlers
+        batchable = self.syscall_batchable
+        procs = self.running_procs
+        table = self.process_table
+        schedule = self.process_schedule
+        stop = -1 if max_decisions is None else self.decisions + max_decisions
+        while table:
+            if self.decisions == stop:
+                return False
+            if self.sleeping:
+                if self.now() >= self._deadline:
+                    self.expire_timers()
+                if not procs:
+                    self._skip_idle()
+                    continue
+            if not procs:
+                # Everyone is waiting
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if self.waiting:
+                await asyncio.sleep(0)  # Let waiting processes make progress
+                if not procs:
+                    continue
+
+            current = schedule()
+            if current.__class__ is not AsyncProcess:
+                n = math.inf if sticky else self.quantum
+                for call, count in self.process_step_n(current, n):
+                    self.process_syscall(current, call, count)
+                continue
+
+            n = self.quantum
+            while sticky or n > 0:
+                if self.sleeping and self.now() >= self._deadline:
+                    self.expire_timers()  # Due mid-slice, as in process_step_n
+                call = self._next_call(current)
+                if call is None:
+                    break
+                current.step += 1
+                self.clock += 1
+                handler = handlers[call.syscall]
+                if handler is None:
+                    self.process_syscall(current, call)  # Raises
+                current.result = handler(self, current, call, 1)
+                if not batchable[call.syscall]:
+                    break
+                n -= 1
+
+        self.console_write('\n')
+        self.console_flush()
+        return True
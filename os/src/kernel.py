@@ -0,0 +1,740 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .accounting import Accounting, ProcessAccount
+from .console import Console
+from .process import Process, Program, StreamProgram, Syscall, SyscallType
+from .runqueue import RunQueue
+from .snapshot import Snapshot, snapshot
+from .timers import TimerWheel
+from .tracing import TraceReader, TraceWriter
+
+# handler(kernel, proc, call, count) carries out `call` on behalf of `proc`,
+# `count` times in a row. What it returns is the syscall's result, which
+# coroutine processes (see src/coroutines.py) receive
+SyscallHandler = Callable[['Kernel', Process, Syscall, int], Any]
+
+# Default syscall table, copied by every new Kernel. Indexed by opcode,
+# which is a byte in a compiled program
+syscall_handlers: List[Optional[SyscallHandler]] = [None] * 256
+
+# A batchable syscall has the same effect whether it runs k times one by
+# one or once k times over, so a run of them can be executed in one go
+syscall_batchable: List[bool] = [False] * 256
+
+# Syscalls that identical processes carry out with the same effect, no
+# matter which of them makes the call. A deduplicating kernel only merges
+# processes whose remaining syscalls are all in here
+dedup_safe = frozenset((SyscallType.SYS_EXIT, SyscallType.SYS_WRITE,
+                        SyscallType.SYS_WRITE_DOUBLE, SyscallType.SYS_FORK))
+
+# Steps a sticky run writes in bulk, and a byte per opcode marking the others
+_WRITES = (SyscallType.SYS_WRITE, SyscallType.SYS_WRITE_DOUBLE)
+_STOPS = bytes(0 if opcode in _WRITES else 1 for opcode in range(256))
+_BULK_CHUNK = 1 << 16  # Steps of output a sticky run writes at a time
+
+def _check_opcode(opcode: int) -> int:
+    opcode = int(opcode)
+    if not 0 <= opcode <= 0xFF:
+        raise ValueError(f"Syscall opcode {opcode} does not fit in a byte")
+    return opcode
+
+def register_syscall(opcode: int, handler: Optional[SyscallHandler], batchable: bool = False):
+    """Install a handler in the default table used by new kernels, None removes it"""
+    opcode = _check_opcode(opcode)
+    syscall_handlers[opcode] = handler
+    syscall_batchable[opcode] = batchable
+
+class Kernel:
+    """
+    One simulated operating system.
+
+    A kernel owns its run queue, scheduler, console, clock and syscall
+    table, so any number of them can run side by side in one interpreter.
+    The clock counts the steps executed so far, `decisions` the calls
+    made to the scheduler, `idle` the virtual time skipped while every
+    process was asleep. With accounting on, every process gets a
+    ProcessAccount (`proc.acct`) and exited processes are summarized in
+    `accounting`; pass accounting=False to skip all of it.
+
+    Every process entering the kernel gets the next pid and an entry in
+    `process_table` until it is reaped. A forked child records its
+    parent's pid in `ppid` and stays in the table as a zombie after it
+    exits, until the parent collects it with SYS_WAIT. A parent waiting for
+    a child that is still running leaves the run queue until the child
+    exits: `waiters` maps it to the pid it waits for (-1 for any child).
+    When a parent exits, its children are orphaned and the kernel adopts
+    them (ppid -1): it reaps them as soon as they exit, as it does the
+    processes it started itself. `children` and `zombies` hold the links
+    by parent pid, so none of this scans the process table. A scheduler
+    object with `enqueue` and `dequeue` methods (see src/schedulers.py) is
+    told about every process entering and leaving the run queue.
+
+    A process that sleeps (SYS_SLEEP) leaves the run queue for the timer
+    wheel `timers` and comes back once its time is up. Timers are checked
+    at every scheduling decision; when all processes are asleep, virtual
+    time jumps straight to the next timer.
+
+    With dedup=True a process whose remaining syscalls are all in
+    `dedup_safe` absorbs the children it forks, which would stay identical
+    to it until they exit: it becomes one run queue entry standing for
+    `groups[proc]` processes, and each time it is scheduled every member
+    runs the slice. The members of a group stay indistinguishable, so a
+    group never has to split. For round robin (children queued right
+    after their parent) the output is the same as without dedup; other
+    schedulers see one entry per group. Accounting keeps the merged
+    processes per fork, measured at the group's slices.
+    """
+    def __init__(
+        self,
+        scheduler=None,
+        procs: Iterable[Process] = (),
+        console: Optional[Console] = None,
+        quantum: int = 1,
+        accounting: bool = True,
+        dedup: bool = False
+    ):
+        self.running_procs = RunQueue(procs)
+        self.scheduler = scheduler
+        self.console = console if console is not None else Console()
+        self.quantum = 1
+        self.set_quantum(quantum)
+        self.clock = 0
+        self.decisions = 0
+        self.syscall_handlers = list(syscall_handlers)
+        self.syscall_batchable = list(syscall_batchable)
+        self.accounting = Accounting() if accounting else None
+        self._last = None  # Process scheduled last, to count switches
+        self.process_table: Dict[int, Process] = {}
+        self.children: Dict[int, Dict[int, Process]] = {}  # By parent pid, zombies included
+        self.zombies: Dict[int, Dict[int, Process]] = {}   # By parent pid, in order of exit
+        self.waiters: Dict[int, int] = {}
+        self._next_pid = 0
+        self.trace: Optional[TraceWriter] = None
+        self.timers = TimerWheel()
+        self.sleeping = 0        # Processes waiting on a timer
+        self.idle = 0
+        self._deadline = math.inf  # No timer is due before this time
+        self.dedup = dedup
+        self.groups: Dict[Process, int] = {}  # Multiplicity of merged processes, when above 1
+        self._cohorts: Dict[Process, List[Tuple[ProcessAccount, int]]] = {}
+        self._merge_from: Dict[Any, int] = {}  # Program -> first step after its last unsafe syscall
+        self._bulk: Dict[Any, Tuple] = {}  # Program -> (where it does not write, output of each table entry)
+        self._users: Dict[Any, int] = {}  # Program -> processes admitted with it that have not exited
+        for proc in self.running_procs:
+            self._admit(proc)
+            self._enqueue(proc)
+
+    def __getstate__(self):
+        # An open trace file belongs to the run that opened it
+        state = self.__dict__.copy()
+        state['trace'] = None
+        state['_bulk'] = {}  # Rebuilt on demand
+        return state
+
+    def _admit(self, proc: Process):
+        # A process enters the kernel: give it a pid and an account
+        proc.pid = self._next_pid
+        proc.ppid = -1
+        self._next_pid += 1
+        self.process_table[proc.pid] = proc
+        proc.acct = ProcessAccount(self.now(), proc.step) if self.accounting is not None else None
+        program = proc.program
+        if program is not None:
+            users = self._users
+            users[program] = users.get(program, 0) + 1
+
+    def _release(self, program):
+        # A process exits: once its program has no process left, drop what
+        # was cached about it so the kernel does not keep it alive
+        users = self._users.get(program)
+        if users is None:
+            return  # Given to the process after it was admitted, never cached
+        if users > 1:
+            self._users[program] = users - 1
+            return
+        del self._users[program]
+        self._bulk.pop(program, None)
+        self._merge_from.pop(program, None)
+        if not self._users:
+            # Dicts keep their size when emptied, start over with small ones
+            self._users = {}
+            self._bulk = {}
+            self._merge_from = {}
+
+    def _enqueue(self, proc: Process):
+        # Stateful schedulers track their own queues
+        enqueue = getattr(self.scheduler, 'enqueue', None)
+        if enqueue is not None:
+            enqueue(proc)
+
+    def _dequeue(self, proc: Process):
+        dequeue = getattr(self.scheduler, 'dequeue', None)
+        if dequeue is not None:
+            dequeue(proc)
+
+    def now(self) -> int:
+        """Virtual time for accounting and timers, on one CPU the clock plus idle time"""
+        return self.clock + self.idle
+
+    def set_quantum(self, steps: int):
+        """Set how many steps a process runs per scheduling decision"""
+        if steps < 1:
+            raise ValueError("quantum must be at least 1 step")
+        self.quantum = steps
+
+    def register_syscall(self, opcode: int, handler: Optional[SyscallHandler], batchable: bool = False):
+        """Install a handler for a syscall opcode (0-255) in this kernel, None removes it"""
+        opcode = _check_opcode(opcode)
+        self.syscall_handlers[opcode] = handler
+        self.syscall_batchable[opcode] = batchable
+
+    def process_count(self) -> int:
+        """Get the number of running processes"""
+        return len(self.running_procs)
+
+    def process_schedule(self) -> Process:
+        """Ask the scheduler for the next process to run"""
+        self.decisions += 1
+        proc = self.scheduler(self.running_procs)
+        acct = proc.acct
+        if acct is not None:
+            if proc is not self._last:
+                acct.switches += 1
+                self._last = proc
+            if acct.first_run < 0:
+                acct.first_run = self.now()
+        return proc
+
+    def process_push(self, proc: Process, parent: Optional[Process] = None):
+        """Push a new process into the running queue, as a child of `parent` if given"""
+        self._admit(proc)
+        if parent is not None:
+            proc.ppid = parent.pid
+            children = self.children.get(parent.pid)
+            if children is None:
+                children = self.children[parent.pid] = {}
+            children[proc.pid] = proc
+        self.running_procs.append(proc)
+        self._enqueue(proc)
+
+    def process_step(self, proc: Process) -> Syscall:
+        """Execute one step of the process"""
+        program = proc.program
+        if program.__class__ is Program:
+            call = program.table[program.refs[proc.step]]
+        elif program.__class__ is StreamProgram:
+            call = program.cursor(proc).next()
+        else:
+            call = program[proc.step]
+        proc.step += 1
+        self.clock += 1
+
+        return call
+
+    def process_step_run(self, proc: Process, limit: Optional[int] = None) -> Tuple[Syscall, int]:
+        """Execute a run of identical batchable syscalls, at most `limit` steps"""
+        program = proc.program
+        if program.__class__ is StreamProgram:
+            # Read ahead one syscall at a time until the run ends
+            cursor = program.cursor(proc)
+            call = cursor.next()
+            count = 1
+            if self.syscall_batchable[call.syscall]:
+                if limit is None:
+                    limit = math.inf
+                while count < limit and cursor.repeats(call):
+                    count += 1
+            proc.step += count
+            self.clock += count
+            return call, count
+        call = program[proc.step]
+        count = 1
+        if self.syscall_batchable[call.syscall]:
+            if limit is None:
+                limit = len(program)
+            count = program.run_length(proc.step, limit)
+        proc.step += count
+        self.clock += count
+
+        return call, count
+
+    def process_step_n(self, proc: Process, n: int) -> List[Tuple[Syscall, int]]:
+        """
+        Run a process for up to `n` steps.
+
+        Stops early after an exit, a fork or any other syscall the kernel
+        has to act on before the process may continue. Timers that come
+        due during the slice wake their processes at that step, as between
+        one-step decisions. Returns the syscalls executed as (syscall,
+        repeat count) runs, in order.
+        """
+        runs = []
+        batchable = self.syscall_batchable
+        while n > 0:
+            call, count = self.process_step_run(proc, self._until_timer(n))
+            runs.append((call, count))
+            if not batchable[call.syscall]:
+                break
+            n -= count
+
+        return runs
+
+    def _until_timer(self, n):
+        # Wake the processes due by now, then at most `n` steps before the
+        # next timer: nothing a slice queues may overtake a sleeper due first
+        if not self.sleeping:
+            return n
+        if self.now() >= self._deadline:
+            self.expire_timers()
+        return min(n, self._deadline - self.now())
+
+    def process_fork(self, proc: Process) -> Optional[int]:
+        """
+        Fork a process and return the child's pid. In dedup mode a process
+        that can be merged absorbs the child instead, doubling its group
+        (each member forks once), and None is returned.
+        """
+        if self.dedup and self._mergeable(proc):
+            members = self.groups.get(proc, 1)
+            self.groups[proc] = 2 * members
+            acct = proc.acct
+            if acct is not None and self.accounting is not None:
+                cohort = ProcessAccount(self.now(), proc.step)
+                cohort.switches = -acct.switches  # Only count the switches from here on
+                self._cohorts.setdefault(proc, []).append((cohort, members))
+            return None
+        child = proc.__copy__()
+        self.process_push(child, proc)
+        return child.pid
+
+    def _mergeable(self, proc: Process) -> bool:
+        program = proc.program
+        if program is None or program.__class__ is StreamProgram:
+            return False
+        start = self._merge_from.get(program)
+        if start is None:
+            start = 0
+            if not set(getattr(program, 'opcodes', ())) <= dedup_safe:
+                for step, call in enumerate(program):
+                    if call.syscall not in dedup_safe:
+                        start = step + 1
+            if program in self._users:  # Dropped with its last process, like _bulk
+                self._merge_from[program] = start
+        return proc.step >= start
+
+    def multiplicity(self, proc: Process) -> int:
+        """How many identical processes a run queue entry stands for"""
+        return self.groups.get(proc, 1)
+
+    def _run_group(self, proc: Process, runs: List[Tuple[Syscall, int]]):
+        # Every member of a group runs the slice in turn: repeat its writes
+        # once per member, then make the final call once for all of them
+        # (a fork doubles the group, an exit ends it)
+        members = self.groups[proc]
+        steps = sum(count for _, count in runs)
+        start = self.now() - steps
+        for cohort, _ in self._cohorts.get(proc, ()):
+            if cohort.first_run < 0:
+                cohort.first_run = start
+        self.clock += steps * (members - 1)
+        handlers = self.syscall_handlers
+        last, last_count = runs[-1]
+        repeated = runs if self.syscall_batchable[last.syscall] else runs[:-1]
+        if len(repeated) == 1:
+            call, count = repeated[0]
+            handlers[call.syscall](self, proc, call, count * members)
+        elif repeated:
+            for _ in range(members):
+                for call, count in repeated:
+                    handlers[call.syscall](self, proc, call, count)
+        if repeated is not runs:
+            self.process_syscall(proc, last, last_count)
+
+    def _stops(self, program) -> Tuple[array, List[str]]:
+        # Where the program's syscalls that are not writes are (steps of a
+        # Program, runs of a RunLengthProgram) and the output of each table
+        # entry. Cached per program while it has processes, so forked
+        # processes reuse it
+        bulk = self._bulk.get(program)
+        if bulk is None:
+            marks = bytes(program.opcodes).translate(_STOPS)
+            stops = array('Q')
+            stop = marks.find(1)
+            while stop >= 0:
+                stops.append(stop)
+                stop = marks.find(1, stop + 1)
+            stops.append(len(marks))  # Running off the end fails like stepping
+            texts = [str(call.arg) * (2 if call.syscall == SyscallType.SYS_WRITE_DOUBLE else 1)
+                     if call.syscall in _WRITES else '' for call in program.table]
+            bulk = (stops, texts)
+            if program in self._users:
+                self._bulk[program] = bulk
+        return bulk
+
+    def _write_until_stop(self, proc: Process):
+        # Execute the writes from proc.step up to the next syscall that is
+        # not a write or the next timer, their output in pieces of at most
+        # _BULK_CHUNK steps
+        program = proc.program
+        stops, texts = self._stops(program)
+        write = self.console_write
+        step = proc.step
+        until = step + self._until_timer(math.inf)
+        if program.__class__ is Program:
+            stop = min(stops[bisect_left(stops, step)], until)
+            refs = program.refs
+            for start in range(step, stop, _BULK_CHUNK):
+                write(''.join(map(texts.__getitem__, refs[start:min(start + _BULK_CHUNK, stop)])))
+        else:
+            ends, refs = program.ends, program.refs
+            run = bisect_right(ends, step)
+            last = stops[bisect_left(stops, run)]  # First run from here on that is not writes
+            stop = min(max(step, ends[last - 1] if last else 0), until)
+            pieces = []
+            pending = 0
+            start = step
+            for run in range(run, last):
+                if start == stop:
+                    break
+                text = texts[refs[run]]
+                end = min(ends[run], stop)
+                while start < end:
+                    count = min(end - start, _BULK_CHUNK - pending)
+                    pieces.append(text * count)
+                    pending += count
+                    start += count
+                    if pending == _BULK_CHUNK:
+                        write(''.join(pieces))
+                        pieces.clear()
+                        pending = 0
+            if pieces:
+                write(''.join(pieces))
+        self.clock += stop - step
+        proc.step = stop
+
+    def _run_to_completion(self, proc: Process) -> Tuple[int, Syscall]:
+        # One decision of a sticky scheduler: execute the writes up to the
+        # next other syscall in bulk, then that syscall (with its repeats,
+        # if batchable) through the syscall table. Batchable calls do not
+        # end the decision. Returns the steps run and the last call
+        batchable = self.syscall_batchable
+        start = proc.step
+        while True:
+            self._write_until_stop(proc)
+            call, count = self.process_step_run(proc, self._until_timer(math.inf))
+            self.process_syscall(proc, call, count)
+            if not batchable[call.syscall]:
+                return proc.step - start, call
+
+    def process_sleep(self, proc: Process, ticks: int):
+        """Take a process off the run queue until `ticks` of virtual time have passed"""
+        if ticks <= 0:
+            return
+        self.running_procs.remove(proc)
+        self._dequeue(proc)
+        self.sleeping += 1
+        when = self.now() + ticks
+        self.timers.schedule(when, proc)
+        if when < self._deadline:
+            self._deadline = when
+
+    def expire_timers(self):
+        """Wake every process whose sleep is over, back into the run queue"""
+        for proc in self.timers.advance(self.now()):
+            self.sleeping -= 1
+            self.running_procs.append(proc)
+            self._enqueue(proc)
+        deadline = self.timers.next_deadline()
+        self._deadline = math.inf if deadline is None else deadline
+
+    def _skip_idle(self):
+        # Every process is asleep: jump to the next timer instead of ticking
+        self.idle += max(0, self._deadline - self.now())
+        self.expire_timers()
+
+    def process_exit(self, proc: Process):
+        """Exit a process and remove it from running queue, leaving a zombie if it has a parent"""
+        self.running_procs.remove(proc)  # O(1), leaves a tombstone in the run queue
+        self._dequeue(proc)
+        acct = proc.acct
+        if acct is not None and self.accounting is not None:
+            acct.completion = self.now()
+            self.accounting.complete(acct, proc.step - acct.start_step)
+            for cohort, count in self._cohorts.pop(proc, ()):
+                cohort.completion = acct.completion
+                cohort.switches += acct.switches
+                self.accounting.complete(cohort, proc.step - cohort.start_step, count)
+        if self.groups:
+            self.groups.pop(proc, None)
+        self._release(proc.program)
+
+        pid = proc.pid
+        table = self.process_table
+        orphans = self.children.pop(pid, None)
+        if orphans is not None:
+            # The kernel adopts the children, and reaps those already dead
+            zombies = self.zombies.pop(pid, ())
+            for child in orphans.values():
+                child.ppid = -1
+            for child_pid in zombies:
+                del table[child_pid]
+
+        parent = proc.ppid
+        if parent < 0:
+            table.pop(pid, None)
+            return
+        zombies = self.zombies.get(parent)
+        if zombies is None:
+            zombies = self.zombies[parent] = {}
+        zombies[pid] = proc
+        waiting = self.waiters.get(parent)
+        if waiting is not None and (waiting < 0 or waiting == pid):
+            del self.waiters[parent]
+            self._reap(proc)
+            parent_proc = table[parent]
+            self.running_procs.append(parent_proc)
+            self._enqueue(parent_proc)
+            self._deliver(parent_proc, pid)
+
+    def process_wait(self, proc: Process, pid: Optional[int] = None) -> Optional[int]:
+        """
+        Reap an exited child of `proc` (the given one, or any) and return
+        its pid. If the child is still running, `proc` leaves the run queue
+        until it exits and None is returned; the pid is delivered then.
+        Returns -1 if there is no such child.
+        """
+        if pid is None:
+            zombies = self.zombies.get(proc.pid)
+            if zombies:
+                child = next(iter(zombies.values()))
+                self._reap(child)
+                return child.pid
+            if proc.pid not in self.children:
+                return -1
+            pid = -1
+        else:
+            child = self.process_table.get(pid)
+            if child is None or child.ppid != proc.pid or child is proc:
+                return -1
+            if pid in self.zombies.get(proc.pid, ()):
+                self._reap(child)
+                return pid
+        self.running_procs.remove(proc)
+        self._dequeue(proc)
+        self.waiters[proc.pid] = pid
+        return None
+
+    def _reap(self, child: Process):
+        # Remove a zombie for good
+        parent = child.ppid
+        del self.process_table[child.pid]
+        zombies = self.zombies[parent]
+        del zombies[child.pid]
+        if not zombies:
+            del self.zombies[parent]
+        children = self.children[parent]
+        del children[child.pid]
+        if not children:
+            del self.children[parent]
+
+    def _deliver(self, proc: Process, result: Any):
+        # A blocked syscall completed, coroutine kernels pass its result on
+        pass
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Aggregate accounting of the processes that exited so far"""
+        if self.accounting is None:
+            raise ValueError("accounting is switched off for this kernel")
+        return self.accounting.summary()
+
+    def process_lookup(self, pid: int) -> Optional[Process]:
+        """The process with this pid, running, blocked or a zombie, if any"""
+        return self.process_table.get(pid)
+
+    def process_syscall(self, proc: Process, call: Syscall, count: int = 1):
+        """Let the kernel carry out a syscall made by `proc`"""
+        handler = self.syscall_handlers[call.syscall]
+        if handler is None:
+            raise ValueError(f"No handler registered for syscall {call.syscall!r}")
+        handler(self, proc, call, count)
+
+    def console_write(self, text: str):
+        """Write text to the console device"""
+        self.console.write(text)
+
+    def console_flush(self):
+        """Flush the console device, call it before the OS stops running"""
+        self.console.flush()
+
+    def record_trace(self, file: Union[str, BinaryIO], buffer_size: int = 1 << 16):
+        """Record the next run() to a binary trace that replay() can re-execute"""
+        self.trace = TraceWriter(file, buffer_size)
+
+    def run(self, max_decisions: Optional[int] = None) -> bool:
+        """
+        Run until all processes exit.
+
+        Each scheduling decision lets the chosen process run for `quantum`
+        steps. A scheduler may set `sticky = True` to declare that it keeps
+        choosing the same process until that process exits (like
+        sequential_scheduler); the quantum is then unlimited, and with the
+        default write handlers each decision writes everything up to the
+        process's next other syscall (a fork, sleep, wait or exit) at once.
+        Otherwise runs of identical writes are executed in one step.
+
+        With `max_decisions` the kernel pauses after that many scheduling
+        decisions and returns False, leaving unflushed output in the
+        console; calling run() again carries on where it stopped. Returns
+        True once every process has exited.
+        """
+        sticky = getattr(self.scheduler, 'sticky', False)
+        handlers = self.syscall_handlers
+        batchable = self.syscall_batchable
+        procs = self.running_procs
+        schedule = self.process_schedule
+        trace = self.trace
+        groups = self.groups
+        bulk = sticky and handlers[SyscallType.SYS_WRITE] is sys_write and \
+            handlers[SyscallType.SYS_WRITE_DOUBLE] is sys_write_double
+        stop = -1 if max_decisions is None else self.decisions + max_decisions
+        while procs or self.sleeping:
+            if self.decisions == stop:
+                return False
+            if self.sleeping:
+                if self.now() >= self._deadline:
+                    self.expire_timers()
+                if not procs:
+                    self._skip_idle()
+                    continue
+            current = schedule()
+
+            if not sticky and self.quantum == 1:
+                call = self.process_step(current)
+                if trace is not None:
+                    # A group's slices repeat per member, so never merge them
+                    trace.record(current.pid, 1, call.syscall, batchable[call.syscall] and current not in groups)
+                if groups and current in groups:
+                    self._run_group(current, [(call, 1)])
+                    continue
+                handler = handlers[call.syscall]
+                if handler is None:
+                    self.process_syscall(current, call)  # Raises
+                handler(self, current, call, 1)
+                continue
+
+            if bulk and current.program.__class__ is not StreamProgram and not (groups and current in groups):
+                steps, call = self._run_to_completion(current)
+                if trace is not None:
+                    trace.record(current.pid, steps, call.syscall, batchable[call.syscall])
+                continue
+
+            n = math.inf if sticky else self.quantum
+            runs = self.process_step_n(current, n)
+            if trace is not None:
+                last = runs[-1][0].syscall
+                trace.record(current.pid, sum(count for _, count in runs), last,
+                             batchable[last] and current not in groups)
+            if groups and current in groups:
+                self._run_group(current, runs)
+                continue
+            for call, count in runs:
+                self.process_syscall(current, call, count)
+
+        self.console_write('\n')
+        self.console_flush()
+        if trace is not None:
+            trace.close()
+            self.trace = None
+        return True
+
+    def snapshot(self) -> Snapshot:
+        """Capture this kernel and the random module's state, see Snapshot"""
+        return snapshot(self)
+
+    def replay(self, file: Union[str, BinaryIO]):
+        """
+        Run until all processes exit, following a trace made by record_trace().
+
+        The kernel must start from the same processes as the recorded run.
+        The scheduler is never called: each record names the process to
+        run and for how many steps, so replay produces the same output
+        without paying for scheduling decisions.
+        """
+        reader = TraceReader(file)
+        table = self.process_table
+        handlers = self.syscall_handlers
+        groups = self.groups
+        step = self.process_step
+        try:
+            for pid, steps, opcode in reader:
+                proc = table.get(pid)
+                if proc is None:
+                    raise ValueError(f"trace diverged: process {pid} is not running")
+                if self.sleeping:
+                    # Wake processes at the same points as the recorded run
+                    if self.now() >= self._deadline:
+                        self.expire_timers()
+                    while proc not in self.running_procs and self.sleeping:
+                        self._skip_idle()
+                self.decisions += 1
+                acct = proc.acct
+                if acct is not None:
+                    if proc is not self._last:
+                        acct.switches += 1
+                        self._last = proc
+                    if acct.first_run < 0:
+                        acct.first_run = self.now()
+
+                if steps == 1:
+                    call = step(proc)
+                    if call.syscall != opcode:
+                        raise ValueError(f"trace diverged: process {pid} did not run as recorded")
+                    if groups and proc in groups:
+                        self._run_group(proc, [(call, 1)])
+                        continue
+                    handlers[call.syscall](self, proc, call, 1)
+                    continue
+
+                runs = self.process_step_n(proc, steps)
+                if sum(count for _, count in runs) != steps or runs[-1][0].syscall != opcode:
+                    raise ValueError(f"trace diverged: process {pid} did not run as recorded")
+                if groups and proc in groups:
+                    self._run_group(proc, runs)
+                    continue
+                for call, count in runs:
+                    self.process_syscall(proc, call, count)
+        finally:
+            reader.close()
+
+        if self.running_procs or self.sleeping:
+            raise ValueError("trace ended while processes were still running")
+        self.console_write('\n')
+        self.console_flush()
+
+def sys_exit(kernel: Kernel, proc: Process, call: Syscall, count: int):
+    kernel.process_exit(proc)
+
+def sys_write(kernel: Kernel, proc: Process, call: Syscall, count: int):
+    kernel.console_write(str(call.arg) * count)
+
+def sys_write_double(kernel: Kernel, proc: Process, call: Syscall, count: int):
+    kernel.console_write(str(call.arg) * (2 * count))
+
+def sys_fork(kernel: Kernel, proc: Process, call: Syscall, count: int):
+    return kernel.process_fork(proc)
+
+def sys_sleep(kernel: Kernel, proc: Process, call: Syscall, count: int):
+    kernel.process_sleep(proc, int(call.arg))
+
+def sys_wait(kernel: Kernel, proc: Process, call: Syscall, count: int):
+    return kernel.process_wait(proc, call.arg)
+
+register_syscall(SyscallType.SYS_EXIT, sys_exit)
+register_syscall(SyscallType.SYS_WRITE, sys_write, batchable=True)
+register_syscall(SyscallType.SYS_WRITE_DOUBLE, sys_write_double, batchable=True)
+register_syscall(SyscallType.SYS_FORK, sys_fork)
+register_syscall(SyscallType.SYS_SLEEP, sys_sleep)
+register_syscall(SyscallType.SYS_WAIT, sys_wait)
@@ -1,47 +1,128 @@
 import random
 import time
-from typing import List
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 
+from . import kernel as _kernel_module
+from .console import Console
+from .kernel import Kernel, SyscallHandler
 from .process import Process, Syscall
+from .smp import SMPKernel
+from .snapshot import Snapshot
 
-running_procs: List[Process] = []
+# The functions below drive this default kernel. Create more Kernel
+# instances to run several simulations side by side.
+kernel: Kernel = Kernel()
 
-scheduler = None
+def __getattr__(name: str):
+    # running_procs, scheduler, console, quantum and clock are the default
+    # kernel's, looked up on every access so init() is always reflected
+    if name in ('running_procs', 'scheduler', 'console', 'quantum', 'clock'):
+        return getattr(kernel, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Operating System Functions
 def init(
     my_scheduler,
-    my_procs: List[Process]
+    my_procs: List[Process],
+    my_console: Optional[Console] = None,
+    my_quantum: int = 1,
+    my_accounting: bool = True,
+    my_cpus: int = 1,
+    my_dedup: bool = False
 ):
-    """Initialize the Operating System"""
+    """Initialize the Operating System, with an SMPKernel if my_cpus > 1"""
+    if my_dedup and my_cpus > 1:
+        raise ValueError("dedup is not supported with more than one CPU")
     random.seed(time.time())
-    
-    global running_procs, scheduler
-    running_procs = my_procs
-    scheduler = my_scheduler
+
+    global kernel
+    kernel.console_flush()
+    console = my_console if my_console is not None else kernel.console
+    if my_cpus > 1:
+        kernel = SMPKernel(my_scheduler, my_procs, console, my_quantum, my_accounting, my_cpus)
+    else:
+        kernel = Kernel(my_scheduler, my_procs, console, my_quantum, my_accounting, my_dedup)
+
+def set_quantum(steps: int):
+    """Set how many steps a process runs per scheduling decision"""
+    kernel.set_quantum(steps)
 
 def process_count() -> int:
     """Get the number of running processes"""
-    return len(running_procs)
+    return kernel.process_count()
 
 def process_schedule() -> Process:
     """Schedule a process randomly"""
-    return scheduler(running_procs)
+    return kernel.process_schedule()
 
-def process_push(proc: Process):
-    """Push a new process into the running queue"""
-    global running_procs
-    running_procs.append(proc)
+def process_push(proc: Process, parent: Optional[Process] = None):
+    """Push a new process into the running queue, as a child of `parent` if given"""
+    kernel.process_push(proc, parent)
 
 def process_step(proc: Process) -> Syscall:
     """Execute one step of the process"""
-    call = proc.syscalls[proc.step]
-    proc.step += 1
-    
-    return call
+    return kernel.process_step(proc)
+
+def process_step_run(proc: Process, limit: Optional[int] = None) -> Tuple[Syscall, int]:
+    """Execute a run of identical batchable syscalls, at most `limit` steps"""
+    return kernel.process_step_run(proc, limit)
+
+def process_step_n(proc: Process, n: int) -> List[Tuple[Syscall, int]]:
+    """Run a process for up to `n` steps, see Kernel.process_step_n"""
+    return kernel.process_step_n(proc, n)
+
+def process_sleep(proc: Process, ticks: int):
+    """Take a process off the running queue for `ticks` of virtual time"""
+    kernel.process_sleep(proc, ticks)
+
+def process_wait(proc: Process, pid: Optional[int] = None) -> Optional[int]:
+    """Reap an exited child of a process, or block it until one exits, see Kernel.process_wait"""
+    return kernel.process_wait(proc, pid)
 
 def process_exit(proc: Process):
     """Exit a process and remove it from running queue"""
-    global running_procs
+    kernel.process_exit(proc)
+
+def process_syscall(proc: Process, call: Syscall, count: int = 1):
+    """Let the kernel carry out a syscall made by `proc`"""
+    kernel.process_syscall(proc, call, count)
+
+def console_write(text: str):
+    """Write text to the console device"""
+    kernel.console_write(text)
+
+def console_flush():
+    """Flush the console device, call it before the OS stops running"""
+    kernel.console_flush()
+
+def register_syscall(opcode: int, handler: Optional[SyscallHandler], batchable: bool = False):
+    """Install a syscall handler for new kernels and the current one, None removes it"""
+    _kernel_module.register_syscall(opcode, handler, batchable)
+    kernel.register_syscall(opcode, handler, batchable)
+
+def kernel_stats() -> Dict[str, Dict[str, float]]:
+    """Turnaround, response, wait and switch statistics, see Kernel.stats"""
+    return kernel.stats()
+
+def kernel_run(max_decisions: Optional[int] = None) -> bool:
+    """Run until all processes exit or `max_decisions` are made, see Kernel.run"""
+    return kernel.run(max_decisions)
+
+def kernel_record(file: Union[str, BinaryIO]):
+    """Record the next kernel_run() to a binary trace file"""
+    kernel.record_trace(file)
+
+def kernel_replay(file: Union[str, BinaryIO]):
+    """Re-execute a recorded run without calling the scheduler, see Kernel.replay"""
+    kernel.replay(file)
+
+def kernel_snapshot() -> Snapshot:
+    """Capture the default kernel, e.g. after kernel_run(max_decisions)"""
+    return kernel.snapshot()
 
-    running_procs.remove(proc)
+def kernel_restore(snap: Snapshot):
+    """Make a restored copy of a snapshot the default kernel"""
+    global kernel
+    # The snapshot carries its own unflushed output, the current kernel's
+    # is dropped along with it
+    kernel = snap.restore(kernel.console.stream)
@@ -1,29 +1,369 @@
-from enum import Enum
-from typing import List
+from array import array
+from bisect import bisect_right
+from enum import IntEnum
+from functools import partial
+from itertools import islice
+from pickle import PickleBuffer
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-# Syscall enumeration
-class SyscallType(Enum):
+# Syscall enumeration, the values are the opcodes in a program
+class SyscallType(IntEnum):
     SYS_EXIT = 0   # Process exits
     SYS_WRITE = 1  # Write to console with a character
     SYS_WRITE_DOUBLE = 2
     SYS_FORK  = 3
+    SYS_SLEEP = 4  # Sleep for arg ticks of virtual time
+    SYS_WAIT  = 5  # Wait for child arg (None: any child) to exit, result is its pid
 
 class Syscall:
     """System call structure"""
+    __slots__ = ('syscall', 'arg')
+
     def __init__(self, syscall: SyscallType, arg: object=None):
-        self.syscall = syscall
+        self.syscall = syscall  # A SyscallType or the opcode of a registered syscall
         self.arg = arg
 
+    def __repr__(self):
+        return f"Syscall({getattr(self.syscall, 'name', self.syscall)}, {self.arg!r})"
+
+def _pickle_array(values, protocol: int):
+    # Protocol 5 hands the array's memory to the pickler as an out-of-band
+    # buffer instead of copying it into the pickle
+    typecode = getattr(values, 'typecode', None) or values.format
+    if protocol >= 5:
+        return typecode, PickleBuffer(values)
+    return typecode, values.tobytes()
+
+def _unpickle_program(cls, arrays, table):
+    # The arrays come back as typed views on the unpickled buffers, so a
+    # program restored from shared memory or an mmap is never copied
+    views = [memoryview(data).cast('B').cast(typecode) for typecode, data in arrays]
+    return cls(*views, table)
+
+def _intern(call: Syscall, table: List[Syscall], interned: dict) -> int:
+    # Index of `call` in `table`, added if no equal syscall is there yet.
+    # The key holds the arg's type too: 1, 1.0 and True are equal but
+    # print differently. Unhashable args cannot be shared
+    try:
+        key = (call.syscall, type(call.arg), call.arg)
+        ref = interned.get(key)
+    except TypeError:
+        key, ref = None, None
+    if ref is None:
+        ref = len(table)
+        table.append(call)
+        if key is not None:
+            interned[key] = ref
+    return ref
+
+class Program:
+    """
+    A compact, immutable syscall sequence.
+
+    Every distinct (syscall, arg) pair is stored once in `table`; each step
+    is just an opcode byte in `opcodes` and an index into `table` in `refs`,
+    so a step costs a few bytes instead of a whole Syscall object. Indexing
+    returns the interned Syscall, so it can stand in for a list.
+    """
+    __slots__ = ('opcodes', 'refs', 'table')
+    _arrays = ('opcodes', 'refs')
+
+    def __init__(self, opcodes: array, refs: array, table: List[Syscall]):
+        self.opcodes = opcodes
+        self.refs = refs
+        self.table = table
+
+    def __reduce_ex__(self, protocol):
+        arrays = [_pickle_array(getattr(self, name), protocol) for name in self._arrays]
+        return _unpickle_program, (self.__class__, arrays, self.table)
+
+    @classmethod
+    def compile(cls, syscalls: Iterable[Syscall]) -> 'Program':
+        """Build a program from Syscall objects, interning repeated ones"""
+        table: List[Syscall] = []
+        interned = {}
+        opcodes = array('B')
+        refs = []
+        for call in syscalls:
+            opcodes.append(call.syscall)
+            refs.append(_intern(call, table, interned))
+        typecode = 'B' if len(table) <= 0xFF else 'H' if len(table) <= 0xFFFF else 'I'
+        return cls(opcodes, array(typecode, refs), table)
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.table[ref] for ref in self.refs[index]]
+        return self.table[self.refs[index]]
+
+    def __iter__(self) -> Iterator[Syscall]:
+        table = self.table
+        for ref in self.refs:
+            yield table[ref]
+
+    def run_length(self, step: int, limit: int) -> int:
+        """How many times the syscall at `step` repeats from there, up to `limit`"""
+        refs = self.refs
+        ref = refs[step]
+        end = min(step + limit, len(refs))
+        count = 1
+        while step + count < end and refs[step + count] == ref:
+            count += 1
+        return count
+
+    def __repr__(self):
+        return f"Program({len(self)} steps, {len(self.table)} distinct syscalls)"
+
+class RunLengthProgram:
+    """
+    An immutable syscall sequence stored as runs of the same syscall.
+
+    Run i repeats `table[refs[i]]` up to (but not including) step `ends[i]`,
+    so `[Syscall(SYS_WRITE, 'A')] * 1000000` is a single run. A step is
+    found by binary search over the runs.
+    """
+    __slots__ = ('opcodes', 'refs', 'ends', 'table')
+    _arrays = ('opcodes', 'refs', 'ends')
+
+    def __init__(self, opcodes: array, refs: array, ends: array, table: List[Syscall]):
+        self.opcodes = opcodes  # Opcode of each run
+        self.refs = refs
+        self.ends = ends
+        self.table = table
+
+    __reduce_ex__ = Program.__reduce_ex__
+
+    @classmethod
+    def from_runs(cls, runs: Iterable[Tuple[Syscall, int]]) -> 'RunLengthProgram':
+        """Build a program from (syscall, repeat count) pairs"""
+        table: List[Syscall] = []
+        interned = {}
+        opcodes, refs, ends = array('B'), array('L'), array('Q')
+        end = 0
+        for call, count in runs:
+            if count <= 0:
+                continue
+            ref = _intern(call, table, interned)
+            end += count
+            if refs and refs[-1] == ref:
+                ends[-1] = end
+                continue
+            opcodes.append(call.syscall)
+            refs.append(ref)
+            ends.append(end)
+        return cls(opcodes, refs, ends, table)
+
+    @classmethod
+    def compile(cls, syscalls: Iterable[Syscall]) -> 'RunLengthProgram':
+        """Build a program from Syscall objects, merging repeated ones"""
+        return cls.from_runs((call, 1) for call in syscalls)
+
+    def __len__(self) -> int:
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("program index out of range")
+        return self.table[self.refs[bisect_right(self.ends, index)]]
+
+    def __iter__(self) -> Iterator[Syscall]:
+        start = 0
+        for ref, end in zip(self.refs, self.ends):
+            call = self.table[ref]
+            for _ in range(end - start):
+                yield call
+            start = end
+
+    def run_length(self, step: int, limit: int) -> int:
+        """How many times the syscall at `step` repeats from there, up to `limit`"""
+        return min(self.ends[bisect_right(self.ends, step)] - step, limit)
+
+    def __repr__(self):
+        return f"RunLengthProgram({len(self)} steps, {len(self.ends)} runs)"
+
+# StreamCursor.ahead when nothing is read ahead, and what next() returns
+# at the end of the stream: None could be a value the source yields
+_END = object()
+
+def _function_source(function, args, start: int):
+    # Source of StreamProgram.from_function: run the function again, skip to `start`
+    return islice(function(*args), start, None)
+
+def _chunk_source(load, chunk_size: int, start: int):
+    # Source of StreamProgram.from_chunks: load the chunks from the one holding `start` on
+    index, offset = divmod(start, chunk_size)
+    while True:
+        chunk = load(index)
+        yield from islice(chunk, offset, None)
+        if len(chunk) < chunk_size:
+            return
+        index += 1
+        offset = 0
+
+class StreamProgram:
+    """
+    A syscall sequence produced while it runs instead of stored.
+
+    `source(start)` returns an iterable of the syscalls from step `start`
+    on, and must return the same ones every time it is called, so the
+    program can be replayed from any step. Each process reads it through
+    its own StreamCursor (`proc.cursor`): one iterator and at most one
+    syscall of lookahead, so memory grows with the number of processes,
+    not with the length of their programs. A forked child shares the
+    program and opens the source again at the step it was forked at.
+
+    Snapshots and batch runs pickle the source, so it has to be a
+    module-level function or a functools.partial of one. `length` is the
+    number of steps if known, len() fails otherwise. Streams cannot be
+    indexed, and kernels neither merge (dedup) nor bulk-run them.
+    """
+    __slots__ = ('source', 'length')
+
+    def __init__(self, source: Callable[[int], Iterable['Syscall']], length: Optional[int] = None):
+        self.source = source
+        self.length = length
+
+    @classmethod
+    def from_function(cls, function: Callable, *args, length: Optional[int] = None) -> 'StreamProgram':
+        """
+        Stream what function(*args) yields, e.g. a generator function.
+
+        The function can only start from the beginning, so opening the
+        stream at step k (for a forked child, a restored snapshot or a
+        resumed run) calls it again and skips k syscalls: O(k) per opening.
+        Long programs that fork should use from_chunks, which opens at any
+        step without replaying the ones before it.
+        """
+        return cls(partial(_function_source, function, args), length)
+
+    @classmethod
+    def from_chunks(cls, load: Callable[[int], Sequence['Syscall']], chunk_size: int,
+                    length: Optional[int] = None) -> 'StreamProgram':
+        """
+        Stream the chunks load(0), load(1), ... of `chunk_size` syscalls
+        each, up to the first shorter one. Opening it at any step loads
+        only the chunks from there on
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        return cls(partial(_chunk_source, load, chunk_size), length)
+
+    def __len__(self) -> int:
+        if self.length is None:
+            raise TypeError("the length of this stream program is not known")
+        return self.length
+
+    def __iter__(self) -> Iterator['Syscall']:
+        return iter(self.source(0))
+
+    def cursor(self, proc: 'Process') -> 'StreamCursor':
+        """The cursor of `proc` at its current step, opened again if it is elsewhere"""
+        cursor = proc.cursor
+        if cursor is None or cursor.step != proc.step or cursor.program is not self:
+            cursor = proc.cursor = StreamCursor(self, proc.step)
+        return cursor
+
+    def __repr__(self):
+        length = "unknown length" if self.length is None else f"{self.length} steps"
+        return f"StreamProgram({length})"
+
+class StreamCursor:
+    """Where one process is in a StreamProgram, `step` is the next step it reads"""
+    __slots__ = ('program', 'step', 'calls', 'ahead')
+
+    def __init__(self, program: StreamProgram, step: int = 0):
+        self.program = program
+        self.step = step
+        self.calls = None  # Opened on the first read
+        self.ahead = _END  # Syscall read ahead by repeats(), _END if none
+
+    def __reduce__(self):
+        # Iterators cannot be pickled, a restored cursor opens the source again
+        return StreamCursor, (self.program, self.step)
+
+    def next(self) -> 'Syscall':
+        """Read the syscall at `step` and move past it"""
+        call = self.ahead
+        if call is _END:
+            calls = self.calls
+            if calls is None:
+                calls = self.calls = iter(self.program.source(self.step))
+            call = next(calls, _END)
+            if call is _END:
+                raise IndexError("program index out of range")
+        else:
+            self.ahead = _END
+        self.step += 1
+        return call
+
+    def repeats(self, call: 'Syscall') -> bool:
+        """Move past the next syscall if it is the same as `call`"""
+        ahead = self.ahead
+        if ahead is _END:
+            ahead = self.ahead = next(self.calls, _END)
+            if ahead is _END:
+                return False
+        # Like Program.compile, 1, 1.0 and True are not the same syscall
+        if ahead is call or (ahead.syscall == call.syscall and type(ahead.arg) is type(call.arg)
+                             and ahead.arg == call.arg):
+            self.ahead = _END
+            self.step += 1
+            return True
+        return False
+
 class Process:
     """Process's Context"""
-    def __init__(self, syscalls: List[Syscall], priority: int = 0):
+    __slots__ = ('program', 'step', '_priority', 'pid', 'ppid', 'acct', 'cursor', '_queue')
+
+    def __init__(self, syscalls: Sequence[Syscall], priority: int = 0):
         self.syscalls = syscalls
         self.step = 0  # Current step
-        self.priority = priority  # Process priority (higher value = higher priority)
+        self._queue = None  # RunQueue whose priority heap holds this process
+        self.priority = priority
+        self.pid = -1  # Assigned by the kernel that runs the process
+        self.ppid = -1  # Parent's pid, -1 when the kernel itself is the parent
+        self.acct = None  # ProcessAccount, filled in by a kernel that keeps accounting
+
+    @property
+    def priority(self) -> int:
+        """Process priority, higher value = higher priority"""
+        return self._priority
+
+    @priority.setter
+    def priority(self, priority: int):
+        self._priority = priority
+        if self._queue is not None:
+            self._queue._requeue(self)
+
+    @property
+    def syscalls(self) -> Sequence[Syscall]:
+        """The program, stored immutably so forked processes can share it"""
+        return self.program
+
+    @syscalls.setter
+    def syscalls(self, syscalls: Sequence[Syscall]):
+        # Copy-on-write: rewriting a program only rebinds this process, the
+        # processes it was forked from (or into) keep the old one
+        if not isinstance(syscalls, (Program, RunLengthProgram, StreamProgram)):
+            syscalls = Program.compile(syscalls)
+        self.program = syscalls
+        self.cursor = None  # StreamCursor of a StreamProgram, opened on the first step
 
     def __copy__(self):
-        # Custom deepcopy to avoid issues with mutable default arguments
-        copied_syscalls = [Syscall(call.syscall, call.arg) for call in self.syscalls]
-        new_process = Process(copied_syscalls, self.priority)
+        # Share the program with the parent, only the context is copied
+        new_process = Process.__new__(Process)
+        new_process.program = self.program
         new_process.step = self.step
+        new_process._priority = self._priority
+        new_process._queue = None
+        new_process.pid = -1
+        new_process.ppid = -1
+        new_process.acct = None
+        new_process.cursor = None  # A stream is opened again at the child's step
         return new_process
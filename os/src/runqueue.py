@@ -0,0 +1,259 @@
+import heapq
+import random
+from collections.abc import MutableSequence
+from typing import Iterable, Iterator, Optional
+
+from .process import Process
+
+class RunQueue(MutableSequence):
+    """
+    The kernel's list of running processes.
+
+    Schedulers see an ordinary sequence, but underneath the processes live
+    in a slot array indexed by a dict, and removed processes just leave a
+    tombstone behind. Push, exit, membership and access to either end are
+    O(1) amortized; holes are compacted away once they outnumber the live
+    processes, so indexing into the middle (random.choice) compacts at
+    most once per exit.
+
+    It additionally keeps a heap of (-priority, arrival, process) so the
+    highest priority process can be found in O(log n). The heap is only
+    built the first time `highest_priority` is called, so other schedulers
+    pay nothing for it. Arrival order always matches list order:
+    append/pop/remove keep the heap up to date, any other reordering drops
+    it to be rebuilt. Processes in the heap point back at the queue, so
+    assigning to proc.priority moves them in it.
+    """
+    def __init__(self, procs: Iterable[Process] = ()):
+        self._slots = []      # Processes in order, None marks a removed one
+        self._where = {}      # Process -> its index in _slots
+        self._head = 0        # Everything before _head is a tombstone
+        self._holes = 0       # Tombstones in _slots[_head:]
+        self._heap = None     # Heap entries: [-priority, arrival, proc]
+        self._entries = {}    # Process -> its live heap entry
+        self._arrival = 0
+        for proc in procs:
+            self.append(proc)
+
+    # Slot bookkeeping
+
+    def _compact(self):
+        self._slots = [proc for proc in self._slots[self._head:] if proc is not None]
+        self._where = {proc: i for i, proc in enumerate(self._slots)}
+        self._head = 0
+        self._holes = 0
+
+    def _position(self, index: int) -> int:
+        n = len(self._where)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("run queue index out of range")
+        if index == 0:
+            return self._head
+        if index == n - 1:
+            return len(self._slots) - 1
+        if self._holes:
+            self._compact()
+        return self._head + index
+
+    # Sequence interface
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, proc) -> bool:
+        return proc in self._where
+
+    def __iter__(self) -> Iterator[Process]:
+        for proc in self._slots[self._head:]:
+            if proc is not None:
+                yield proc
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        i = self._position(index)  # May compact, rebinding _slots
+        return self._slots[i]
+
+    def __setitem__(self, index, proc: Process):
+        if isinstance(index, slice):
+            procs = list(self)
+            procs[index] = proc
+            self._reset(procs)
+            return
+        i = self._position(index)
+        old = self._slots[i]
+        if proc is not old:
+            j = self._where.get(proc)
+            if j is not None:
+                # Already queued elsewhere: the two swap places, so that
+                # q[i], q[j] = q[j], q[i] works as on a list
+                self._slots[j] = old
+                self._where[old] = j
+            else:
+                del self._where[old]
+            self._slots[i] = proc
+            self._where[proc] = i
+            self._invalidate()
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            procs = list(self)
+            del procs[index]
+            self._reset(procs)
+            return
+        self.remove(self[index])
+
+    def __repr__(self) -> str:
+        return f"RunQueue({list(self)!r})"
+
+    def index(self, proc, start: int = 0, stop: Optional[int] = None) -> int:
+        if proc not in self._where:
+            raise ValueError("process is not in the run queue")
+        if self._holes:
+            self._compact()
+        return super().index(proc, start, len(self) if stop is None else stop)
+
+    def count(self, proc) -> int:
+        return 1 if proc in self._where else 0
+
+    def insert(self, index: int, proc: Process):
+        procs = list(self)
+        procs.insert(index, proc)
+        self._reset(procs)
+
+    def append(self, proc: Process):
+        if proc in self._where:
+            raise ValueError("process is already in the run queue")
+        self._where[proc] = len(self._slots)
+        self._slots.append(proc)
+        if self._heap is not None:
+            self._index(proc)
+
+    def extend(self, procs: Iterable[Process]):
+        for proc in procs:
+            self.append(proc)
+
+    def remove(self, proc: Process):
+        try:
+            i = self._where.pop(proc)
+        except KeyError:
+            raise ValueError("process is not in the run queue") from None
+        slots = self._slots
+        slots[i] = None
+        if i == self._head:
+            self._head += 1
+            while self._holes and slots[self._head] is None:
+                self._head += 1
+                self._holes -= 1
+        else:
+            self._holes += 1
+        while self._holes and slots[-1] is None:
+            slots.pop()
+            self._holes -= 1
+        if not self._where:
+            slots.clear()
+            self._head = 0
+            self._holes = 0
+        elif self._holes > len(self._where) or self._head > len(self._where):
+            self._compact()
+        if self._heap is not None:
+            self._unindex(proc)
+
+    def pop(self, index: int = -1) -> Process:
+        proc = self[index]
+        self.remove(proc)
+        return proc
+
+    def choice(self, rng: random.Random = random) -> Process:
+        """
+        A uniformly random process, O(1) expected.
+
+        Unlike random.choice() this never compacts: it draws slots until it
+        hits a live one, and at most half of the slots are holes.
+        """
+        if not self._where:
+            raise IndexError("cannot choose from an empty run queue")
+        slots = self._slots
+        head = self._head
+        n = len(slots) - head
+        while True:
+            proc = slots[head + rng.randrange(n)]
+            if proc is not None:
+                return proc
+
+    def clear(self):
+        self._reset(())
+
+    def reverse(self):
+        self._reset(reversed(list(self)))
+
+    def sort(self, *, key=None, reverse: bool = False):
+        self._reset(sorted(self, key=key, reverse=reverse))
+
+    def copy(self) -> list:
+        return list(self)
+
+    def _reset(self, procs: Iterable[Process]):
+        self._slots = []
+        self._where = {}
+        self._head = 0
+        self._holes = 0
+        self._invalidate()
+        self.extend(procs)
+
+    # Priority heap
+
+    def _index(self, proc: Process):
+        entry = [-proc.priority, self._arrival, proc]
+        self._arrival += 1
+        self._entries[proc] = entry
+        heapq.heappush(self._heap, entry)
+        proc._queue = self
+
+    def _unindex(self, proc: Process):
+        # The entry stays in the heap until it reaches the top, it is dead
+        # once it is not in _entries. proc stays in it: an older entry of
+        # proc with the same key would fail comparing proc against None
+        if self._entries.pop(proc, None) is not None:
+            if proc._queue is self:
+                proc._queue = None
+            self._prune()
+
+    def _requeue(self, proc: Process):
+        # Called by the priority setter: a new entry at the same arrival
+        entry = [-proc.priority, self._entries[proc][1], proc]
+        self._entries[proc] = entry
+        heapq.heappush(self._heap, entry)
+        self._prune()
+
+    def _prune(self):
+        if len(self._heap) > 2 * len(self._entries) + 16:
+            entries = self._entries
+            self._heap = [e for e in self._heap if entries.get(e[2]) is e]
+            heapq.heapify(self._heap)
+
+    def _invalidate(self):
+        # The list was reordered behind the heap's back, rebuild on next use
+        for proc in self._entries:
+            if proc._queue is self:
+                proc._queue = None
+        self._heap = None
+        self._entries = {}
+
+    def highest_priority(self) -> Optional[Process]:
+        """The process with the largest priority, the earliest arrival on ties"""
+        if self._heap is None:
+            self._heap = []
+            for proc in self:
+                self._index(proc)
+        heap = self._heap
+        entries = self._entries
+        while heap and entries.get(heap[0][2]) is not heap[0]:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def reprioritize(self, proc: Process, priority: int):
+        """Change the priority of a queued process in O(log n), same as assigning proc.priority"""
+        proc.priority = priority
@@ -0,0 +1,440 @@
+import heapq
+import random
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+from .process import Process
+
+def round_robin_scheduler(procs):
+    """Run the first process, then move it to the back of the queue"""
+    proc = procs.pop(0)
+    procs.append(proc)
+    return proc
+
+# Stateful schedulers are objects rather than functions. Besides being
+# called with the run queue like any scheduler, they implement
+#   enqueue(proc)  called by the kernel when a process enters the run queue
+#   dequeue(proc)  called by the kernel when a process exits
+# so they never have to scan the run queue to find out what changed.
+
+# Weight of a process with priority 0, Linux's NICE_0_LOAD
+NICE_0_WEIGHT = 1024
+
+def priority_weight(priority: int) -> int:
+    """
+    Scheduling weight for a priority, 1.25x per priority level like Linux's
+    nice table (priority p behaves as nice -p), clamped to -20..19.
+    """
+    priority = max(-20, min(19, priority))
+    return max(1, round(NICE_0_WEIGHT * 1.25 ** priority))
+
+class _StatefulScheduler:
+    """
+    What the scheduler objects below share: `_entries` maps every queued
+    process to the scheduler's record of it. __call__ starts with
+        if not self._entries:
+            self._adopt(procs)
+    so a scheduler attached after the processes were pushed finds them.
+    """
+    def __init__(self):
+        self._entries: Dict[Process, object] = {}
+
+    def enqueue(self, proc: Process):
+        raise NotImplementedError
+
+    def _adopt(self, procs: Sequence[Process]):
+        for proc in procs:
+            self.enqueue(proc)
+        if not self._entries:
+            raise ValueError("No processes available to schedule")
+
+class _HeapScheduler(_StatefulScheduler):
+    """
+    A stateful scheduler choosing the smallest of a heap of [key, arrival,
+    proc] entries, earlier arrivals first on ties. Exited processes are
+    deleted lazily: their entries stay in the heap until they reach the
+    top, or until they make up half of it.
+    """
+    def __init__(self):
+        super().__init__()
+        self._heap: List[list] = []
+        self._arrival = 0
+
+    def _push(self, proc: Process, key) -> list:
+        entry = [key, self._arrival, proc]
+        self._arrival += 1
+        self._entries[proc] = entry
+        heapq.heappush(self._heap, entry)
+        return entry
+
+    def _bury(self, entry: list):
+        entry[2] = None  # Lazily deleted when it reaches the top
+        if len(self._heap) > 2 * len(self._entries) + 16:
+            self._heap = [e for e in self._heap if e[2] is not None]
+            heapq.heapify(self._heap)
+
+    def _top(self) -> list:
+        heap = self._heap
+        while heap[0][2] is None:
+            heapq.heappop(heap)
+        return heap[0]
+
+class MLFQScheduler(_StatefulScheduler):
+    """
+    Multilevel feedback queue.
+
+    Every process starts in level 0, the highest. A process runs for
+    `quanta[level]` scheduling decisions before it is demoted to the tail
+    of the next level (or rotated within the last one), and the head of
+    the highest non-empty level always runs next, so new and interactive
+    processes preempt long-running ones. Every `boost_interval` decisions
+    all processes go back to level 0, so nothing starves.
+
+    A bitmap of non-empty levels finds the level to run with one bit
+    trick, and the boost is O(levels) too: each level is a queue of
+    segments, the boost appends the lower levels' segments to level 0 and
+    bumps an epoch, and an entry from an older epoch is treated as being
+    in level 0 with a fresh quantum. A decision is therefore O(1) however
+    many processes there are. Exited processes are deleted lazily.
+    """
+    def __init__(self, levels: int = 8, quanta: Optional[Sequence[int]] = None,
+                 boost_interval: int = 1000):
+        if levels < 1:
+            raise ValueError("MLFQ needs at least one level")
+        if quanta is None:
+            quanta = [1 << level for level in range(levels)]  # 1, 2, 4, ...
+        if len(quanta) != levels or min(quanta) < 1:
+            raise ValueError("MLFQ needs a quantum of at least 1 for every level")
+        super().__init__()
+        self.quanta = list(quanta)
+        self.boost_interval = boost_interval
+        # Level -> deque of segments, each a deque of [proc, level, used, epoch]
+        self.levels: List[deque] = [deque() for _ in range(levels)]
+        self._counts = [0] * levels  # Live processes per level
+        self._bitmap = 0             # Bit i set when level i has a live process
+        self._epoch = 0
+        self._until_boost = boost_interval
+
+    def _level(self, entry: list) -> int:
+        return entry[1] if entry[3] == self._epoch else 0
+
+    def level(self, proc: Process) -> int:
+        """The level a queued process is in"""
+        return self._level(self._entries[proc])
+
+    def enqueue(self, proc: Process):
+        """A new process joins the tail of level 0"""
+        if proc in self._entries:
+            return
+        entry = [proc, 0, 0, self._epoch]
+        self._entries[proc] = entry
+        self._push(entry, 0)
+
+    def dequeue(self, proc: Process):
+        """Forget an exited process"""
+        entry = self._entries.pop(proc, None)
+        if entry is None:
+            return
+        entry[0] = None  # Skipped when it reaches the head of its level
+        self._leave(self._level(entry))
+
+    def _push(self, entry: list, level: int):
+        entry[1] = level
+        entry[2] = 0
+        entry[3] = self._epoch
+        segments = self.levels[level]
+        if not segments:
+            segments.append(deque())
+        segments[-1].append(entry)
+        self._counts[level] += 1
+        self._bitmap |= 1 << level
+
+    def _leave(self, level: int):
+        self._counts[level] -= 1
+        if not self._counts[level]:
+            self._bitmap &= ~(1 << level)
+
+    def boost(self):
+        """Move every process back to level 0, keeping their order"""
+        top = self.levels[0]
+        for segments in self.levels[1:]:
+            top.extend(segments)
+            segments.clear()
+        # Start a fresh segment so new arrivals queue behind everyone
+        top.append(deque())
+        self._epoch += 1
+        self._counts = [0] * len(self.levels)
+        self._counts[0] = len(self._entries)
+        self._bitmap = 1 if self._entries else 0
+
+    def __call__(self, procs: Sequence[Process]) -> Process:
+        if not self._entries:
+            self._adopt(procs)
+
+        self._until_boost -= 1
+        if self._until_boost <= 0:
+            self._until_boost = self.boost_interval
+            self.boost()
+
+        epoch = self._epoch
+        last = len(self.levels) - 1
+        while True:
+            bitmap = self._bitmap
+            level = (bitmap & -bitmap).bit_length() - 1  # Lowest set bit
+            segments = self.levels[level]
+            queue = segments[0]
+            if not queue:
+                segments.popleft()
+                continue
+            entry = queue[0]
+            if entry[0] is None:
+                queue.popleft()
+                continue
+            if entry[3] != epoch:
+                # Boosted since it was queued
+                entry[1] = 0
+                entry[2] = 0
+                entry[3] = epoch
+            if entry[2] < self.quanta[level]:
+                entry[2] += 1
+                return entry[0]
+            # Quantum used up: demote to the tail of the next level
+            queue.popleft()
+            self._leave(level)
+            self._push(entry, min(level + 1, last))
+
+class CFSScheduler(_HeapScheduler):
+    """
+    Completely fair scheduler.
+
+    Each process accumulates virtual runtime: the steps it ran, scaled by
+    NICE_0_WEIGHT / priority_weight(priority), so higher priorities age
+    more slowly and get a proportionally larger share of the CPU while
+    nobody starves. The process with the smallest vruntime runs next,
+    found in O(log n) with a heap of [vruntime, arrival, proc] entries;
+    the running process is kept out of the heap and pushed back when it
+    is switched out.
+
+    Runtime is charged from the growth of `proc.step`, so it is exact
+    under any kernel quantum and for slices cut short by a fork or an
+    exit. A forked child starts at its parent's vruntime (the parent is
+    the running process) and a new process at `min_vruntime`, so neither
+    forking nor arriving late buys extra CPU. The running process keeps
+    the CPU until it has run `min_granularity` steps.
+    """
+    def __init__(self, min_granularity: int = 1):
+        if min_granularity < 1:
+            raise ValueError("min_granularity must be at least 1 step")
+        super().__init__()
+        self.min_granularity = min_granularity
+        self.min_vruntime = 0.0
+        self._current: Optional[list] = None
+        self._start = 0  # Step of the current process when it was last charged
+        self._ran = 0    # Steps the current process has run in this slice
+
+    def vruntime(self, proc: Process) -> float:
+        """The virtual runtime of a queued process, up to date"""
+        self._charge()
+        return self._entries[proc][0]
+
+    def _charge(self):
+        entry = self._current
+        if entry is None:
+            return
+        proc = entry[2]
+        ran = proc.step - self._start
+        if ran:
+            entry[0] += ran * NICE_0_WEIGHT / priority_weight(proc.priority)
+            self._start = proc.step
+            self._ran += ran
+
+    def enqueue(self, proc: Process):
+        """A new process starts at its parent's vruntime, or at min_vruntime"""
+        if proc in self._entries:
+            return
+        vruntime = self.min_vruntime
+        if self._current is not None:
+            self._charge()
+            vruntime = max(vruntime, self._current[0])
+        self._push(proc, vruntime)
+
+    def dequeue(self, proc: Process):
+        """Forget an exited process"""
+        entry = self._entries.pop(proc, None)
+        if entry is None:
+            return
+        if entry is self._current:
+            self._current = None
+            return
+        self._bury(entry)
+
+    def __call__(self, procs: Sequence[Process]) -> Process:
+        if not self._entries:
+            self._adopt(procs)
+
+        current = self._current
+        if current is not None:
+            self._charge()
+            if self._ran < self.min_granularity:
+                return current[2]
+            heapq.heappush(self._heap, current)
+            self._current = None
+
+        self._top()
+        entry = heapq.heappop(self._heap)
+        self._current = entry
+        proc = entry[2]
+        self._start = proc.step
+        self._ran = 0
+        if entry[0] > self.min_vruntime:
+            self.min_vruntime = entry[0]
+        return proc
+
+class LotteryScheduler(_StatefulScheduler):
+    """
+    Lottery scheduling.
+
+    Every process holds priority_weight(priority) tickets and each
+    decision draws one ticket at random, so a process runs with
+    probability proportional to its tickets. Ticket counts live in a
+    Fenwick tree indexed by slot, making both the weighted draw and
+    adding or removing a process O(log n); slots of exited processes are
+    reused. Draws come from random.Random(seed), or from the global
+    random module when no seed is given, like random_scheduler.
+    """
+    def __init__(self, seed: Optional[int] = None):
+        super().__init__()
+        self.rng = random.Random(seed) if seed is not None else None
+        self.total = 0            # Tickets held by all queued processes
+        self._capacity = 1        # Slots in the tree, a power of two
+        self._tree = [0, 0]       # 1-based Fenwick tree of ticket counts
+        self._tickets: List[int] = []
+        self._procs: List[Optional[Process]] = []  # By slot, _entries maps a process to its slot
+        self._free: List[int] = []
+
+    def tickets(self, proc: Process) -> int:
+        """Tickets held by a queued process"""
+        return self._tickets[self._entries[proc]]
+
+    def _add(self, slot: int, delta: int):
+        tree = self._tree
+        i = slot + 1
+        while i <= self._capacity:
+            tree[i] += delta
+            i += i & -i
+        self.total += delta
+
+    def _grow(self):
+        # Double the capacity and rebuild the tree in O(n)
+        self._capacity *= 2
+        capacity = self._capacity
+        tree = [0] + self._tickets + [0] * (capacity - len(self._tickets))
+        for i in range(1, capacity + 1):
+            parent = i + (i & -i)
+            if parent <= capacity:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def enqueue(self, proc: Process):
+        """Give a new process its tickets"""
+        if proc in self._entries:
+            return
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._procs)
+            self._procs.append(None)
+            self._tickets.append(0)
+            if slot >= self._capacity:
+                self._grow()
+        self._entries[proc] = slot
+        self._procs[slot] = proc
+        self.update(proc)
+
+    def dequeue(self, proc: Process):
+        """Take back the tickets of an exited process"""
+        slot = self._entries.pop(proc, None)
+        if slot is None:
+            return
+        self._add(slot, -self._tickets[slot])
+        self._tickets[slot] = 0
+        self._procs[slot] = None
+        self._free.append(slot)
+
+    def update(self, proc: Process):
+        """Recompute the tickets of a queued process after its priority changed"""
+        slot = self._entries[proc]
+        tickets = priority_weight(proc.priority)
+        self._add(slot, tickets - self._tickets[slot])
+        self._tickets[slot] = tickets
+
+    def __call__(self, procs: Sequence[Process]) -> Process:
+        if not self._entries:
+            self._adopt(procs)
+
+        rng = self.rng if self.rng is not None else random
+        ticket = rng.randrange(self.total)
+        # Walk down the tree to the slot whose ticket range holds `ticket`
+        tree = self._tree
+        capacity = self._capacity
+        slot = 0
+        step = capacity
+        while step:
+            i = slot + step
+            if i <= capacity and tree[i] <= ticket:
+                slot = i
+                ticket -= tree[i]
+            step >>= 1
+        return self._procs[slot]
+
+# Stride of a process holding one ticket
+STRIDE1 = 1 << 32
+
+class StrideScheduler(_HeapScheduler):
+    """
+    Stride scheduling, the deterministic counterpart of LotteryScheduler.
+
+    A process with t = priority_weight(priority) tickets has a stride of
+    STRIDE1 / t and a pass that grows by its stride every time it is
+    chosen. The process with the smallest pass runs next, earlier
+    arrivals first on ties, so over any window the decisions are split
+    in proportion to the tickets up to one quantum, with no randomness.
+    The smallest pass is found with a heap of [pass, arrival, proc],
+    O(log n) per decision. New processes start at the pass of the latest
+    decision, so they cannot claim the CPU for the time they were absent.
+    """
+    def __init__(self):
+        super().__init__()
+        self.global_pass = 0
+
+    def stride(self, proc: Process) -> int:
+        """How far a process's pass advances each time it runs"""
+        return STRIDE1 // priority_weight(proc.priority)
+
+    def pass_value(self, proc: Process) -> int:
+        """The pass of a queued process"""
+        return self._entries[proc][0]
+
+    def enqueue(self, proc: Process):
+        """A new process starts at the current global pass"""
+        if proc in self._entries:
+            return
+        self._push(proc, self.global_pass)
+
+    def dequeue(self, proc: Process):
+        """Forget an exited process"""
+        entry = self._entries.pop(proc, None)
+        if entry is None:
+            return
+        self._bury(entry)
+
+    def __call__(self, procs: Sequence[Process]) -> Process:
+        if not self._entries:
+            self._adopt(procs)
+
+        entry = self._top()
+        proc = entry[2]
+        self.global_pass = entry[0]
+        entry[0] += STRIDE1 // priority_weight(proc.priority)
+        heapq.heapreplace(self._heap, entry)  # Sift the advanced entry down
+        return proc
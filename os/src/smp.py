@@ -0,0 +1,238 @@
+import copy
+import math
+from typing import Dict, Iterable, List, Optional
+
+from .console import Console
+from .kernel import Kernel
+from .process import Process, Program, StreamProgram
+from .runqueue import RunQueue
+
+class CPU:
+    """One virtual CPU of an SMPKernel, with its own run queue and scheduler"""
+    def __init__(self, index: int, scheduler):
+        self.index = index
+        self.running_procs = RunQueue()
+        self.scheduler = scheduler
+        self.current: Optional[Process] = None
+        self.left = 0          # Steps left in the current process's slice
+        self.last = None       # Process scheduled last, to count switches
+        self.busy = 0          # Rounds spent running a process
+        self.idle = 0          # Rounds with nothing to run
+        self.decisions = 0
+        self.steals = 0        # Times it stole work from another CPU
+        self.migrations = 0    # Processes it received by stealing
+
+    def stats(self) -> Dict[str, float]:
+        rounds = self.busy + self.idle
+        return {
+            'busy': self.busy,
+            'idle': self.idle,
+            'utilization': self.busy / rounds if rounds else 0.0,
+            'decisions': self.decisions,
+            'steals': self.steals,
+            'migrations': self.migrations,
+            'queued': len(self.running_procs),
+        }
+
+    def __repr__(self):
+        return f"CPU({self.index}, {len(self.running_procs)} queued)"
+
+class SMPKernel(Kernel):
+    """
+    A kernel with several virtual CPUs.
+
+    Each CPU has a local run queue and its own copy of the scheduler
+    (stateful schedulers are deep-copied, functions shared), and makes its
+    scheduling decisions from its local queue only. Time advances in
+    rounds: every round each CPU runs one step of its current process,
+    so `time` is the elapsed virtual time while `clock` still counts the
+    steps executed on all CPUs together. Accounting uses `time`, which
+    makes turnaround and response comparable across CPU counts.
+
+    Processes are spread round robin when the kernel starts, and a forked
+    child starts on its parent's CPU. A CPU whose queue runs dry steals
+    half of the longest queue, taking processes from its tail and never
+    the one that CPU is running. Nothing on the hot path is O(number of
+    processes); only stealing looks at every CPU. `running_procs` holds
+    every process for membership and counting.
+
+    Sleeping processes wake at the start of a round and go to a CPU round
+    robin. When every process sleeps, `time` jumps to the next timer and
+    every CPU counts the skipped rounds as idle.
+    """
+    def __init__(
+        self,
+        scheduler=None,
+        procs: Iterable[Process] = (),
+        console: Optional[Console] = None,
+        quantum: int = 1,
+        accounting: bool = True,
+        cpus: int = 2
+    ):
+        if cpus < 1:
+            raise ValueError("an SMP kernel needs at least one CPU")
+        super().__init__(scheduler, (), console, quantum, accounting)
+        self.time = 0
+        self.cpus: List[CPU] = [CPU(i, copy.deepcopy(scheduler)) for i in range(cpus)]
+        self._cpu_of: Dict[Process, CPU] = {}
+        self._running: Optional[CPU] = None  # CPU executing a syscall right now
+        self._spread = 0
+        for proc in procs:
+            self.process_push(proc)
+
+    def now(self) -> int:
+        return self.time
+
+    def _skip_idle(self):
+        skipped = max(0, self._deadline - self.time)
+        self.time += skipped
+        self.idle += skipped
+        for cpu in self.cpus:
+            cpu.idle += skipped
+        self.expire_timers()
+
+    def _enqueue(self, proc: Process):
+        # A forked child stays with its parent, anything else is spread out
+        cpu = self._running
+        if cpu is None:
+            cpu = self.cpus[self._spread]
+            self._spread = (self._spread + 1) % len(self.cpus)
+        self._place(proc, cpu)
+
+    def _place(self, proc: Process, cpu: CPU):
+        self._cpu_of[proc] = cpu
+        cpu.running_procs.append(proc)
+        enqueue = getattr(cpu.scheduler, 'enqueue', None)
+        if enqueue is not None:
+            enqueue(proc)
+
+    def _dequeue(self, proc: Process):
+        cpu = self._cpu_of.pop(proc)
+        cpu.running_procs.remove(proc)
+        dequeue = getattr(cpu.scheduler, 'dequeue', None)
+        if dequeue is not None:
+            dequeue(proc)
+        if cpu.current is proc:
+            cpu.current = None
+            cpu.left = 0
+
+    def cpu_of(self, proc: Process) -> CPU:
+        """The CPU whose run queue holds a process"""
+        return self._cpu_of[proc]
+
+    def steal(self, thief: CPU) -> int:
+        """Move half of the longest run queue to `thief`, return how many moved"""
+        victim = max(self.cpus, key=lambda cpu: len(cpu.running_procs))
+        queue = victim.running_procs
+        n = len(queue) // 2
+        if victim is thief or n == 0:
+            return 0
+        running = None
+        for _ in range(n):
+            proc = queue[-1]
+            if proc is victim.current:
+                # Keep the running process, put it back once done
+                running = proc
+                queue.remove(proc)
+                proc = queue[-1]
+            self._dequeue(proc)
+            self._place(proc, thief)
+        if running is not None:
+            queue.append(running)
+        thief.steals += 1
+        thief.migrations += n
+        return n
+
+    def process_schedule(self, cpu: Optional[CPU] = None) -> Optional[Process]:
+        """
+        Ask a CPU's scheduler (CPU 0 by default) for its next process,
+        stealing work first if its queue is empty. None if it stays idle.
+        """
+        if cpu is None:
+            cpu = self.cpus[0]
+        if not cpu.running_procs and not self.steal(cpu):
+            cpu.current = None
+            return None
+        self.decisions += 1
+        cpu.decisions += 1
+        proc = cpu.scheduler(cpu.running_procs)
+        acct = proc.acct
+        if acct is not None:
+            if proc is not cpu.last:
+                acct.switches += 1
+                cpu.last = proc
+            if acct.first_run < 0:
+                acct.first_run = self.time
+        cpu.current = proc
+        return proc
+
+    def run(self, max_decisions: Optional[int] = None) -> bool:
+        """
+        Run until all processes exit, one step per CPU per round.
+
+        A slice lasts `quantum` steps (unlimited for sticky schedulers)
+        and, as on one CPU, ends early after a syscall that is not
+        batchable. With `max_decisions` the kernel pauses at the end of
+        the round in which that many decisions were reached and returns
+        False.
+        """
+        if self.trace is not None:
+            raise ValueError("tracing is not supported on an SMP kernel")
+        sticky = getattr(self.scheduler, 'sticky', False)
+        handlers = self.syscall_handlers
+        batchable = self.syscall_batchable
+        procs = self.running_procs
+        cpus = self.cpus
+        schedule = self.process_schedule
+        stop = None if max_decisions is None else self.decisions + max_decisions
+        while procs or self.sleeping:
+            if stop is not None and self.decisions >= stop:
+                return False
+            if self.sleeping:
+                if self.time >= self._deadline:
+                    self.expire_timers()
+                if not procs:
+                    self._skip_idle()
+                    continue
+            self.time += 1
+            for cpu in cpus:
+                proc = cpu.current
+                if proc is None or cpu.left <= 0:
+                    proc = schedule(cpu)
+                    if proc is None:
+                        cpu.idle += 1
+                        continue
+                    cpu.left = math.inf if sticky else self.quantum
+
+                program = proc.program
+                if program.__class__ is Program:
+                    call = program.table[program.refs[proc.step]]
+                elif program.__class__ is StreamProgram:
+                    call = program.cursor(proc).next()
+                else:
+                    call = program[proc.step]
+                proc.step += 1
+                self.clock += 1
+                cpu.busy += 1
+                cpu.left -= 1
+
+                opcode = call.syscall
+                if not batchable[opcode]:
+                    cpu.left = 0
+                handler = handlers[opcode]
+                if handler is None:
+                    self.process_syscall(proc, call)  # Raises
+                self._running = cpu
+                handler(self, proc, call, 1)
+                self._running = None
+
+        self.console_write('\n')
+        self.console_flush()
+        return True
+
+    def replay(self, file):
+        raise ValueError("tracing is not supported on an SMP kernel")
+
+    def cpu_stats(self) -> List[Dict[str, float]]:
+        """Busy and idle rounds, utilization, decisions and stealing, per CPU"""
+        return [cpu.stats() for cpu in self.cpus]
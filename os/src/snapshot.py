@@ -0,0 +1,96 @@
+import mmap
+import pickle
+import random
+import struct
+from typing import List, Optional, TextIO
+
+MAGIC = b'OSSN\x01'
+
+# Pickle length and number of out-of-band buffers, then one length per buffer
+HEADER = struct.Struct('<QI')
+LENGTH = struct.Struct('<Q')
+
+# Buffers start on 8-byte boundaries in a saved snapshot
+ALIGN = 8
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+class Snapshot:
+    """
+    A kernel frozen between two scheduling decisions.
+
+    Holds the run queue with every process and its step, the scheduler,
+    the console's unflushed text, the clock and accounting, together with
+    the random module's state, so a restored kernel continues exactly as
+    the original would have. Program arrays are pickled with protocol 5
+    as out-of-band buffers: restoring shares them with the snapshot
+    instead of copying, and a snapshot loaded from disk maps them straight
+    from the file. Schedulers and syscall handlers are pickled by
+    reference, so they must be module-level functions.
+    """
+    def __init__(self, data: bytes, buffers: List):
+        self.data = data
+        self.buffers = buffers
+
+    def restore(self, stream: Optional[TextIO] = None, restore_rng: bool = True):
+        """A new Kernel in the captured state, its console writing to `stream`"""
+        kernel, rng_state = pickle.loads(self.data, buffers=self.buffers)
+        kernel.console.stream = stream
+        if restore_rng:
+            random.setstate(rng_state)
+        return kernel
+
+    def nbytes(self) -> int:
+        """Size of the pickle plus all program buffers"""
+        return len(self.data) + sum(memoryview(buf).nbytes for buf in self.buffers)
+
+    def save(self, path: str):
+        """Write the snapshot to a file that load() can map back"""
+        views = [memoryview(buf).cast('B') for buf in self.buffers]
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(HEADER.pack(len(self.data), len(views)))
+            for view in views:
+                f.write(LENGTH.pack(view.nbytes))
+            offset = len(MAGIC) + HEADER.size + LENGTH.size * len(views)
+            f.write(self.data)
+            offset += len(self.data)
+            for view in views:
+                f.write(bytes(_pad(offset)))
+                offset += _pad(offset)
+                f.write(view)
+                offset += view.nbytes
+
+    @classmethod
+    def load(cls, path: str) -> 'Snapshot':
+        """Map a saved snapshot, program buffers are not read until used"""
+        with open(path, 'rb') as f:
+            size = f.seek(0, 2)
+            if size < len(MAGIC) + HEADER.size:
+                raise ValueError("not an OS simulator snapshot")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        memory = memoryview(mapped)
+        if memory[:len(MAGIC)] != MAGIC:
+            raise ValueError("not an OS simulator snapshot")
+        offset = len(MAGIC)
+        data_size, count = HEADER.unpack_from(memory, offset)
+        offset += HEADER.size
+        sizes = [LENGTH.unpack_from(memory, offset + i * LENGTH.size)[0] for i in range(count)]
+        offset += LENGTH.size * count
+        data = memory[offset:offset + data_size]
+        offset += data_size
+        buffers = []
+        for n in sizes:
+            offset += _pad(offset)
+            buffers.append(memory[offset:offset + n])
+            offset += n
+        if offset > size:
+            raise ValueError("truncated snapshot")
+        return cls(data, buffers)
+
+def snapshot(kernel) -> Snapshot:
+    """Capture a paused kernel, see Kernel.run(max_decisions)"""
+    buffers = []
+    data = pickle.dumps((kernel, random.getstate()), protocol=5, buffer_callback=buffers.append)
+    return Snapshot(data, buffers)
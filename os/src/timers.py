@@ -0,0 +1,140 @@
+import heapq
+from typing import Any, List, Optional, Tuple
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel for virtual time.
+
+    Level L has 64 slots, each 64**L ticks wide. A timer goes to the
+    level of the highest base-64 digit in which its expiry time differs
+    from `now`, in the slot given by that digit, so insertion is O(1)
+    whatever the number of pending timers. When time reaches a slot of a
+    higher level, its timers cascade down to lower levels (at most once
+    per level), and level 0 slots expire exactly on their tick. A bitmap
+    of occupied slots per level finds the next slot to visit with one bit
+    trick, which lets the clock jump straight to the next event instead of
+    ticking through idle time. Timers beyond the top level wait in a heap.
+
+    Timers are [when, item] lists; cancel() marks them dead and they are
+    dropped when their slot comes up.
+    """
+    BITS = 6
+    SLOTS = 1 << BITS
+    MASK = SLOTS - 1
+
+    def __init__(self, levels: int = 6, now: int = 0):
+        self.now = now
+        self.levels = levels
+        self._slots: List[List[list]] = [[[] for _ in range(self.SLOTS)] for _ in range(levels)]
+        self._bitmaps = [0] * levels
+        self._overflow: List[list] = []  # Heap of [when, seq, timer]
+        self._seq = 0
+        self._due: List[list] = []       # Timers that were already due when scheduled
+        self.pending = 0
+        self._found = None  # Cached result of _next(), None when stale
+
+    def __len__(self) -> int:
+        return self.pending
+
+    def schedule(self, when: int, item: Any) -> list:
+        """Fire `item` at time `when`, returns a handle for cancel()"""
+        timer = [when, item]
+        self.pending += 1
+        self._insert(timer)
+        return timer
+
+    def cancel(self, timer: list):
+        """Stop a timer from firing, if it has not fired yet"""
+        if timer[1] is not None:
+            timer[1] = None
+            self.pending -= 1
+
+    def _insert(self, timer: list):
+        when = timer[0]
+        self._found = None
+        if when <= self.now:
+            self._due.append(timer)
+            return
+        level = ((when ^ self.now).bit_length() - 1) // self.BITS
+        if level >= self.levels:
+            heapq.heappush(self._overflow, [when, self._seq, timer])
+            self._seq += 1
+            return
+        slot = (when >> (self.BITS * level)) & self.MASK
+        self._slots[level][slot].append(timer)
+        self._bitmaps[level] |= 1 << slot
+
+    def _next(self) -> Optional[Tuple[int, int, int]]:
+        # (time, level, slot) of the next slot to visit; level == levels
+        # stands for the overflow heap
+        found = self._found
+        if found is None:
+            found = self._found = self._scan()
+        return found
+
+    def _scan(self) -> Optional[Tuple[int, int, int]]:
+        now = self.now
+        bitmaps = self._bitmaps
+        shift = 0
+        for level in range(self.levels):
+            bitmap = bitmaps[level]
+            if bitmap:
+                digit = (now >> shift) & self.MASK
+                occupied = bitmap >> digit
+                if occupied:
+                    slot = digit + (occupied & -occupied).bit_length() - 1
+                    top = shift + self.BITS
+                    when = max(now, (now >> top << top) | (slot << shift))
+                    if self._overflow and self._overflow[0][0] < when:
+                        break  # Time jumped into the range of an overflowed timer
+                    return when, level, slot
+            shift += self.BITS
+        if self._overflow:
+            return self._overflow[0][0], self.levels, 0
+        return None
+
+    def next_deadline(self) -> Optional[int]:
+        """
+        When advance() next has work to do: the earliest expiry, or the
+        start of a higher level slot that has to cascade first. None if no
+        timers are pending.
+        """
+        if self._due:
+            return self.now
+        found = self._next()
+        return None if found is None else found[0]
+
+    def advance(self, now: int) -> List[Any]:
+        """Move time forward to `now`, returning the items that expired, in order"""
+        fired = []
+        while True:
+            if self._due:
+                due, self._due = self._due, []
+                for timer in due:
+                    item = timer[1]
+                    if item is not None:
+                        fired.append(item)
+                        timer[1] = None
+                        self.pending -= 1
+            found = self._next()
+            if found is None or found[0] > now:
+                break
+            self._found = None
+            self.now, level, slot = found
+            if level == self.levels:
+                timers = []
+                overflow = self._overflow
+                limit = self.BITS * self.levels
+                while overflow and (overflow[0][0] ^ self.now).bit_length() <= limit:
+                    timers.append(heapq.heappop(overflow)[2])
+            else:
+                timers = self._slots[level][slot]
+                self._slots[level][slot] = []
+                self._bitmaps[level] &= ~(1 << slot)
+            insert = self._insert
+            for timer in timers:
+                if timer[1] is not None:
+                    insert(timer)  # Due now, or into a lower level
+        if now > self.now:
+            self.now = now  # The cached slot is still the next one
+        return fired
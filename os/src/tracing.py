@@ -0,0 +1,87 @@
+import struct
+from typing import BinaryIO, Iterator, Tuple, Union
+
+MAGIC = b'OSTR\x01'
+
+# One record per time slice: pid of the process that ran, steps it ran
+# and the opcode of the last syscall it executed
+RECORD = struct.Struct('<IIB')
+
+class TraceWriter:
+    """
+    Records scheduling decisions to a binary trace file.
+
+    Records are packed into a buffer of at most `buffer_size` bytes that is
+    written out whenever it fills up, so memory stays bounded however long
+    the run. Back-to-back slices of the same process are merged when the
+    first one ended in a batchable syscall, since replaying them as one
+    slice executes exactly the same steps.
+    """
+    def __init__(self, file: Union[str, BinaryIO], buffer_size: int = 1 << 16):
+        self._owns_file = isinstance(file, str)
+        self._file = open(file, 'wb') if self._owns_file else file
+        self._file.write(MAGIC)
+        self._buffer = bytearray()
+        self._limit = max(buffer_size, RECORD.size)
+        self._pid = -1
+        self._steps = 0
+        self._opcode = 0
+        self._mergeable = False
+        self.records = 0
+
+    def record(self, pid: int, steps: int, opcode: int, mergeable: bool):
+        """Record that process `pid` ran `steps` steps, ending in `opcode`"""
+        if pid == self._pid and self._mergeable:
+            self._steps += steps
+        else:
+            self._emit()
+            self._pid = pid
+            self._steps = steps
+        self._opcode = opcode
+        self._mergeable = mergeable
+
+    def _emit(self):
+        if self._pid < 0:
+            return
+        self._buffer += RECORD.pack(self._pid, self._steps, self._opcode)
+        self.records += 1
+        if len(self._buffer) >= self._limit:
+            self.flush()
+
+    def flush(self):
+        """Write out the buffered records"""
+        self._file.write(self._buffer)
+        self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        """Write out everything, including the slice still being merged"""
+        self._emit()
+        self._pid = -1
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+
+class TraceReader:
+    """Reads a trace back, `chunk_records` records at a time"""
+    def __init__(self, file: Union[str, BinaryIO], chunk_records: int = 4096):
+        self._owns_file = isinstance(file, str)
+        self._file = open(file, 'rb') if self._owns_file else file
+        if self._file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not an OS simulator trace")
+        self._chunk = chunk_records * RECORD.size
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        read = self._file.read
+        chunk = self._chunk
+        while True:
+            data = read(chunk)
+            if not data:
+                break
+            if len(data) % RECORD.size:
+                raise ValueError("truncated trace")
+            yield from RECORD.iter_unpack(data)
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
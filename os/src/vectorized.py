@@ -0,0 +1,154 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional, without NumPy every run takes the stepping path
+    np = None
+
+from .console import Console
+from .kernel import Kernel, sys_exit, sys_write, sys_write_double
+from .process import Process, RunLengthProgram, StreamProgram, SyscallType
+from .schedulers import round_robin_scheduler
+
+# What each step does, by opcode. A write's kind is also how many times
+# it repeats its argument
+_EXIT, _WRITE, _DOUBLE, _OTHER = 0, 1, 2, 3
+_KINDS = {SyscallType.SYS_EXIT: _EXIT, SyscallType.SYS_WRITE: _WRITE, SyscallType.SYS_WRITE_DOUBLE: _DOUBLE}
+
+class VectorKernel(Kernel):
+    """
+    A round robin kernel that runs fork-free workloads in bulk with NumPy.
+
+    When every process only writes (SYS_WRITE and SYS_WRITE_DOUBLE with
+    their default handlers) until it exits, the round robin interleaving
+    follows from the program lengths alone: in round r each process still
+    running executes its steps [r * quantum, (r + 1) * quantum). run() then
+    lays out all slices with array arithmetic, writes the whole output at
+    once and leaves the clock, decisions, pids and accounting as stepping
+    would. A quantum at least as long as every program runs the processes
+    one after another, like sequential_scheduler.
+
+    Anything else (forks, sleeps, other syscalls, programs that end without
+    an exit, paused or traced runs, or no NumPy installed) runs step by
+    step in Kernel.run with the same scheduler. `vectorized` tells which
+    path the last run took.
+    """
+    def __init__(
+        self,
+        procs: Iterable[Process] = (),
+        console: Optional[Console] = None,
+        quantum: int = 1,
+        accounting: bool = True
+    ):
+        super().__init__(round_robin_scheduler, procs, console, quantum, accounting)
+        self.vectorized = False
+        self._encoded: Dict[int, Tuple] = {}  # id(program) -> (program, kinds, texts, step refs)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['_encoded'] = {}
+        return state
+
+    def run(self, max_decisions: Optional[int] = None) -> bool:
+        """Run until all processes exit, in bulk when the schedule is predictable"""
+        self.vectorized = False
+        if np is None or max_decisions is not None or self.trace is not None:
+            return super().run(max_decisions)
+        plan = self._plan()
+        if plan is None:
+            return super().run(max_decisions)
+        self._execute(*plan)
+        self.vectorized = True
+        self.console_write('\n')
+        self.console_flush()
+        return True
+
+    def _encode(self, program) -> Tuple:
+        # Per program: the kind and output of every table entry, and the
+        # table entry of every step
+        encoded = self._encoded.get(id(program))
+        if encoded is None or encoded[0] is not program:
+            table = program.table
+            kinds = np.array([_KINDS.get(call.syscall, _OTHER) for call in table], dtype=np.int8)
+            texts = np.array([str(call.arg) * kind if kind in (_WRITE, _DOUBLE) else ''
+                              for call, kind in zip(table, kinds.tolist())], dtype=object)
+            refs = np.asarray(program.refs, dtype=np.int64)
+            if isinstance(program, RunLengthProgram):
+                ends = np.asarray(program.ends, dtype=np.int64)
+                refs = np.repeat(refs, np.diff(ends, prepend=0))
+            encoded = self._encoded[id(program)] = (program, kinds, texts, refs)
+        return encoded
+
+    def _plan(self) -> Optional[Tuple[List[Process], 'np.ndarray', 'np.ndarray']]:
+        # The processes in queue order, how many steps each has left up to
+        # and including its exit, and the output of all those steps
+        handlers = self.syscall_handlers
+        if (handlers[SyscallType.SYS_EXIT] is not sys_exit or handlers[SyscallType.SYS_WRITE] is not sys_write
+                or handlers[SyscallType.SYS_WRITE_DOUBLE] is not sys_write_double):
+            return None
+        if self.sleeping or self.waiters or self.groups:
+            return None
+        procs = list(self.running_procs)
+        if not procs:
+            return None
+        lengths = np.empty(len(procs), dtype=np.int64)
+        texts = []
+        for i, proc in enumerate(procs):
+            if proc.program is None or proc.program.__class__ is StreamProgram:
+                return None  # Coroutines and streams have no array to compute on
+            _, kinds, table_texts, refs = self._encode(proc.program)
+            remaining = refs[proc.step:]
+            stops = np.flatnonzero(kinds[remaining] != _WRITE)
+            stops = stops[kinds[remaining[stops]] != _DOUBLE]
+            if not len(stops) or kinds[remaining[stops[0]]] != _EXIT:
+                return None  # A syscall that needs the kernel, or no exit at all
+            length = int(stops[0]) + 1
+            lengths[i] = length
+            texts.append(table_texts[remaining[:length]])
+        return procs, lengths, np.concatenate(texts)
+
+    def _execute(self, procs: List[Process], lengths: 'np.ndarray', texts: 'np.ndarray'):
+        n = len(procs)
+        quantum = self.quantum
+        first_step = np.cumsum(lengths) - lengths
+        slices = (lengths + quantum - 1) // quantum
+        slice_base = np.cumsum(slices) - slices
+
+        # Every slice, by process then round, and the order they run in:
+        # round by round, in queue order within a round
+        slice_proc = np.repeat(np.arange(n), slices)
+        slice_round = np.arange(len(slice_proc)) - np.repeat(slice_base, slices)
+        order = np.lexsort((slice_proc, slice_round))
+        run_proc = slice_proc[order]
+        run_length = np.minimum(quantum, lengths[run_proc] - slice_round[order] * quantum)
+        start = np.empty(len(order), dtype=np.int64)
+        start[order] = np.cumsum(run_length) - run_length
+
+        # Step k of a process runs at offset k % quantum of its slice k // quantum
+        step_proc = np.repeat(np.arange(n), lengths)
+        k = np.arange(len(step_proc)) - np.repeat(first_step, lengths)
+        position = start[slice_base[step_proc] + k // quantum] + k % quantum
+        output = np.empty(len(position), dtype=object)
+        output[position] = texts
+        self.console_write(''.join(output.tolist()))
+
+        # Accounting as the stepping kernel keeps it
+        previous = procs.index(self._last) if self._last in procs else -1
+        switched = run_proc != np.concatenate(([previous], run_proc[:-1]))
+        switches = np.bincount(run_proc[switched], minlength=n).tolist()
+        first_run = start[slice_base].tolist()
+        completion = (position[first_step + lengths - 1] + 1).tolist()
+        begin = self.now()
+        steps_before = self.clock
+        for i in np.argsort(completion, kind='stable').tolist():
+            proc = procs[i]
+            proc.step += int(lengths[i])
+            acct = proc.acct
+            if acct is not None:
+                acct.switches += switches[i]
+                if acct.first_run < 0:
+                    acct.first_run = begin + first_run[i]
+            self.clock = steps_before + completion[i]
+            self.process_exit(proc)
+        self.decisions += len(order)
+        self._last = procs[int(run_proc[-1])]
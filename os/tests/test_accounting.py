@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.accounting import Accounting, ProcessAccount
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Syscall, SyscallType
+from src.schedulers import round_robin_scheduler
+from labs.lab1 import sequential_scheduler
+
+def writes(n: int):
+    return [Syscall(SyscallType.SYS_WRITE, "A")] * n + [Syscall(SyscallType.SYS_EXIT)]
+
+class TestAccounting(unittest.TestCase):
+    def run_kernel(self, scheduler, procs, **kwargs) -> Kernel:
+        kernel = Kernel(scheduler, procs, Console(stream=StringIO()), **kwargs)
+        kernel.run()
+        return kernel
+
+    def test_sequential(self):
+        """Later processes wait for the earlier ones to finish"""
+        a, b = Process(writes(2)), Process(writes(1))
+        kernel = self.run_kernel(sequential_scheduler, [a, b])
+
+        self.assertEqual((a.acct.arrival, a.acct.first_run, a.acct.completion), (0, 0, 3))
+        self.assertEqual((b.acct.arrival, b.acct.first_run, b.acct.completion), (0, 3, 5))
+        stats = kernel.stats()
+        self.assertEqual(stats['turnaround']['max'], 5)
+        self.assertEqual(stats['response']['mean'], 1.5)
+        self.assertEqual(stats['wait']['p99'], 3)
+        self.assertEqual(stats['switches']['mean'], 1)
+
+    def test_round_robin_switches(self):
+        """Round robin switches on every step"""
+        a, b = Process(writes(2)), Process(writes(2))
+        self.run_kernel(round_robin_scheduler, [a, b])
+
+        self.assertEqual(a.acct.switches, 3)
+        self.assertEqual(b.acct.switches, 3)
+        self.assertEqual(b.acct.response(), 1)
+        self.assertEqual(b.acct.turnaround(), 6)
+
+    def test_quantum_reduces_switches(self):
+        a, b = Process(writes(5)), Process(writes(5))
+        self.run_kernel(round_robin_scheduler, [a, b], quantum=3)
+
+        self.assertEqual(a.acct.switches, 2)
+
+    def test_fork_arrival(self):
+        """A forked process arrives when it is forked and runs only its own steps"""
+        parent = Process([Syscall(SyscallType.SYS_WRITE, "A"), Syscall(SyscallType.SYS_FORK)] + writes(1))
+        kernel = self.run_kernel(sequential_scheduler, [parent])
+
+        self.assertEqual(kernel.accounting.completed(), 2)
+        stats = kernel.stats()
+        # The child arrives at 2, runs 2 steps after the parent exits at 4
+        self.assertEqual(stats['turnaround']['max'], 4)
+        self.assertEqual(stats['wait']['max'], 2)
+
+    def test_switched_off(self):
+        proc = Process(writes(1))
+        kernel = self.run_kernel(sequential_scheduler, [proc], accounting=False)
+
+        self.assertIsNone(proc.acct)
+        self.assertIsNone(kernel.accounting)
+        with self.assertRaises(ValueError):
+            kernel.stats()
+
+    def test_percentiles(self):
+        accounting = Accounting()
+        for i in range(100):
+            account = ProcessAccount(0, 0)
+            account.first_run = 0
+            account.completion = i + 1
+            accounting.complete(account, 1)
+
+        stats = accounting.summary()
+        self.assertEqual(stats['turnaround']['p50'], 50)
+        self.assertEqual(stats['turnaround']['p99'], 99)
+        self.assertEqual(stats['wait']['max'], 99)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch import WorkloadSpec, run_batch, run_simulation, sweep
+from src.process import Syscall, SyscallType
+from labs.lab1 import sequential_scheduler
+from labs.lab2 import priority_scheduler
+from examples.main import random_scheduler
+
+def make_workload(name: str, chars: str) -> WorkloadSpec:
+    programs = [[Syscall(SyscallType.SYS_WRITE, c)] * 3 + [Syscall(SyscallType.SYS_EXIT)] for c in chars]
+    return WorkloadSpec(name, programs, sequential_scheduler, priorities=range(len(chars)), seed=7)
+
+class TestBatch(unittest.TestCase):
+    def test_run_simulation(self):
+        """A spec runs in a fresh kernel and reports its stats"""
+        spec = make_workload("ab", "AB")
+        result = run_simulation(spec)
+
+        self.assertEqual(result.output, "AAABBB\n")
+        self.assertEqual(result.steps, 8)
+        self.assertEqual(result.scheduler, "sequential_scheduler")
+        self.assertEqual(result.stats['turnaround']['max'], 8)
+        # The spec can run again, its processes are rebuilt every time
+        self.assertEqual(run_simulation(spec).output, result.output)
+
+    def test_sweep(self):
+        """A sweep covers every workload, scheduler and quantum"""
+        specs = sweep([make_workload("ab", "AB"), make_workload("xyz", "XYZ")],
+                      [sequential_scheduler, priority_scheduler, random_scheduler], [1, 2])
+
+        self.assertEqual(len(specs), 12)
+        self.assertIs(specs[0].programs, specs[1].programs)
+        self.assertEqual({spec.quantum for spec in specs}, {1, 2})
+
+    def test_pool_matches_serial(self):
+        """Running in worker processes gives the same results, in order"""
+        specs = sweep([make_workload("ab", "AB"), make_workload("xyz", "XYZ")],
+                      [sequential_scheduler, priority_scheduler, random_scheduler])
+        serial = run_batch(specs, workers=1)
+        pooled = run_batch(specs, workers=2, chunksize=2)
+
+        self.assertEqual([r.output for r in pooled], [r.output for r in serial])
+        self.assertEqual([r.decisions for r in pooled], [r.decisions for r in serial])
+        self.assertEqual(pooled[4].output, "ZZZYYYXXX\n")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+from io import StringIO
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+
+class CountingStream(StringIO):
+    """A stream that counts how often it is written to"""
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+class TestConsole(unittest.TestCase):
+    def run_console(self, mode: str, buffer_size: int = 8192):
+        stream = CountingStream()
+        console = Console(mode, buffer_size, stream)
+        for _ in range(100):
+            console.write("AB")
+        console.write("\n")
+        console.flush()
+        return stream
+
+    def test_same_output_in_every_mode(self):
+        """Buffering never changes the bytes written"""
+        for mode in Console.MODES:
+            self.assertEqual(self.run_console(mode).getvalue(), "AB" * 100 + "\n")
+
+    def test_unbuffered(self):
+        """Unbuffered mode writes once per call"""
+        self.assertEqual(self.run_console('unbuffered').writes, 101)
+
+    def test_line(self):
+        """Line mode writes once the newline arrives"""
+        self.assertEqual(self.run_console('line').writes, 1)
+
+    def test_block(self):
+        """Block mode writes whenever the buffer fills up"""
+        self.assertEqual(self.run_console('block', buffer_size=50).writes, 5)
+
+    def test_exit(self):
+        """Exit mode holds everything until flushed"""
+        stream = CountingStream()
+        console = Console('exit', 1, stream)
+        console.write("A\n")
+        self.assertEqual(stream.writes, 0)
+        self.assertEqual(console.pending(), "A\n")
+        console.flush()
+        self.assertEqual(stream.getvalue(), "A\n")
+
+    def test_follows_stdout(self):
+        """Without a stream the console writes to the current sys.stdout"""
+        console = Console()
+        f = StringIO()
+        with redirect_stdout(f):
+            console.write("X")
+            console.flush()
+        self.assertEqual(f.getvalue(), "X")
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            Console('full')
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
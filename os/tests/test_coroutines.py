@@ -0,0 +1,188 @@
+import unittest
+import sys
+import os
+import asyncio
+import copy
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.coroutines import AsyncKernel, AsyncProcess
+from src.kernel import Kernel
+from src.process import Process, Syscall, SyscallType
+from src.schedulers import MLFQScheduler, round_robin_scheduler
+from labs.lab1 import sequential_scheduler
+
+def write(text):
+    return Syscall(SyscallType.SYS_WRITE, text)
+
+EXIT = Syscall(SyscallType.SYS_EXIT)
+
+async def writer(text: str):
+    for char in text:
+        yield write(char)
+    yield EXIT
+
+def run(scheduler, procs, quantum: int = 1):
+    output = StringIO()
+    kernel = AsyncKernel(scheduler, procs, Console(stream=output), quantum)
+    kernel.run()
+    return output.getvalue(), kernel
+
+class TestCoroutines(unittest.TestCase):
+    def test_matches_list_programs(self):
+        """Coroutine processes interleave exactly like the same syscall lists"""
+        for scheduler in [round_robin_scheduler, sequential_scheduler]:
+            for quantum in [1, 3]:
+                output, kernel = run(scheduler, [AsyncProcess(writer(t)) for t in ["AAAA", "BB", "CCCCCC"]], quantum)
+                expected = StringIO()
+                procs = [Process([write(c) for c in t] + [EXIT]) for t in ["AAAA", "BB", "CCCCCC"]]
+                Kernel(scheduler, procs, Console(stream=expected), quantum).run()
+                self.assertEqual(output, expected.getvalue())
+                self.assertEqual(kernel.clock, 15)
+
+    def test_fork_returns_pid(self):
+        """A fork runs the given generator function and returns the child's pid"""
+        pids = []
+
+        async def child():
+            yield write("c")
+
+        async def parent():
+            pid = yield Syscall(SyscallType.SYS_FORK, child)
+            pids.append(pid)
+            yield write("p")
+
+        output, kernel = run(round_robin_scheduler, [AsyncProcess(parent())])
+        self.assertEqual(pids, [1])
+        self.assertEqual(sorted(output.strip()), ["c", "p"])
+        # Returning from the generator exits
+        self.assertEqual(kernel.accounting.completed(), 2)
+
+    def test_waiting_does_not_block_others(self):
+        """A process awaiting a queue leaves the CPU to the others"""
+        async def main():
+            queue = asyncio.Queue()
+
+            async def consumer():
+                for _ in range(3):
+                    item = await queue.get()
+                    yield write(item)
+                yield EXIT
+
+            async def producer():
+                for item in "xyz":
+                    yield write(item.upper())
+                    await queue.put(item)
+                yield EXIT
+
+            output = StringIO()
+            kernel = AsyncKernel(round_robin_scheduler, [AsyncProcess(consumer()), AsyncProcess(producer())],
+                                 Console(stream=output))
+            await kernel.run_async()
+            return output.getvalue(), kernel
+
+        output, kernel = asyncio.run(main())
+        # Each item is written after it was produced
+        self.assertEqual(sorted(output.strip()), sorted("XYZxyz"))
+        for item in "xyz":
+            self.assertLess(output.index(item.upper()), output.index(item))
+        self.assertEqual(kernel.waiting, 0)
+
+    def test_everyone_waiting(self):
+        """The kernel waits on the loop until something wakes a process up"""
+        async def sleeper(char: str, wake: asyncio.Event, done: asyncio.Event):
+            await wake.wait()
+            yield write(char)
+            await asyncio.sleep(0)
+            yield write(char.lower())
+            done.set()
+
+        async def main():
+            events = {c: (asyncio.Event(), asyncio.Event()) for c in "AB"}
+            kernel = AsyncKernel(round_robin_scheduler, [AsyncProcess(sleeper(c, *events[c])) for c in "BA"],
+                                 Console(stream=output))
+            running = asyncio.ensure_future(kernel.run_async())
+            # Wake A, then B once A is done, while every process waits
+            for c in "AB":
+                wake, done = events[c]
+                wake.set()
+                await done.wait()
+            await running
+
+        output = StringIO()
+        asyncio.run(main())
+        self.assertEqual(output.getvalue(), "AaBb\n")
+
+    def test_stateful_scheduler(self):
+        """Waiting processes leave and rejoin a stateful scheduler"""
+        async def napper(char: str):
+            for _ in range(5):
+                yield write(char)
+                await asyncio.sleep(0)
+
+        scheduler = MLFQScheduler()
+        output, _ = run(scheduler, [AsyncProcess(napper(c)) for c in "ABC"] + [Process([write("d")] * 5 + [EXIT])])
+        self.assertEqual(sorted(output.strip()), sorted("AAAAABBBBBCCCCCddddd"))
+        self.assertFalse(scheduler._entries)
+
+    def test_errors(self):
+        """Exceptions and bad yields surface from run()"""
+        async def crash():
+            yield write("a")
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            run(round_robin_scheduler, [AsyncProcess(crash())])
+
+        async def bad():
+            yield "not a syscall"
+
+        with self.assertRaises(TypeError):
+            run(round_robin_scheduler, [AsyncProcess(bad())])
+        with self.assertRaises(TypeError):
+            copy.copy(AsyncProcess(writer("a")))
+
+    def test_pause(self):
+        """max_decisions pauses a run, which carries on where it stopped"""
+        def procs():
+            return [AsyncProcess(writer("ABC")), Process([write("d")] * 3 + [EXIT])]
+
+        expected, reference = run(round_robin_scheduler, procs())
+        output = StringIO()
+        kernel = AsyncKernel(round_robin_scheduler, procs(), Console('exit', stream=output))
+        self.assertFalse(kernel.run(max_decisions=3))
+        self.assertEqual(kernel.decisions, 3)
+        self.assertTrue(kernel.run())
+        self.assertEqual(output.getvalue(), expected)
+        self.assertEqual((kernel.clock, kernel.decisions), (reference.clock, reference.decisions))
+
+        async def napper():
+            yield write("a")
+            await asyncio.sleep(0.01)
+            yield write("b")
+
+        output = StringIO()
+        kernel = AsyncKernel(round_robin_scheduler, [AsyncProcess(napper())], Console('exit', stream=output))
+        self.assertFalse(kernel.run(max_decisions=2))  # The second one reaches the await
+        self.assertEqual(kernel.waiting, 1)
+        # Still blocked on the paused run's loop, the next run resumes it
+        self.assertTrue(kernel.run())
+        self.assertEqual(output.getvalue(), "ab\n")
+
+    def test_many_processes(self):
+        """Tens of thousands of interactive processes share one thread"""
+        async def interactive(i: int):
+            for _ in range(3):
+                await asyncio.sleep(0)
+                yield write("")
+            yield EXIT
+
+        _, kernel = run(round_robin_scheduler, [AsyncProcess(interactive(i)) for i in range(20000)])
+        self.assertEqual(kernel.clock, 80000)
+        self.assertEqual(kernel.accounting.completed(), 20000)
+
+if __name__ == '__main__':
+    unittest.main()
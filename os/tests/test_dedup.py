@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import random
+from io import BytesIO, StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.coroutines import AsyncKernel
+from src.kernel import Kernel
+from src.process import Process, Syscall, SyscallType
+from src.schedulers import round_robin_scheduler
+from examples.main import random_scheduler
+
+EXIT = Syscall(SyscallType.SYS_EXIT)
+FORK = Syscall(SyscallType.SYS_FORK)
+
+def write(char: str, times: int = 1):
+    return [Syscall(SyscallType.SYS_WRITE, char)] * times
+
+def storm(forks: int) -> Process:
+    """Forks and writes interleaved, 2 ** forks processes in the end"""
+    program = []
+    for i in range(forks):
+        program += [FORK] + write("abcdefgh"[i % 8], 2) + [Syscall(SyscallType.SYS_WRITE_DOUBLE, "z")]
+    return Process(program + write("x", 3) + [EXIT])
+
+class TestDedup(unittest.TestCase):
+    def run_both(self, make_procs, quantum: int = 1):
+        results = []
+        for dedup in [False, True]:
+            output = StringIO()
+            kernel = Kernel(round_robin_scheduler, make_procs(), Console(stream=output), quantum, dedup=dedup)
+            kernel.run()
+            results.append((output.getvalue(), kernel))
+        (plain, plain_kernel), (merged, merged_kernel) = results
+        self.assertEqual(merged, plain)
+        self.assertEqual(merged_kernel.clock, plain_kernel.clock)
+        self.assertFalse(merged_kernel.groups)
+        self.assertFalse(merged_kernel.process_table)
+        # Programs are forgotten with their last process
+        self.assertFalse(merged_kernel._merge_from)
+        return plain_kernel, merged_kernel
+
+    def test_same_output_round_robin(self):
+        """Merged fork storms print exactly what the unmerged ones do under round robin"""
+        for quantum in [1, 2, 5, 100]:
+            plain, merged = self.run_both(lambda: [storm(5), Process(write("B", 40) + [EXIT]), storm(3)], quantum)
+            self.assertLess(merged.decisions, plain.decisions)
+
+    def test_fewer_entries(self):
+        """A fork storm stays a single run queue entry"""
+        kernel = Kernel(round_robin_scheduler, [storm(10)], Console('exit', stream=StringIO()), dedup=True)
+        self.assertFalse(kernel.run(max_decisions=20))
+        self.assertEqual(len(kernel.running_procs), 1)
+        proc = kernel.process_table[0]
+        self.assertGreater(kernel.multiplicity(proc), 1)
+        self.assertIn(proc.program, kernel._merge_from)
+        self.assertTrue(kernel.run())
+        self.assertFalse(kernel._merge_from)
+
+    def test_unsafe_syscalls_not_merged(self):
+        """Forks followed by a wait or a sleep make real children, later ones merge"""
+        program = [FORK, Syscall(SyscallType.SYS_WAIT), FORK, Syscall(SyscallType.SYS_SLEEP, 3), FORK] + write("w", 2) + [EXIT]
+        kernel = Kernel(round_robin_scheduler, [Process(program)], Console(stream=StringIO()), dedup=True)
+        self.assertFalse(kernel.run(max_decisions=1))
+        self.assertEqual(len(kernel.process_table), 2)
+        kernel.run()
+        self.assertEqual(kernel.console.stream.getvalue(), "w" * 16 + "\n")
+        self.run_both(lambda: [Process(program)])
+
+    def test_accounting(self):
+        """Every merged process is counted once when its group exits"""
+        plain, merged = self.run_both(lambda: [storm(6), Process(write("B", 40) + [EXIT])])
+        self.assertEqual(merged.accounting.completed(), plain.accounting.completed())
+        plain_stats, merged_stats = plain.stats(), merged.stats()
+        self.assertEqual(merged_stats['turnaround']['max'], plain_stats['turnaround']['max'])
+        self.assertAlmostEqual(merged_stats['turnaround']['mean'], plain_stats['turnaround']['mean'],
+                               delta=plain_stats['turnaround']['mean'] * 0.1)
+
+    def test_exponential_storm(self):
+        """2 ** 20 processes in a handful of decisions"""
+        kernel = Kernel(round_robin_scheduler, [storm(20)], Console('exit', stream=StringIO()),
+                        accounting=False, dedup=True)
+        kernel.run()
+        self.assertEqual(kernel.console.stream.getvalue().count("x"), 3 << 20)
+        self.assertLess(kernel.decisions, 200)
+
+    def test_replay(self):
+        """Traces of a deduplicating kernel replay on one"""
+        random.seed(9)
+        procs = lambda: [storm(4), Process(write("B", 30) + [EXIT])]
+        trace = BytesIO()
+        kernel = Kernel(random_scheduler, procs(), Console('exit', stream=StringIO()), 3, dedup=True)
+        kernel.record_trace(trace)
+        kernel.run()
+        replayed = Kernel(random_scheduler, procs(), Console('exit', stream=StringIO()), 3, dedup=True)
+        replayed.replay(BytesIO(trace.getvalue()))
+        self.assertEqual(replayed.console.stream.getvalue(), kernel.console.stream.getvalue())
+
+    def test_async_rejected(self):
+        """The coroutine kernel does not merge processes"""
+        with self.assertRaises(ValueError):
+            AsyncKernel(round_robin_scheduler, [storm(2)], dedup=True).run()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+import unittest
+import sys
+import os
+import random
+from io import StringIO
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.myos as myos
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, RunLengthProgram, Syscall, SyscallType
+from src.schedulers import round_robin_scheduler
+from labs.lab1 import sequential_scheduler
+
+def random_program(rng: random.Random, length: int):
+    """Runs of writes with the odd fork, ending in an exit"""
+    calls = []
+    while len(calls) < length:
+        kind = rng.choice([SyscallType.SYS_WRITE, SyscallType.SYS_WRITE_DOUBLE, SyscallType.SYS_FORK])
+        if kind == SyscallType.SYS_FORK:
+            if rng.random() < 0.3:
+                calls.append(Syscall(kind))
+            continue
+        calls += [Syscall(kind, rng.choice("ABC"))] * rng.randrange(1, 6)
+    return calls + [Syscall(SyscallType.SYS_EXIT)]
+
+class TestKernel(unittest.TestCase):
+    def capture_output(self, scheduler, procs, quantum: int = 1) -> str:
+        myos.init(scheduler, procs, my_quantum=quantum)
+        f = StringIO()
+        with redirect_stdout(f):
+            myos.kernel_run()
+        return f.getvalue()
+
+    def reference_output(self, procs) -> str:
+        """Sequential execution, one step at a time"""
+        output = []
+        procs = list(procs)
+        while procs:
+            current = procs[0]
+            call = current.syscalls[current.step]
+            current.step += 1
+            if call.syscall == SyscallType.SYS_EXIT:
+                procs.remove(current)
+            elif call.syscall == SyscallType.SYS_WRITE:
+                output.append(call.arg)
+            elif call.syscall == SyscallType.SYS_WRITE_DOUBLE:
+                output.append(call.arg * 2)
+            elif call.syscall == SyscallType.SYS_FORK:
+                procs.append(current.__copy__())
+        return ''.join(output) + '\n'
+
+    def test_run_length_program(self):
+        """A run-length program indexes like the list it was built from"""
+        calls = random_program(random.Random(0), 200)
+        program = RunLengthProgram.compile(calls)
+
+        self.assertEqual(len(program), len(calls))
+        self.assertLess(len(program.ends), len(calls))
+        for i, call in enumerate(calls):
+            self.assertEqual((program[i].syscall, program[i].arg), (call.syscall, call.arg))
+        self.assertEqual(program.run_length(0, 1000), program.ends[0])
+
+    def test_sticky_matches_stepping(self):
+        """Bulk execution of runs gives the same output as stepping"""
+        rng = random.Random(1)
+        for _ in range(20):
+            programs = [random_program(rng, 30) for _ in range(3)]
+            expected = self.reference_output([Process(p) for p in programs])
+
+            stepped = self.capture_output(lambda procs: procs[0], [Process(p) for p in programs])
+            batched = self.capture_output(sequential_scheduler, [Process(p) for p in programs])
+            encoded = self.capture_output(
+                sequential_scheduler,
+                [Process(RunLengthProgram.compile(p)) for p in programs]
+            )
+
+            self.assertEqual(stepped, expected)
+            self.assertEqual(batched, expected)
+            self.assertEqual(encoded, expected)
+
+    def test_step_run_stops_at_fork(self):
+        """Forks and exits are never batched"""
+        proc = Process([Syscall(SyscallType.SYS_FORK)] * 3 + [Syscall(SyscallType.SYS_EXIT)])
+        call, count = myos.process_step_run(proc)
+
+        self.assertEqual(call.syscall, SyscallType.SYS_FORK)
+        self.assertEqual(count, 1)
+        self.assertEqual(proc.step, 1)
+
+    def test_step_run_limit(self):
+        """A run never goes past the limit"""
+        proc = Process(RunLengthProgram.from_runs([(Syscall(SyscallType.SYS_WRITE, "A"), 100)]))
+        call, count = myos.process_step_run(proc, 30)
+
+        self.assertEqual(count, 30)
+        self.assertEqual(myos.process_step_run(proc)[1], 70)
+
+    def round_robin_reference(self, procs, quantum: int) -> str:
+        """Round robin, one step at a time, switching after `quantum` steps"""
+        output = []
+        procs = list(procs)
+        while procs:
+            current = procs.pop(0)
+            for _ in range(quantum):
+                call = current.syscalls[current.step]
+                current.step += 1
+                if call.syscall == SyscallType.SYS_WRITE:
+                    output.append(call.arg)
+                elif call.syscall == SyscallType.SYS_WRITE_DOUBLE:
+                    output.append(call.arg * 2)
+                else:
+                    break
+            if call.syscall != SyscallType.SYS_EXIT:
+                procs.append(current)
+            if call.syscall == SyscallType.SYS_FORK:
+                procs.append(current.__copy__())
+        return ''.join(output) + '\n'
+
+    def test_quantum_round_robin(self):
+        """Each decision runs up to a quantum of steps"""
+        rng = random.Random(2)
+        for quantum in [1, 2, 3, 7, 100]:
+            programs = [random_program(rng, 20) for _ in range(3)]
+            expected = self.round_robin_reference([Process(p) for p in programs], quantum)
+            result = self.capture_output(round_robin_scheduler, [Process(p) for p in programs], quantum)
+            self.assertEqual(result, expected)
+
+    def test_step_n(self):
+        """process_step_n stops at the quantum or at a fork"""
+        proc = Process(
+            [Syscall(SyscallType.SYS_WRITE, "A")] * 3 +
+            [Syscall(SyscallType.SYS_WRITE, "B"), Syscall(SyscallType.SYS_FORK)] +
+            [Syscall(SyscallType.SYS_WRITE, "C"), Syscall(SyscallType.SYS_EXIT)]
+        )
+        runs = myos.process_step_n(proc, 2)
+        self.assertEqual([(call.arg, count) for call, count in runs], [("A", 2)])
+
+        runs = myos.process_step_n(proc, 10)
+        self.assertEqual([(call.arg, count) for call, count in runs], [("A", 1), ("B", 1), (None, 1)])
+        self.assertEqual(runs[-1][0].syscall, SyscallType.SYS_FORK)
+        self.assertEqual(proc.step, 5)
+
+    def test_invalid_quantum(self):
+        with self.assertRaises(ValueError):
+            myos.set_quantum(0)
+
+    def test_register_syscall(self):
+        """Labs can add syscalls to the kernel's table"""
+        SYS_SHOUT = 10
+        def sys_shout(kernel, proc, call, count):
+            kernel.console_write(call.arg.upper() * count)
+
+        myos.register_syscall(SYS_SHOUT, sys_shout, batchable=True)
+        try:
+            procs = [Process([Syscall(SYS_SHOUT, "a")] * 3 + [Syscall(SyscallType.SYS_EXIT)])]
+            self.assertEqual(self.capture_output(sequential_scheduler, procs), "AAA\n")
+        finally:
+            myos.register_syscall(SYS_SHOUT, None)
+
+    def test_unknown_syscall(self):
+        """A syscall without a handler is an error"""
+        procs = [Process([Syscall(11, "a"), Syscall(SyscallType.SYS_EXIT)])]
+        with self.assertRaises(ValueError):
+            self.capture_output(lambda procs: procs[0], procs)
+        with self.assertRaises(ValueError):
+            myos.register_syscall(256, None)
+
+    def test_independent_kernels(self):
+        """Kernels do not share run queues, consoles or syscalls"""
+        SYS_SHOUT = 12
+        streams = [StringIO(), StringIO()]
+        kernels = [
+            Kernel(sequential_scheduler, [Process([Syscall(SyscallType.SYS_WRITE, c), Syscall(SyscallType.SYS_EXIT)])],
+                   Console(stream=stream))
+            for c, stream in zip("XY", streams)
+        ]
+        kernels[0].register_syscall(SYS_SHOUT, lambda kernel, proc, call, count: None)
+
+        kernels[1].run()
+        kernels[0].run()
+
+        self.assertEqual([s.getvalue() for s in streams], ["X\n", "Y\n"])
+        self.assertEqual([k.clock for k in kernels], [2, 2])
+        self.assertIsNone(kernels[1].syscall_handlers[SYS_SHOUT])
+
+    def test_module_state_follows_init(self):
+        """The module-level names track the default kernel"""
+        procs = [Process([Syscall(SyscallType.SYS_EXIT)])]
+        myos.init(sequential_scheduler, procs, my_quantum=3)
+
+        self.assertIs(myos.scheduler, sequential_scheduler)
+        self.assertEqual(list(myos.running_procs), procs)
+        self.assertEqual(myos.quantum, 3)
+
+    def test_init_dedup_needs_one_cpu(self):
+        """Merging is not silently dropped when init builds an SMP kernel"""
+        procs = [Process([Syscall(SyscallType.SYS_EXIT)])]
+        myos.init(sequential_scheduler, procs, my_dedup=True)
+        kernel = myos.kernel
+        with self.assertRaises(ValueError):
+            myos.init(sequential_scheduler, procs, my_cpus=2, my_dedup=True)
+        self.assertIs(myos.kernel, kernel)
+        myos.init(sequential_scheduler, procs, my_cpus=2)
+        self.assertEqual(len(myos.kernel.cpus), 2)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
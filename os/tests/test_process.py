@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.process import Process, Program, RunLengthProgram, Syscall, SyscallType
+
+class TestProcess(unittest.TestCase):
+    def make_process(self) -> Process:
+        return Process([
+            Syscall(SyscallType.SYS_WRITE, "A"),
+            Syscall(SyscallType.SYS_FORK),
+            Syscall(SyscallType.SYS_EXIT)
+        ], priority=3)
+
+    def test_copy_shares_program(self):
+        """Forked process shares the parent's program"""
+        parent = self.make_process()
+        parent.step = 2
+        child = parent.__copy__()
+
+        self.assertIs(child.syscalls, parent.syscalls)
+        self.assertEqual(child.step, 2)
+        self.assertEqual(child.priority, 3)
+
+    def test_copy_has_own_context(self):
+        """Stepping the child does not move the parent"""
+        parent = self.make_process()
+        child = parent.__copy__()
+        child.step += 1
+        child.priority = 7
+
+        self.assertEqual(parent.step, 0)
+        self.assertEqual(parent.priority, 3)
+
+    def test_copy_on_write(self):
+        """Rewriting the child's program leaves the parent untouched"""
+        parent = self.make_process()
+        child = parent.__copy__()
+        child.syscalls = [Syscall(SyscallType.SYS_EXIT)]
+
+        self.assertEqual(len(parent.syscalls), 3)
+        self.assertEqual(len(child.syscalls), 1)
+
+    def test_program_is_immutable(self):
+        """The shared program cannot be modified in place"""
+        proc = self.make_process()
+        with self.assertRaises(TypeError):
+            proc.syscalls[0] = Syscall(SyscallType.SYS_EXIT)
+
+    def test_program_interns_syscalls(self):
+        """Repeated syscalls are stored once"""
+        proc = Process([Syscall(SyscallType.SYS_WRITE, "A")] * 1000 + [
+            Syscall(SyscallType.SYS_WRITE, "A"),
+            Syscall(SyscallType.SYS_WRITE, "B"),
+            Syscall(SyscallType.SYS_EXIT)
+        ])
+        program = proc.syscalls
+
+        self.assertIsInstance(program, Program)
+        self.assertEqual(len(program), 1003)
+        self.assertEqual(len(program.table), 3)
+        self.assertEqual(program.refs.typecode, 'B')
+        self.assertEqual(list(program.opcodes[-3:]), [1, 1, 0])
+        self.assertEqual(program[1001].arg, "B")
+        self.assertEqual(program[-1].syscall, SyscallType.SYS_EXIT)
+
+    def test_program_unhashable_arg(self):
+        """Unhashable args are kept, just not shared"""
+        arg = ["x"]
+        program = Program.compile([Syscall(SyscallType.SYS_WRITE, arg)] * 2)
+
+        self.assertEqual(len(program.table), 2)
+        self.assertIs(program[1].arg, arg)
+
+    def test_program_equal_args_of_other_types(self):
+        """Args that are equal but of different types are not merged"""
+        calls = [Syscall(SyscallType.SYS_WRITE, arg) for arg in [1, True, 1.0, 1]]
+        program = Program.compile(calls)
+
+        self.assertEqual(len(program.table), 3)
+        self.assertEqual([repr(call.arg) for call in program], ["1", "True", "1.0", "1"])
+
+        encoded = RunLengthProgram.from_runs([(calls[0], 2), (calls[1], 3), (calls[2], 1)])
+        self.assertEqual(list(encoded.ends), [2, 5, 6])
+        self.assertEqual([repr(call.arg) for call in encoded], ["1", "1", "True", "True", "True", "1.0"])
+
+    def test_slots(self):
+        """Processes and syscalls carry no __dict__"""
+        proc = self.make_process()
+        self.assertFalse(hasattr(proc, '__dict__'))
+        self.assertFalse(hasattr(proc.syscalls[0], '__dict__'))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
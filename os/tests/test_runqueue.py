@@ -0,0 +1,188 @@
+import unittest
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.process import Process, Syscall, SyscallType
+from src.runqueue import RunQueue
+from labs.lab2 import priority_scheduler
+
+class TestRunQueue(unittest.TestCase):
+    def make_procs(self, priorities):
+        return [Process([Syscall(SyscallType.SYS_EXIT)], priority=p) for p in priorities]
+
+    def test_highest_priority_ties(self):
+        """Equal priorities are broken by position in the queue"""
+        procs = self.make_procs([1, 2, 2, 0])
+        queue = RunQueue(procs)
+
+        self.assertIs(queue.highest_priority(), procs[1])
+        queue.remove(procs[1])
+        self.assertIs(queue.highest_priority(), procs[2])
+
+    def test_push_and_exit(self):
+        """Appended and removed processes are seen by the heap"""
+        procs = self.make_procs([1, 1])
+        queue = RunQueue(procs)
+        queue.highest_priority()
+
+        late = Process([Syscall(SyscallType.SYS_EXIT)], priority=5)
+        queue.append(late)
+        self.assertIs(queue.highest_priority(), late)
+        queue.remove(late)
+        self.assertIs(queue.highest_priority(), procs[0])
+
+    def test_rotation_keeps_list_order(self):
+        """pop(0) + append moves a process behind its equals"""
+        procs = self.make_procs([1, 1, 1])
+        queue = RunQueue(procs)
+        queue.highest_priority()
+
+        queue.append(queue.pop(0))
+        self.assertIs(queue.highest_priority(), procs[1])
+
+    def test_reprioritize(self):
+        """Changing a priority reorders the heap"""
+        procs = self.make_procs([3, 2, 1])
+        queue = RunQueue(procs)
+        queue.highest_priority()
+
+        queue.reprioritize(procs[2], 9)
+        self.assertIs(queue.highest_priority(), procs[2])
+        self.assertEqual(procs[2].priority, 9)
+
+    def test_priority_assigned_in_place(self):
+        """Assigning proc.priority directly keeps the heap in order"""
+        procs = self.make_procs([3, 2, 1])
+        queue = RunQueue(procs)
+        self.assertIs(queue.highest_priority(), procs[0])
+
+        procs[2].priority = 9
+        self.assertIs(queue.highest_priority(), procs[2])
+        procs[2].priority = 0
+        procs[0].priority -= 2
+        self.assertIs(queue.highest_priority(), procs[1])
+
+        # Left the queue: no longer tied to its heap
+        queue.remove(procs[1])
+        procs[1].priority = 9
+        self.assertIs(queue.highest_priority(), procs[0])
+
+        # Back and forth to the same key, then gone, leaves equal dead entries
+        procs[0].priority = 5
+        procs[0].priority = 1
+        queue.remove(procs[0])
+        queue.append(procs[1])
+        self.assertIs(queue.highest_priority(), procs[1])
+        queue.remove(procs[1])
+        self.assertIs(queue.highest_priority(), procs[2])
+
+        rng = random.Random(3)
+        procs = self.make_procs(rng.randrange(5) for _ in range(30))
+        queue = RunQueue(procs)
+        for _ in range(500):
+            rng.choice(procs).priority = rng.randrange(10)
+            expected = max(list(queue), key=lambda proc: proc.priority)
+            self.assertIs(queue.highest_priority(), expected)
+
+    def test_sequence_view(self):
+        """Schedulers can index, pop and append like a list"""
+        procs = self.make_procs([0, 0, 0, 0])
+        queue = RunQueue(procs)
+
+        queue.remove(procs[1])
+        self.assertEqual(len(queue), 3)
+        self.assertIs(queue[0], procs[0])
+        self.assertIs(queue[1], procs[2])
+        self.assertIs(queue[-1], procs[3])
+        self.assertNotIn(procs[1], queue)
+
+        queue.append(queue.pop(0))
+        self.assertEqual(list(queue), [procs[2], procs[3], procs[0]])
+        self.assertEqual(queue.index(procs[0]), 2)
+
+    def test_duplicate_and_missing(self):
+        """A process is queued at most once"""
+        procs = self.make_procs([0])
+        queue = RunQueue(procs)
+
+        with self.assertRaises(ValueError):
+            queue.append(procs[0])
+        queue.remove(procs[0])
+        with self.assertRaises(ValueError):
+            queue.remove(procs[0])
+        with self.assertRaises(IndexError):
+            queue[0]
+
+    def test_swap(self):
+        """Swapping two entries in place works as on a list"""
+        procs = self.make_procs([0, 1, 2, 3, 4])
+        queue = RunQueue(procs)
+        queue.remove(procs[1])  # Leave a hole
+        self.assertIs(queue.highest_priority(), procs[4])
+
+        queue[0], queue[3] = queue[3], queue[0]
+        self.assertEqual(list(queue), [procs[4], procs[2], procs[3], procs[0]])
+        self.assertEqual(queue.index(procs[0]), 3)
+        self.assertIs(queue.highest_priority(), procs[4])
+
+        # A scheduler sorting the queue by swaps (selection sort on priority)
+        for i in range(len(queue)):
+            j = min(range(i, len(queue)), key=lambda k: queue[k].priority)
+            queue[i], queue[j] = queue[j], queue[i]
+        self.assertEqual(list(queue), [procs[0], procs[2], procs[3], procs[4]])
+        self.assertEqual(len(queue), 4)
+        queue.remove(procs[3])
+        self.assertEqual(list(queue), [procs[0], procs[2], procs[4]])
+
+    def test_matches_list(self):
+        """Random push/exit/rotate sequences behave like a list"""
+        rng = random.Random(2)
+        expected = []
+        queue = RunQueue()
+
+        for _ in range(2000):
+            op = rng.random()
+            if op < 0.4 or not expected:
+                proc = Process([], priority=rng.randrange(3))
+                expected.append(proc)
+                queue.append(proc)
+            elif op < 0.7:
+                proc = rng.choice(expected)
+                expected.remove(proc)
+                queue.remove(proc)
+            else:
+                expected.append(expected.pop(0))
+                queue.append(queue.pop(0))
+            index = rng.randrange(len(expected)) if expected else None
+            if index is not None:
+                self.assertIs(queue[index], expected[index])
+            self.assertEqual(list(queue), expected)
+
+    def test_choice(self):
+        """choice() only returns live processes, and all of them"""
+        procs = self.make_procs([0] * 20)
+        queue = RunQueue(procs)
+        for proc in procs[1:15:2]:
+            queue.remove(proc)
+
+        rng = random.Random(4)
+        seen = {queue.choice(rng) for _ in range(2000)}
+        self.assertEqual(seen, set(queue))
+
+    def test_matches_scan(self):
+        """Heap selection agrees with max() over the list"""
+        rng = random.Random(1)
+        queue = RunQueue(self.make_procs(rng.randrange(5) for _ in range(50)))
+
+        while queue:
+            expected = max(list(queue), key=lambda proc: proc.priority)
+            self.assertIs(priority_scheduler(queue), expected)
+            if rng.random() < 0.3:
+                queue.append(Process([], priority=rng.randrange(5)))
+            queue.remove(expected)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
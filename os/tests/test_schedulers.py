@@ -0,0 +1,251 @@
+import unittest
+import sys
+import os
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch import WorkloadSpec, run_batch
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Syscall, SyscallType
+from src.schedulers import (CFSScheduler, LotteryScheduler, MLFQScheduler, NICE_0_WEIGHT, StrideScheduler,
+                            priority_weight)
+from labs.lab2 import priority_scheduler
+
+def writer(char: str, length: int) -> Process:
+    return Process([Syscall(SyscallType.SYS_WRITE, char)] * length + [Syscall(SyscallType.SYS_EXIT)])
+
+def run(scheduler, procs, quantum: int = 1) -> str:
+    output = StringIO()
+    kernel = Kernel(scheduler, procs, Console(stream=output), quantum)
+    kernel.run()
+    return output.getvalue()
+
+class TestMLFQ(unittest.TestCase):
+    def test_demotion_order(self):
+        """Round robin in level 0, then twice as long slices in level 1"""
+        scheduler = MLFQScheduler(levels=3, boost_interval=1000)
+        output = run(scheduler, [writer("A", 10), writer("B", 10)])
+        self.assertEqual(output, "AB" + "AABB" + "AAAABBBB" + "AAABBB" + "\n")
+
+    def test_levels(self):
+        """A process sinks one level when the next decision finds its quantum used up"""
+        scheduler = MLFQScheduler(levels=3, quanta=[1, 1, 1], boost_interval=1000)
+        procs = [writer("A", 10), writer("B", 10)]
+        kernel = Kernel(scheduler, procs, Console(stream=StringIO()))
+        kernel.process_step(kernel.process_schedule())
+        self.assertEqual([scheduler.level(p) for p in procs], [0, 0])
+        kernel.process_step(kernel.process_schedule())
+        self.assertEqual([scheduler.level(p) for p in procs], [1, 0])
+        kernel.process_step(kernel.process_schedule())
+        self.assertEqual([scheduler.level(p) for p in procs], [1, 1])
+        for _ in range(5):
+            kernel.process_step(kernel.process_schedule())
+        # The last level keeps them
+        self.assertEqual([scheduler.level(p) for p in procs], [2, 2])
+
+    def test_boost(self):
+        """Every process returns to level 0 at the boost, in the same order"""
+        scheduler = MLFQScheduler(levels=4, boost_interval=10)
+        procs = [writer(c, 100) for c in "ABC"]
+        kernel = Kernel(scheduler, procs, Console(stream=StringIO()))
+        for _ in range(9):
+            kernel.process_schedule()
+        self.assertEqual([scheduler.level(p) for p in procs], [2, 2, 1])
+        # The 10th decision boosts
+        kernel.process_schedule()
+        self.assertEqual([scheduler.level(p) for p in procs], [0, 0, 0])
+
+    def test_new_process_preempts(self):
+        """A forked child starts in level 0, ahead of demoted processes"""
+        parent = Process([Syscall(SyscallType.SYS_WRITE, "P")] * 4 + [Syscall(SyscallType.SYS_FORK)] +
+                         [Syscall(SyscallType.SYS_WRITE, "p")] * 4 + [Syscall(SyscallType.SYS_EXIT)])
+        output = run(MLFQScheduler(), [parent, writer("Q", 6)])
+        # The parent forks in the middle of its level 2 slice, the child
+        # writes "p" at once
+        self.assertEqual(output[:8], "PQPPQQP" + "p")
+        self.assertEqual(sorted(output.strip()), sorted("PPPP" + "p" * 8 + "Q" * 6))
+
+    def test_runs_to_completion(self):
+        """Every process finishes under any kernel quantum, boosts included"""
+        procs = [writer(c, n) for c, n in zip("ABCDE", [1, 50, 200, 7, 1000])]
+        for quantum in [1, 3, 16]:
+            scheduler = MLFQScheduler(boost_interval=20)
+            output = run(scheduler, [p.__copy__() for p in procs], quantum)
+            self.assertEqual(sorted(output.strip()), sorted("A" + "B" * 50 + "C" * 200 + "D" * 7 + "E" * 1000))
+            self.assertFalse(scheduler._entries)
+
+    def test_batch_copies_scheduler(self):
+        """Batch runs each get a fresh copy of a scheduler object"""
+        spec = WorkloadSpec("w", [[Syscall(SyscallType.SYS_WRITE, c)] * 5 + [Syscall(SyscallType.SYS_EXIT)]
+                                  for c in "XYZ"], MLFQScheduler())
+        first, second = run_batch([spec, spec], workers=1)
+        self.assertEqual(first.output, second.output)
+        self.assertEqual(first.scheduler, "MLFQScheduler")
+        self.assertFalse(spec.scheduler._entries)
+
+class TestCFS(unittest.TestCase):
+    def shares(self, scheduler, procs, decisions: int, quantum: int = 1):
+        """Steps each process has run after `decisions` scheduling decisions"""
+        kernel = Kernel(scheduler, procs, Console(stream=StringIO()), quantum)
+        for _ in range(decisions):
+            proc = kernel.process_schedule()
+            for call, count in kernel.process_step_n(proc, quantum):
+                kernel.process_syscall(proc, call, count)
+        return [proc.step for proc in procs]
+
+    def test_equal_priorities_alternate(self):
+        """Processes of equal priority take turns"""
+        output = run(CFSScheduler(), [writer("A", 4), writer("B", 4), writer("C", 4)])
+        self.assertEqual(output, "ABC" * 4 + "\n")
+
+    def test_weighted_shares(self):
+        """CPU share follows the priority weights, and nobody starves"""
+        procs = [Process([Syscall(SyscallType.SYS_WRITE, c)] * 10000 + [Syscall(SyscallType.SYS_EXIT)],
+                         priority=p) for c, p in zip("ABC", [0, 3, -5])]
+        steps = self.shares(CFSScheduler(), procs, 6000)
+        weights = [priority_weight(p.priority) for p in procs]
+        for ran, weight in zip(steps, weights):
+            self.assertAlmostEqual(ran / sum(steps), weight / sum(weights), delta=0.01)
+        self.assertGreater(steps[2], 0)
+
+        # The static priority scheduler never runs the low priority process
+        procs = [p.__copy__() for p in procs]
+        for proc in procs:
+            proc.step = 0
+        self.assertEqual(self.shares(priority_scheduler, procs, 6000)[2], 0)
+
+    def test_charged_by_steps(self):
+        """vruntime counts steps actually run, whatever the quantum"""
+        for quantum in [1, 5]:
+            scheduler = CFSScheduler()
+            procs = [Process([Syscall(SyscallType.SYS_WRITE, "A")] * 1000 + [Syscall(SyscallType.SYS_EXIT)],
+                             priority=p) for p in [0, 2]]
+            steps = self.shares(scheduler, procs, 100, quantum)
+            for proc, ran in zip(procs, steps):
+                expected = ran * NICE_0_WEIGHT / priority_weight(proc.priority)
+                self.assertAlmostEqual(scheduler.vruntime(proc), expected)
+
+    def test_fork_inherits_vruntime(self):
+        """A forked child starts where its parent is, not at zero"""
+        parent = Process([Syscall(SyscallType.SYS_WRITE, "P")] * 50 + [Syscall(SyscallType.SYS_FORK)] +
+                         [Syscall(SyscallType.SYS_WRITE, "P")] * 50 + [Syscall(SyscallType.SYS_EXIT)])
+        other = writer("O", 200)
+        scheduler = CFSScheduler()
+        kernel = Kernel(scheduler, [parent, other], Console(stream=StringIO()))
+        while kernel.process_count() < 3:
+            proc = kernel.process_schedule()
+            kernel.process_syscall(proc, kernel.process_step(proc))
+        child = kernel.running_procs[-1]
+        self.assertEqual(scheduler.vruntime(child), scheduler.vruntime(parent))
+        self.assertGreaterEqual(scheduler.vruntime(child), scheduler.min_vruntime)
+
+    def test_runs_to_completion(self):
+        """Exits are handled under any quantum and granularity"""
+        procs = [writer(c, n) for c, n in zip("ABCDE", [1, 50, 200, 7, 1000])]
+        for quantum, granularity in [(1, 1), (3, 1), (1, 10), (16, 4)]:
+            scheduler = CFSScheduler(granularity)
+            output = run(scheduler, [p.__copy__() for p in procs], quantum)
+            self.assertEqual(sorted(output.strip()), sorted("A" + "B" * 50 + "C" * 200 + "D" * 7 + "E" * 1000))
+            self.assertFalse(scheduler._entries)
+
+def spinners(priorities, length: int = 100000):
+    return [Process([Syscall(SyscallType.SYS_WRITE, "x")] * length + [Syscall(SyscallType.SYS_EXIT)], priority=p)
+            for p in priorities]
+
+def picks(scheduler, procs, decisions: int):
+    """How often each process was chosen in `decisions` decisions"""
+    kernel = Kernel(scheduler, procs, Console(stream=StringIO()))
+    counts = {proc: 0 for proc in procs}
+    for _ in range(decisions):
+        counts[kernel.process_schedule()] += 1
+    return [counts[proc] for proc in procs]
+
+class TestLottery(unittest.TestCase):
+    def test_shares_follow_tickets(self):
+        """Each process wins in proportion to its tickets"""
+        procs = spinners([0, 3, -4, 0])
+        counts = picks(LotteryScheduler(seed=1), procs, 40000)
+        weights = [priority_weight(p.priority) for p in procs]
+        for count, weight in zip(counts, weights):
+            self.assertAlmostEqual(count / 40000, weight / sum(weights), delta=0.01)
+
+    def test_seeded(self):
+        """The same seed gives the same run, other seeds differ"""
+        procs = [writer(c, 20) for c in "ABCD"]
+        runs = [run(LotteryScheduler(seed), [p.__copy__() for p in procs]) for seed in [7, 7, 8]]
+        self.assertEqual(runs[0], runs[1])
+        self.assertNotEqual(runs[0], runs[2])
+
+    def test_exit_and_reuse(self):
+        """Exited processes are never drawn, their slots are reused"""
+        scheduler = LotteryScheduler(seed=3)
+        procs = spinners(range(5))
+        kernel = Kernel(scheduler, procs, Console(stream=StringIO()))
+        kernel.process_exit(procs[1])
+        kernel.process_exit(procs[3])
+        self.assertEqual(scheduler.total, sum(priority_weight(p) for p in [0, 2, 4]))
+        for _ in range(1000):
+            self.assertIn(kernel.process_schedule(), [procs[0], procs[2], procs[4]])
+        newcomers = spinners([1, 1, 1])
+        for proc in newcomers:
+            kernel.process_push(proc)
+        self.assertEqual(len(scheduler._procs), 6)
+        self.assertEqual(scheduler.tickets(newcomers[2]), priority_weight(1))
+
+    def test_update(self):
+        """Changing a priority takes effect after update()"""
+        scheduler = LotteryScheduler(seed=5)
+        procs = spinners([0, 0])
+        kernel = Kernel(scheduler, procs, Console(stream=StringIO()))
+        procs[0].priority = -20
+        scheduler.update(procs[0])
+        counts = [0, 0]
+        for _ in range(2000):
+            counts[procs.index(kernel.process_schedule())] += 1
+        self.assertLess(counts[0], 100)
+
+    def test_runs_to_completion(self):
+        procs = [writer(c, n) for c, n in zip("ABCDE", [1, 50, 200, 7, 1000])]
+        output = run(LotteryScheduler(seed=0), procs, 4)
+        self.assertEqual(sorted(output.strip()), sorted("A" + "B" * 50 + "C" * 200 + "D" * 7 + "E" * 1000))
+
+class TestStride(unittest.TestCase):
+    def test_exact_shares(self):
+        """Decisions are split by tickets to within one quantum per process"""
+        procs = spinners([0, 3, -4, 0])
+        weights = [priority_weight(p.priority) for p in procs]
+        for decisions in [1000, 5000, 12345]:
+            counts = picks(StrideScheduler(), [p.__copy__() for p in procs], decisions)
+            for count, weight in zip(counts, weights):
+                self.assertAlmostEqual(count, decisions * weight / sum(weights), delta=1.5)
+
+    def test_deterministic(self):
+        """Equal tickets alternate in arrival order"""
+        output = run(StrideScheduler(), [writer(c, 3) for c in "ABC"])
+        self.assertEqual(output, "ABC" * 3 + "\n")
+
+    def test_newcomer_starts_at_global_pass(self):
+        """A late process does not get to catch up on missed turns"""
+        scheduler = StrideScheduler()
+        procs = spinners([0, 0])
+        kernel = Kernel(scheduler, procs, Console(stream=StringIO()))
+        for _ in range(1000):
+            kernel.process_schedule()
+        late = spinners([0])[0]
+        kernel.process_push(late)
+        counts = {proc: 0 for proc in procs + [late]}
+        for _ in range(300):
+            counts[kernel.process_schedule()] += 1
+        self.assertEqual(sorted(counts.values()), [100, 100, 100])
+
+    def test_runs_to_completion(self):
+        procs = [writer(c, n) for c, n in zip("ABCDE", [1, 50, 200, 7, 1000])]
+        scheduler = StrideScheduler()
+        output = run(scheduler, procs, 4)
+        self.assertEqual(sorted(output.strip()), sorted("A" + "B" * 50 + "C" * 200 + "D" * 7 + "E" * 1000))
+        self.assertFalse(scheduler._entries)
+
+if __name__ == '__main__':
+    unittest.main()
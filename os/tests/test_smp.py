@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import random
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch import WorkloadSpec, run_batch, sweep
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Syscall, SyscallType
+from src.schedulers import CFSScheduler, MLFQScheduler, round_robin_scheduler
+from src.smp import SMPKernel
+from labs.lab1 import sequential_scheduler
+from examples.main import random_scheduler
+
+def writer(char: str, length: int) -> Process:
+    return Process([Syscall(SyscallType.SYS_WRITE, char)] * length + [Syscall(SyscallType.SYS_EXIT)])
+
+def forker(forks: int, length: int) -> Process:
+    """Forks `forks` times up front (children keep forking, 2 ** forks processes), then writes"""
+    return Process([Syscall(SyscallType.SYS_FORK)] * forks +
+                   [Syscall(SyscallType.SYS_WRITE, "f")] * length + [Syscall(SyscallType.SYS_EXIT)])
+
+class TestSMP(unittest.TestCase):
+    def test_one_cpu_matches_kernel(self):
+        """With one CPU the SMP kernel runs exactly like the plain kernel"""
+        procs = [forker(2, 5), writer("A", 7), writer("B", 3)]
+        for scheduler in [random_scheduler, round_robin_scheduler, sequential_scheduler]:
+            for quantum in [1, 3]:
+                outputs = []
+                for kernel_class, extra in [(Kernel, {}), (SMPKernel, {'cpus': 1})]:
+                    random.seed(11)
+                    output = StringIO()
+                    kernel = kernel_class(scheduler, [p.__copy__() for p in procs],
+                                          Console(stream=output), quantum, **extra)
+                    kernel.run()
+                    outputs.append((output.getvalue(), kernel.clock, kernel.decisions))
+                self.assertEqual(outputs[0], outputs[1])
+
+    def test_scaling(self):
+        """Eight equal processes on four CPUs take a quarter of the time"""
+        procs = [writer(c, 99) for c in "ABCDEFGH"]
+        kernel = SMPKernel(round_robin_scheduler, procs, Console(stream=StringIO()), cpus=4)
+        kernel.run()
+        self.assertEqual(kernel.clock, 800)
+        self.assertEqual(kernel.time, 200)
+        for stats in kernel.cpu_stats():
+            self.assertEqual(stats['busy'], 200)
+            self.assertEqual(stats['utilization'], 1.0)
+        self.assertLessEqual(kernel.stats()['turnaround']['max'], 200)
+
+    def test_work_stealing(self):
+        """Forked children start on one CPU and idle CPUs steal them"""
+        kernel = SMPKernel(round_robin_scheduler, [forker(4, 50)], Console(stream=StringIO()), cpus=4)
+        kernel.run()
+        stats = kernel.cpu_stats()
+        self.assertEqual(sum(s['busy'] for s in stats), kernel.clock)
+        for s in stats:
+            self.assertEqual(s['busy'] + s['idle'], kernel.time)
+            self.assertGreater(s['busy'], 0)
+        self.assertGreater(sum(s['steals'] for s in stats), 0)
+        self.assertGreaterEqual(sum(s['migrations'] for s in stats), sum(s['steals'] for s in stats))
+        # 16 processes of 50 writes and 1 exit, plus 15 forks, well spread
+        self.assertEqual(kernel.clock, 16 * 51 + 15)
+        self.assertLess(kernel.time, kernel.clock / 3)
+
+    def test_steal_keeps_running_process(self):
+        """Stealing takes half the queue but never the victim's current process"""
+        procs = [writer(c, 10) for c in "ABCD"]
+        kernel = SMPKernel(round_robin_scheduler, [], Console(stream=StringIO()), cpus=2)
+        busy, idle = kernel.cpus
+        for proc in procs:
+            kernel._place(proc, busy)
+            kernel.running_procs.append(proc)
+        busy.current = procs[3]
+        self.assertEqual(kernel.steal(idle), 2)
+        self.assertEqual(list(idle.running_procs), [procs[2], procs[1]])
+        self.assertEqual(list(busy.running_procs), [procs[0], procs[3]])
+        self.assertIs(kernel.cpu_of(procs[1]), idle)
+        self.assertEqual(kernel.steal(busy), 0)
+
+    def test_stateful_schedulers(self):
+        """Every CPU gets its own copy of a scheduler object"""
+        for scheduler in [MLFQScheduler(), CFSScheduler()]:
+            output = StringIO()
+            kernel = SMPKernel(scheduler, [forker(3, 20), writer("A", 30), writer("B", 40)],
+                               Console(stream=output), cpus=3)
+            kernel.run()
+            self.assertEqual(sorted(output.getvalue().strip()), sorted("f" * 160 + "A" * 30 + "B" * 40))
+            self.assertEqual(len({id(cpu.scheduler) for cpu in kernel.cpus}), 3)
+            self.assertFalse(scheduler._entries)
+
+    def test_pause(self):
+        """max_decisions pauses at the end of a round"""
+        random.seed(2)
+        output = StringIO()
+        kernel = SMPKernel(random_scheduler, [writer(c, 20) for c in "ABCDE"], Console('exit', stream=output), cpus=2)
+        self.assertFalse(kernel.run(max_decisions=10))
+        self.assertEqual(kernel.decisions, 10)
+        self.assertTrue(kernel.run())
+        self.assertEqual(len(output.getvalue()), 101)
+
+    def test_batch_cpus(self):
+        """Batch sweeps can vary the number of CPUs"""
+        spec = WorkloadSpec("w", [[Syscall(SyscallType.SYS_WRITE, c)] * 30 + [Syscall(SyscallType.SYS_EXIT)]
+                                  for c in "ABCD"], round_robin_scheduler)
+        results = run_batch(sweep([spec], [round_robin_scheduler], cpus=[1, 2, 4]), workers=1)
+        self.assertEqual([r.cpus for r in results], [1, 2, 4])
+        self.assertEqual([r.steps for r in results], [124] * 3)
+        self.assertEqual([r.time for r in results], [124, 62, 31])
+
+if __name__ == '__main__':
+    unittest.main()
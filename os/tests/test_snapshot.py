@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import random
+import tempfile
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, Program, RunLengthProgram, Syscall, SyscallType
+from src.snapshot import Snapshot
+from examples.main import random_scheduler
+
+def make_procs():
+    return [
+        Process([Syscall(SyscallType.SYS_WRITE, "A")] * 50 + [Syscall(SyscallType.SYS_FORK)] +
+                [Syscall(SyscallType.SYS_WRITE_DOUBLE, "a")] * 30 + [Syscall(SyscallType.SYS_EXIT)]),
+        Process(RunLengthProgram.from_runs([(Syscall(SyscallType.SYS_WRITE, "B"), 80),
+                                            (Syscall(SyscallType.SYS_EXIT), 1)])),
+        Process([Syscall(SyscallType.SYS_WRITE, c) for c in "CDEFG" * 10] + [Syscall(SyscallType.SYS_EXIT)]),
+    ]
+
+class TestSnapshot(unittest.TestCase):
+    def full_run(self, seed: int, quantum: int = 1) -> str:
+        random.seed(seed)
+        output = StringIO()
+        Kernel(random_scheduler, make_procs(), Console(stream=output), quantum).run()
+        return output.getvalue()
+
+    def paused(self, seed: int, decisions: int, quantum: int = 1):
+        random.seed(seed)
+        output = StringIO()
+        kernel = Kernel(random_scheduler, make_procs(), Console('exit', stream=output), quantum)
+        self.assertFalse(kernel.run(max_decisions=decisions))
+        return kernel, output
+
+    def test_pause_and_resume(self):
+        """Pausing and resuming in place changes nothing"""
+        kernel, output = self.paused(1, 40)
+        self.assertEqual(kernel.decisions, 40)
+        self.assertTrue(kernel.run())
+        self.assertEqual(output.getvalue(), self.full_run(1))
+
+    def test_restore_continues_run(self):
+        """Every restore of a snapshot finishes exactly like the original run"""
+        for quantum in [1, 7]:
+            expected = self.full_run(3, quantum)
+            kernel, _ = self.paused(3, 25, quantum)
+            snap = kernel.snapshot()
+            for _ in range(3):
+                output = StringIO()
+                restored = snap.restore(output)
+                self.assertIsNot(restored, kernel)
+                self.assertTrue(restored.run())
+                self.assertEqual(output.getvalue(), expected)
+                self.assertEqual(restored.accounting.completed(), 4)
+
+    def test_programs_not_copied(self):
+        """Program arrays travel out of band and are shared by forks after restore"""
+        kernel, _ = self.paused(5, 140)  # The first process forked at step 51
+        snap = kernel.snapshot()
+        program_bytes = sum(memoryview(buf).nbytes for buf in snap.buffers)
+        self.assertGreater(program_bytes, 0)
+        self.assertLess(len(snap.data), snap.nbytes())
+
+        restored = snap.restore(StringIO())
+        programs = [proc.program for proc in restored.running_procs]
+        self.assertEqual(len(programs), 4)
+        self.assertIsInstance(programs[0], Program)
+        self.assertIsInstance(programs[1], RunLengthProgram)
+        # Parent and child still share one program
+        self.assertEqual(restored.running_procs[3].ppid, restored.running_procs[0].pid)
+        self.assertIs(programs[0], programs[3])
+        self.assertEqual([proc.step for proc in restored.running_procs],
+                         [proc.step for proc in kernel.running_procs])
+
+    def test_save_and_load(self):
+        """A snapshot saved to disk restores from the mapped file"""
+        expected = self.full_run(7)
+        kernel, _ = self.paused(7, 60)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'kernel.snap')
+            kernel.snapshot().save(path)
+            snap = Snapshot.load(path)
+            output = StringIO()
+            restored = snap.restore(output)
+            self.assertTrue(restored.run())
+            del restored, snap
+        self.assertEqual(output.getvalue(), expected)
+
+    def test_load_rejects_other_files(self):
+        """Loading something that is not a snapshot fails"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'junk')
+            with open(path, 'wb') as f:
+                f.write(b'not a snapshot at all')
+            with self.assertRaises(ValueError):
+                Snapshot.load(path)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,200 @@
+import unittest
+import sys
+import os
+import pickle
+import random
+from io import BytesIO, StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.kernel import Kernel, sys_write, sys_write_double
+from src.process import Process, RunLengthProgram, Syscall, SyscallType
+from labs.lab1 import sequential_scheduler
+
+EXIT = Syscall(SyscallType.SYS_EXIT)
+
+def first_scheduler(procs):
+    """Same choice as sequential_scheduler, without declaring it sticky"""
+    return procs[0]
+
+def stepping_kernel(procs, **kwargs) -> Kernel:
+    """The choices of sequential_scheduler, made one step at a time"""
+    return Kernel(first_scheduler, procs, Console(stream=StringIO()), **kwargs)
+
+def per_run_kernel(procs, **kwargs) -> Kernel:
+    """A sticky kernel whose write handlers are not the defaults, so it executes runs one by one"""
+    kernel = Kernel(sequential_scheduler, procs, Console(stream=StringIO()), **kwargs)
+    kernel.register_syscall(SyscallType.SYS_WRITE, lambda *args: sys_write(*args), batchable=True)
+    kernel.register_syscall(SyscallType.SYS_WRITE_DOUBLE, lambda *args: sys_write_double(*args), batchable=True)
+    return kernel
+
+def random_program(rng: random.Random, length: int):
+    """Writes with forks, sleeps and waits in between, ending in an exit"""
+    calls = []
+    while len(calls) < length:
+        roll = rng.random()
+        if roll < 0.05:
+            calls.append(Syscall(SyscallType.SYS_FORK))
+        elif roll < 0.12:
+            calls.append(Syscall(SyscallType.SYS_SLEEP, rng.randrange(1, 20)))
+        elif roll < 0.14:
+            calls.append(Syscall(SyscallType.SYS_WAIT))
+        else:
+            kind = rng.choice([SyscallType.SYS_WRITE, SyscallType.SYS_WRITE_DOUBLE])
+            calls += [Syscall(kind, rng.choice("ABCxyz"))] * rng.randrange(1, 4)
+    return calls + [EXIT]
+
+def run_kernel(scheduler, procs, **kwargs):
+    kernel = Kernel(scheduler, procs, Console(stream=StringIO()), **kwargs)
+    kernel.run()
+    return kernel, kernel.console.stream.getvalue()
+
+class TestRunToCompletion(unittest.TestCase):
+    def assert_same_as_stepping(self, make_procs, **kwargs) -> Kernel:
+        reference = stepping_kernel(make_procs(), **kwargs)
+        reference.run()
+        kernel, output = run_kernel(sequential_scheduler, make_procs(), **kwargs)
+        self.assertEqual(output, reference.console.stream.getvalue())
+        self.assertEqual((kernel.clock, kernel.idle), (reference.clock, reference.idle))
+        if kernel.accounting is not None:
+            self.assertEqual(kernel.accounting.samples, reference.accounting.samples)
+        self.assertFalse(kernel.process_table)
+        # Bulk writes take the same decisions as executing the runs one by one
+        per_run = per_run_kernel(make_procs(), **kwargs)
+        per_run.run()
+        self.assertEqual(per_run.console.stream.getvalue(), output)
+        self.assertEqual(per_run.decisions, kernel.decisions)
+        return kernel
+
+    def test_randomized(self):
+        """Bulk writes match stepping around forks, sleeps and waits"""
+        rng = random.Random(24)
+        for _ in range(40):
+            programs = [random_program(rng, 40) for _ in range(rng.randrange(1, 5))]
+            self.assert_same_as_stepping(lambda: [Process(p) for p in programs])
+            self.assert_same_as_stepping(lambda: [Process(RunLengthProgram.compile(p)) for p in programs])
+
+    def test_one_decision_per_segment(self):
+        """Each decision runs up to the next syscall that is not a write"""
+        program = [Syscall(SyscallType.SYS_WRITE, c) for c in "abcdefgh" * 1000]
+        program += [Syscall(SyscallType.SYS_FORK)] + [Syscall(SyscallType.SYS_WRITE_DOUBLE, "z")] * 10 + [EXIT]
+        kernel = self.assert_same_as_stepping(lambda: [Process(program), Process(program)])
+        # Each process forks once: its fork and exit, and the child's exit
+        self.assertEqual(kernel.decisions, 6)
+
+    def test_started_mid_program(self):
+        """A process may enter the kernel at any step"""
+        program = [Syscall(SyscallType.SYS_WRITE, c) for c in "0123456789"] + [EXIT]
+        def procs():
+            proc = Process(program)
+            proc.step = 4
+            encoded = Process(RunLengthProgram.compile(program))
+            encoded.step = 7
+            return [proc, encoded]
+        kernel, output = run_kernel(sequential_scheduler, procs())
+        self.assertEqual(output, "456789789\n")
+        self.assertEqual(kernel.clock, 11)
+
+    def test_custom_handlers(self):
+        """A replaced write handler sees every call, other batchable syscalls keep the decision going"""
+        kernel = Kernel(sequential_scheduler, [Process([Syscall(SyscallType.SYS_WRITE, "w")] * 3 + [EXIT])],
+                        Console(stream=StringIO()))
+        kernel.register_syscall(SyscallType.SYS_WRITE,
+                                lambda kernel, proc, call, count: kernel.console_write("!" * count), batchable=True)
+        kernel.run()
+        self.assertEqual(kernel.console.stream.getvalue(), "!!!\n")
+
+        ticks = []
+        program = [Syscall(SyscallType.SYS_WRITE, "a"), Syscall(100), Syscall(SyscallType.SYS_WRITE, "b"),
+                   Syscall(100), EXIT]
+        kernel = Kernel(sequential_scheduler, [Process(program)], Console(stream=StringIO()))
+        kernel.register_syscall(100, lambda kernel, proc, call, count: ticks.append(kernel.clock), batchable=True)
+        kernel.run()
+        self.assertEqual(kernel.console.stream.getvalue(), "ab\n")
+        self.assertEqual(ticks, [2, 4])
+        self.assertEqual(kernel.decisions, 1)
+
+    def test_batchable_runs_dispatched_once(self):
+        """A run of a custom batchable syscall reaches its handler once, with its count"""
+        counts = []
+        program = [Syscall(SyscallType.SYS_WRITE, "a")] + [Syscall(100)] * 50
+        program += [Syscall(SyscallType.SYS_WRITE, "b"), EXIT]
+        for procs in [[Process(program)], [Process(RunLengthProgram.compile(program))]]:
+            counts.clear()
+            kernel = Kernel(sequential_scheduler, procs, Console(stream=StringIO()))
+            kernel.register_syscall(100, lambda kernel, proc, call, count: counts.append(count), batchable=True)
+            kernel.run()
+            self.assertEqual(counts, [50])
+            self.assertEqual(kernel.console.stream.getvalue(), "ab\n")
+            self.assertEqual((kernel.clock, kernel.decisions), (53, 1))
+
+    def test_no_output_kept(self):
+        """Only where the programs stop is cached, per run for run-length programs, and only while they run"""
+        program = RunLengthProgram.from_runs([(Syscall(SyscallType.SYS_WRITE, "a"), 100000),
+                                              (Syscall(SyscallType.SYS_SLEEP, 0), 100000),
+                                              (Syscall(SyscallType.SYS_WRITE_DOUBLE, "b"), 70000),
+                                              (Syscall(SyscallType.SYS_WRITE, "c"), 3), (EXIT, 1)])
+        kernel = self.assert_same_as_stepping(lambda: [Process(program)], accounting=False)
+        self.assertEqual(kernel.console.stream.getvalue(), "a" * 100000 + "b" * 140000 + "ccc\n")
+
+        kernel = Kernel(sequential_scheduler, [Process(program), Process(program)], Console(stream=StringIO()))
+        self.assertFalse(kernel.run(max_decisions=1))
+        stops, texts = kernel._bulk[program]
+        self.assertEqual(list(stops), [1, 4, 5])
+        self.assertEqual(texts, ["a", "", "bb", "c", ""])
+        # Dropped with the last process of the program, not the first
+        kernel.process_exit(kernel.running_procs[0])
+        self.assertIn(program, kernel._bulk)
+        kernel.run()
+        self.assertFalse(kernel._bulk)
+        self.assertFalse(kernel._users)
+
+    def test_programs_not_retained(self):
+        """Programs that finished running are not kept alive by the kernel"""
+        procs = [Process([Syscall(SyscallType.SYS_WRITE, str(i))] * 5 + [EXIT]) for i in range(200)]
+        kernel, _ = run_kernel(sequential_scheduler, procs)
+        self.assertFalse(kernel._bulk)
+        self.assertFalse(kernel._users)
+
+    def test_pause_replay_and_snapshot(self):
+        """Sticky runs pause, replay from a trace and survive a snapshot"""
+        rng = random.Random(4)
+        programs = [random_program(rng, 60) for _ in range(3)]
+        trace = BytesIO()
+        kernel = Kernel(sequential_scheduler, [Process(p) for p in programs], Console('exit', stream=StringIO()))
+        kernel.record_trace(trace)
+        kernel.run()
+        expected = kernel.console.stream.getvalue()
+
+        replayed = Kernel(sequential_scheduler, [Process(p) for p in programs], Console('exit', stream=StringIO()))
+        replayed.replay(BytesIO(trace.getvalue()))
+        self.assertEqual(replayed.console.stream.getvalue(), expected)
+
+        paused = Kernel(sequential_scheduler, [Process(p) for p in programs], Console('exit', stream=StringIO()))
+        self.assertFalse(paused.run(max_decisions=3))
+        self.assertTrue(paused._bulk)
+        self.assertFalse(pickle.loads(pickle.dumps(paused))._bulk)
+        restored = paused.snapshot().restore(StringIO())
+        restored.run()
+        self.assertEqual(restored.console.stream.getvalue(), expected)
+
+    def test_dedup(self):
+        """Merged groups still run their slices member by member"""
+        program = [Syscall(SyscallType.SYS_FORK), Syscall(SyscallType.SYS_WRITE, "a"),
+                   Syscall(SyscallType.SYS_FORK), Syscall(SyscallType.SYS_WRITE_DOUBLE, "b"), EXIT]
+        _, expected = run_kernel(first_scheduler, [Process(program)])
+        _, output = run_kernel(sequential_scheduler, [Process(program)], dedup=True)
+        self.assertEqual(sorted(output), sorted(expected))
+
+    def test_large_run(self):
+        """A million writes with no runs to batch take a single decision"""
+        calls = [Syscall(SyscallType.SYS_WRITE, c) for c in "abc"] + [Syscall(SyscallType.SYS_WRITE_DOUBLE, "d")]
+        program = Process(calls * 250000 + [EXIT])
+        kernel = Kernel(sequential_scheduler, [program], Console('exit', stream=StringIO()), accounting=False)
+        kernel.run()
+        self.assertEqual(len(kernel.console.stream.getvalue()), 1250001)
+        self.assertEqual(kernel.decisions, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import unittest
+import sys
+import os
+import pickle
+import random
+import tracemalloc
+from functools import partial
+from io import BytesIO, StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch import WorkloadSpec, run_simulation
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, StreamCursor, StreamProgram, Syscall, SyscallType
+from src.schedulers import round_robin_scheduler
+from src.smp import SMPKernel
+from src.vectorized import VectorKernel
+from labs.lab1 import sequential_scheduler
+from examples.main import random_scheduler
+
+EXIT = Syscall(SyscallType.SYS_EXIT)
+FORK = Syscall(SyscallType.SYS_FORK)
+
+def generated(seed: int, length: int, forks: bool = True):
+    """Runs of writes of random characters with the odd fork, then an exit"""
+    rng = random.Random(seed)
+    step = 0
+    while step < length:
+        if forks and rng.random() < 0.03:
+            yield FORK
+            step += 1
+            continue
+        call = Syscall(rng.choice([SyscallType.SYS_WRITE, SyscallType.SYS_WRITE_DOUBLE]), rng.choice("ABCxyz"))
+        for _ in range(rng.randrange(1, 5)):
+            yield call
+        step += 1
+    yield EXIT
+
+def chunk(seed: int, length: int, index: int):
+    """Chunk `index` of the generated program, 16 syscalls a chunk"""
+    return list(generated(seed, length))[index * 16:(index + 1) * 16]
+
+def counting_writer(length: int):
+    """Writes `length` characters one step at a time, each different from the last"""
+    for step in range(length):
+        yield Syscall(SyscallType.SYS_WRITE, "ab"[step % 2])
+    yield EXIT
+
+class NullStream:
+    """Counts what is written and keeps none of it"""
+    def __init__(self):
+        self.written = 0
+
+    def write(self, text: str):
+        self.written += len(text)
+
+    def flush(self):
+        pass
+
+class TestStreamProgram(unittest.TestCase):
+    def streams(self, seeds, length: int = 60):
+        return [
+            [Process(StreamProgram.from_function(generated, seed, length)) for seed in seeds],
+            [Process(StreamProgram.from_chunks(partial(chunk, seed, length), 16)) for seed in seeds],
+        ]
+
+    def run_kernel(self, kernel_class, scheduler, procs, **kwargs):
+        random.seed(1)
+        output = StringIO()
+        kernel = kernel_class(scheduler, procs, Console(stream=output), **kwargs)
+        kernel.run()
+        return kernel, output.getvalue()
+
+    def test_same_as_compiled(self):
+        """A stream runs exactly like the list it produces, forks included"""
+        seeds = [3, 4, 5]
+        for kernel_class, scheduler, kwargs in [(Kernel, round_robin_scheduler, {}),
+                                                (Kernel, round_robin_scheduler, {'quantum': 4}),
+                                                (Kernel, random_scheduler, {'quantum': 3}),
+                                                (Kernel, sequential_scheduler, {}),
+                                                (SMPKernel, round_robin_scheduler, {'cpus': 2})]:
+            reference, expected = self.run_kernel(
+                kernel_class, scheduler, [Process(list(generated(seed, 60))) for seed in seeds], **kwargs)
+            for procs in self.streams(seeds):
+                kernel, output = self.run_kernel(kernel_class, scheduler, procs, **kwargs)
+                self.assertEqual(output, expected)
+                self.assertEqual((kernel.clock, kernel.decisions), (reference.clock, reference.decisions))
+                self.assertEqual(kernel.accounting.samples, reference.accounting.samples)
+
+    def test_fork_reopens_source(self):
+        """A child shares the program and opens the source at its own step"""
+        opened = []
+        def source(start):
+            opened.append(start)
+            return [Syscall(SyscallType.SYS_WRITE, "p"), FORK, Syscall(SyscallType.SYS_WRITE, "c"), EXIT][start:]
+        program = StreamProgram(source, 4)
+        output = StringIO()
+        kernel = Kernel(round_robin_scheduler, [Process(program)], Console(stream=output))
+        kernel.run()
+        self.assertEqual(output.getvalue(), "pcc\n")
+        self.assertEqual(opened, [0, 2])
+        self.assertEqual(len(program), 4)
+
+    def test_chunks(self):
+        """Chunked sources load only the chunks from the opening step on"""
+        loaded = []
+        def load(index):
+            loaded.append(index)
+            return [Syscall(SyscallType.SYS_WRITE, str(index))] * (10 if index < 3 else 4)
+        program = StreamProgram.from_chunks(load, 10)
+        self.assertEqual(len(list(program)), 34)
+        loaded.clear()
+        cursor = StreamCursor(program, 25)
+        self.assertEqual([cursor.next().arg for _ in range(9)], ["2"] * 5 + ["3"] * 4)
+        self.assertEqual(loaded, [2, 3])
+        with self.assertRaises(IndexError):
+            cursor.next()
+        with self.assertRaises(ValueError):
+            StreamProgram.from_chunks(load, 0)
+
+    def test_cursor_values(self):
+        """Only the end of the source ends a stream, and runs keep arg types apart"""
+        first, last = Syscall(SyscallType.SYS_WRITE, "a"), Syscall(SyscallType.SYS_WRITE, "b")
+        cursor = StreamCursor(StreamProgram(lambda start: [first, None, last][start:]))
+        self.assertIs(cursor.next(), first)
+        self.assertIsNone(cursor.next())  # Not taken for the end
+        self.assertIs(cursor.next(), last)
+        self.assertFalse(cursor.repeats(last))
+        with self.assertRaises(IndexError):
+            cursor.next()
+
+        calls = [Syscall(SyscallType.SYS_WRITE, arg) for arg in [1, True, 1.0, 1]] + [EXIT]
+        _, expected = self.run_kernel(Kernel, round_robin_scheduler, [Process(calls)], quantum=4)
+        self.assertEqual(expected, "1True1.01\n")
+        _, output = self.run_kernel(Kernel, round_robin_scheduler,
+                                    [Process(StreamProgram.from_function(iter, calls))], quantum=4)
+        self.assertEqual(output, expected)
+
+    def test_memory_independent_of_length(self):
+        """Memory stays flat however long the programs are"""
+        peaks = []
+        for length in [2000, 60000]:
+            procs = [Process(StreamProgram.from_function(counting_writer, length)) for _ in range(4)]
+            stream = NullStream()
+            tracemalloc.start()
+            kernel = Kernel(round_robin_scheduler, procs, Console('block', stream=stream), quantum=100,
+                            accounting=False)
+            kernel.run()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            self.assertEqual(stream.written, 4 * length + 1)
+        # Thirty times the steps: compiled, the programs alone would take
+        # two bytes a step, 480 KB
+        self.assertLess(peaks[1], peaks[0] * 2)
+        self.assertLess(peaks[1], 200000)
+
+    def test_unknown_length_and_no_exit(self):
+        """len() needs a known length, running off the end fails like a list"""
+        program = StreamProgram.from_function(iter, [Syscall(SyscallType.SYS_WRITE, "w")])
+        with self.assertRaises(TypeError):
+            len(program)
+        for scheduler in [round_robin_scheduler, sequential_scheduler]:
+            with self.assertRaises(IndexError):
+                Kernel(scheduler, [Process(program)], Console(stream=StringIO())).run()
+
+    def test_snapshot_and_replay(self):
+        """A paused run with open cursors resumes from a snapshot, and traces replay"""
+        seeds = [7, 8]
+        _, expected = self.run_kernel(Kernel, random_scheduler, self.streams(seeds)[0], quantum=2)
+        for procs in self.streams(seeds):
+            random.seed(1)
+            kernel = Kernel(random_scheduler, procs, Console('exit', stream=StringIO()), 2)
+            self.assertFalse(kernel.run(max_decisions=15))
+            cursor = kernel.running_procs[0].cursor
+            self.assertIsInstance(pickle.loads(pickle.dumps(cursor)), StreamCursor)
+            restored = kernel.snapshot().restore(StringIO())
+            restored.run()
+            self.assertEqual(restored.console.stream.getvalue(), expected)
+
+        trace = BytesIO()
+        random.seed(1)
+        kernel = Kernel(random_scheduler, self.streams(seeds)[0], Console('exit', stream=StringIO()), 2)
+        kernel.record_trace(trace)
+        kernel.run()
+        replayed = Kernel(random_scheduler, self.streams(seeds)[1], Console('exit', stream=StringIO()), 2)
+        replayed.replay(BytesIO(trace.getvalue()))
+        self.assertEqual(replayed.console.stream.getvalue(), expected)
+
+    def test_fallbacks(self):
+        """Streams are never merged or vectorized, and run in batches"""
+        program = StreamProgram.from_function(generated, 9, 40)
+        _, expected = self.run_kernel(Kernel, round_robin_scheduler, [Process(list(generated(9, 40)))])
+        kernel, output = self.run_kernel(Kernel, round_robin_scheduler, [Process(program)], dedup=True)
+        self.assertEqual(output, expected)
+        self.assertFalse(kernel._merge_from)
+
+        no_forks = StreamProgram.from_function(generated, 9, 40, False)
+        kernel = VectorKernel([Process(no_forks)], Console(stream=StringIO()))
+        kernel.run()
+        self.assertFalse(kernel.vectorized)
+        self.assertEqual(kernel.console.stream.getvalue(), "".join(
+            str(call.arg) * call.syscall for call in generated(9, 40, False)) + "\n")
+
+        result = run_simulation(WorkloadSpec("stream", [program], round_robin_scheduler, seed=1))
+        self.assertEqual(result.output, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+import unittest
+import sys
+import os
+import random
+from io import BytesIO, StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.coroutines import AsyncKernel, AsyncProcess
+from src.kernel import Kernel
+from src.process import Process, RunLengthProgram, Syscall, SyscallType
+from src.schedulers import CFSScheduler, round_robin_scheduler
+from src.smp import SMPKernel
+from src.timers import TimerWheel
+from labs.lab1 import sequential_scheduler
+from examples.main import random_scheduler
+
+EXIT = Syscall(SyscallType.SYS_EXIT)
+
+def first_scheduler(procs):
+    """Same choice as sequential_scheduler, one step per decision"""
+    return procs[0]
+
+def random_program(rng: random.Random, length: int):
+    """Writes with sleeps, forks and waits in between, ending in an exit"""
+    calls = []
+    while len(calls) < length:
+        roll = rng.random()
+        if roll < 0.05:
+            calls.append(Syscall(SyscallType.SYS_FORK))
+        elif roll < 0.12:
+            calls.append(Syscall(SyscallType.SYS_SLEEP, rng.randrange(1, 20)))
+        elif roll < 0.14:
+            calls.append(Syscall(SyscallType.SYS_WAIT))
+        else:
+            kind = rng.choice([SyscallType.SYS_WRITE, SyscallType.SYS_WRITE_DOUBLE])
+            calls += [Syscall(kind, rng.choice("ABCxyz"))] * rng.randrange(1, 4)
+    return calls + [EXIT]
+
+def run_kernel(kernel_class, scheduler, procs, **kwargs):
+    kernel = kernel_class(scheduler, procs, Console(stream=StringIO()), **kwargs)
+    kernel.run()
+    return kernel, kernel.console.stream.getvalue()
+
+def sleeper(char: str, ticks: int, writes: int = 1) -> Process:
+    """Writes, sleeps for `ticks`, writes again and exits"""
+    write = Syscall(SyscallType.SYS_WRITE, char)
+    return Process([write] * writes + [Syscall(SyscallType.SYS_SLEEP, ticks)] +
+                   [write] * writes + [Syscall(SyscallType.SYS_EXIT)])
+
+class TestTimerWheel(unittest.TestCase):
+    def check_against_sorted(self, wheel: TimerWheel, rng: random.Random, count: int, horizon: int):
+        timers = {}
+        for i in range(count):
+            when = wheel.now + rng.randrange(horizon)
+            timers[i] = wheel.schedule(when, i)
+        cancelled = set(rng.sample(range(count), count // 10))
+        for i in cancelled:
+            wheel.cancel(timers[i])
+        self.assertEqual(len(wheel), count - len(cancelled))
+        expected = sorted((t[0], i) for i, t in timers.items() if i not in cancelled)
+        fired = []
+        now = wheel.now
+        while len(wheel):
+            now += rng.choice([1, 7, 64, 1000, horizon // 3 + 1])
+            for i in wheel.advance(now):
+                when = timers[i][0]
+                self.assertLessEqual(when, now)
+                fired.append((when, i))
+        self.assertEqual(sorted(fired), expected)
+        # Timers fire in time order across advances
+        self.assertEqual([w for w, _ in fired], sorted(w for w, _ in fired))
+        self.assertIsNone(wheel.next_deadline())
+
+    def test_matches_sorted_order(self):
+        """Timers fire in order of expiry, whatever the levels they went through"""
+        rng = random.Random(5)
+        for horizon in [10, 5000, 1 << 20]:
+            self.check_against_sorted(TimerWheel(now=rng.randrange(1 << 30)), rng, 3000, horizon)
+
+    def test_overflow(self):
+        """Timers beyond the top level wait in the overflow heap"""
+        rng = random.Random(6)
+        wheel = TimerWheel(levels=2)
+        self.check_against_sorted(wheel, rng, 2000, 1 << 16)
+        # Time jumps close to an overflowed timer, then a later one is added
+        wheel = TimerWheel(levels=2)
+        wheel.schedule(5000, 'far')
+        self.assertEqual(wheel.advance(4990), [])
+        wheel.schedule(5100, 'near')
+        self.assertEqual(wheel.advance(5050), ['far'])
+        self.assertEqual(wheel.advance(5100), ['near'])
+
+    def test_next_deadline_jumps(self):
+        """next_deadline() reaches a far timer in a handful of hops"""
+        wheel = TimerWheel()
+        wheel.schedule(10 ** 9, 'late')
+        wheel.schedule(5, 'soon')
+        self.assertEqual(wheel.next_deadline(), 5)
+        self.assertEqual(wheel.advance(5), ['soon'])
+        hops = 0
+        fired = []
+        while not fired:
+            fired = wheel.advance(wheel.next_deadline())
+            hops += 1
+        self.assertEqual(fired, ['late'])
+        self.assertEqual(wheel.now, 10 ** 9)
+        self.assertLessEqual(hops, wheel.levels)
+
+    def test_past_and_cancel(self):
+        """A timer already due fires on the next advance, a cancelled one never"""
+        wheel = TimerWheel(now=100)
+        wheel.schedule(50, 'past')
+        dead = wheel.schedule(101, 'dead')
+        wheel.cancel(dead)
+        wheel.cancel(dead)
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(wheel.advance(100), ['past'])
+        self.assertEqual(wheel.advance(200), [])
+
+class TestSleep(unittest.TestCase):
+    def test_sleep_reorders(self):
+        """A sleeping process leaves the run queue and comes back after its ticks"""
+        output = StringIO()
+        kernel = Kernel(round_robin_scheduler, [sleeper("A", 10), sleeper("B", 1)], Console(stream=output))
+        kernel.run()
+        self.assertEqual(output.getvalue(), "ABBA\n")
+        self.assertEqual(kernel.clock, 8)
+        self.assertEqual(kernel.sleeping, 0)
+        self.assertFalse(kernel.process_table)
+
+    def test_idle_jump(self):
+        """With every process asleep, time jumps to the next timer at no cost"""
+        procs = [sleeper(c, 10 ** 9 + i) for i, c in enumerate("ABC")]
+        output = StringIO()
+        kernel = Kernel(round_robin_scheduler, procs, Console(stream=output))
+        kernel.run()
+        self.assertEqual(output.getvalue(), "ABCABC\n")
+        self.assertEqual(kernel.clock, 12)
+        self.assertEqual(kernel.now(), kernel.clock + kernel.idle)
+        self.assertGreaterEqual(kernel.now(), 10 ** 9)
+        self.assertLess(kernel.decisions, 20)
+        # Sleeping counts as waiting in the accounting
+        self.assertGreater(kernel.stats()['wait']['mean'], 10 ** 9 - 10)
+
+    def test_quantum_and_sticky(self):
+        """Sleep ends a slice, a sticky scheduler moves on to the next process"""
+        for scheduler, quantum in [(round_robin_scheduler, 4), (sequential_scheduler, 1)]:
+            output = StringIO()
+            kernel = Kernel(scheduler, [sleeper("A", 3, 2), sleeper("B", 3, 2)], Console(stream=output), quantum)
+            kernel.run()
+            self.assertEqual(output.getvalue(), "AABBAABB\n")
+
+    def test_due_mid_slice(self):
+        """A sleeper due during a slice is queued at that step, ahead of a child forked after it"""
+        def procs():
+            return [Process([Syscall(SyscallType.SYS_SLEEP, 1), Syscall(SyscallType.SYS_WRITE, "s"), EXIT]),
+                    Process([Syscall(SyscallType.SYS_WRITE, "a")] * 3 +
+                            [Syscall(SyscallType.SYS_FORK), Syscall(SyscallType.SYS_WRITE, "c"), EXIT])]
+
+        for program in [lambda p: p, RunLengthProgram.compile]:
+            _, expected = run_kernel(Kernel, first_scheduler, procs())
+            self.assertEqual(expected, "aaacsc\n")
+            _, output = run_kernel(Kernel, sequential_scheduler, [Process(program(p.program)) for p in procs()])
+            self.assertEqual(output, expected)
+            _, output = run_kernel(SMPKernel, sequential_scheduler, procs(), cpus=1)
+            self.assertEqual(output, expected)
+
+        rng = random.Random(20)
+        for _ in range(60):
+            programs = [random_program(rng, 40) for _ in range(rng.randrange(1, 5))]
+            reference, expected = run_kernel(Kernel, first_scheduler, [Process(p) for p in programs])
+            kernel, output = run_kernel(Kernel, sequential_scheduler, [Process(p) for p in programs])
+            self.assertEqual(output, expected)
+            self.assertEqual(kernel.now(), reference.now())
+            for scheduler, quantum in [(sequential_scheduler, 1), (round_robin_scheduler, 3)]:
+                plain, expected = run_kernel(Kernel, scheduler, [Process(p) for p in programs], quantum=quantum)
+                smp, output = run_kernel(SMPKernel, scheduler, [Process(p) for p in programs], quantum=quantum,
+                                         cpus=1)
+                self.assertEqual(output, expected)
+                self.assertEqual((smp.clock, smp.decisions), (plain.clock, plain.decisions))
+
+    def test_stateful_scheduler(self):
+        """A stateful scheduler sees sleepers dequeued and woken processes enqueued"""
+        scheduler = CFSScheduler()
+        procs = [sleeper(c, 5 * (i + 1), 3) for i, c in enumerate("ABCD")]
+        output = StringIO()
+        Kernel(scheduler, procs, Console(stream=output)).run()
+        self.assertEqual(sorted(output.getvalue().strip()), sorted("AAAAAABBBBBBCCCCCCDDDDDD"))
+        self.assertIsNone(scheduler._current)
+
+    def test_replay(self):
+        """A recorded run with sleeps replays to the same output"""
+        procs = [sleeper(c, random.Random(i).randrange(1, 50), 5) for i, c in enumerate("ABCDEF")]
+        random.seed(3)
+        output = StringIO()
+        trace = BytesIO()
+        kernel = Kernel(random_scheduler, [p.__copy__() for p in procs], Console(stream=output))
+        kernel.record_trace(trace)
+        kernel.run()
+        replayed = StringIO()
+        kernel2 = Kernel(random_scheduler, [p.__copy__() for p in procs], Console(stream=replayed))
+        kernel2.replay(BytesIO(trace.getvalue()))
+        self.assertEqual(replayed.getvalue(), output.getvalue())
+        self.assertEqual(kernel2.now(), kernel.now())
+
+    def test_snapshot_while_asleep(self):
+        """A snapshot keeps the sleeping processes and their timers"""
+        output = StringIO()
+        kernel = Kernel(round_robin_scheduler, [sleeper("A", 100), sleeper("B", 200)], Console('exit', stream=output))
+        self.assertFalse(kernel.run(max_decisions=4))
+        self.assertEqual(kernel.sleeping, 2)
+        restored_output = StringIO()
+        restored = kernel.snapshot().restore(restored_output)
+        restored.run()
+        self.assertEqual(restored_output.getvalue(), "ABAB\n")
+
+    def test_smp(self):
+        """On several CPUs the idle rounds skipped over count for every CPU"""
+        procs = [sleeper(c, 1000, 3) for c in "ABCD"]
+        kernel = SMPKernel(round_robin_scheduler, procs, Console(stream=StringIO()), cpus=2)
+        kernel.run()
+        self.assertGreaterEqual(kernel.time, 1000)
+        self.assertLess(kernel.time, 1020)
+        for stats in kernel.cpu_stats():
+            self.assertEqual(stats['busy'] + stats['idle'], kernel.time)
+        self.assertEqual(sum(s['busy'] for s in kernel.cpu_stats()), kernel.clock)
+
+    def test_async(self):
+        """Coroutine processes sleep in virtual time"""
+        async def napper(char, ticks):
+            yield Syscall(SyscallType.SYS_WRITE, char)
+            yield Syscall(SyscallType.SYS_SLEEP, ticks)
+            yield Syscall(SyscallType.SYS_WRITE, char)
+
+        output = StringIO()
+        kernel = AsyncKernel(round_robin_scheduler, [AsyncProcess(napper("A", 50)), AsyncProcess(napper("B", 10))],
+                             Console(stream=output))
+        kernel.run()
+        self.assertEqual(output.getvalue(), "ABBA\n")
+        self.assertGreaterEqual(kernel.now(), 50)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+import random
+from io import StringIO
+from contextlib import redirect_stdout
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.myos as myos
+import src.vectorized as vectorized
+from src.console import Console
+from src.kernel import Kernel
+from src.process import Process, RunLengthProgram, Syscall, SyscallType
+from src.schedulers import round_robin_scheduler
+from src.vectorized import VectorKernel
+from labs.lab3 import my_run
+from tests import test_lab3
+
+def random_workload(rng: random.Random, procs: int, max_length: int):
+    """Writes and double writes of random characters, each process ending in an exit"""
+    workload = []
+    for _ in range(procs):
+        program = [Syscall(rng.choice([SyscallType.SYS_WRITE, SyscallType.SYS_WRITE_DOUBLE]), rng.choice("ABCxyz"))
+                   for _ in range(rng.randrange(max_length))]
+        workload.append(program + [Syscall(SyscallType.SYS_EXIT)])
+    return workload
+
+def run_kernel(kernel_class, programs, quantum: int, **kwargs):
+    output = StringIO()
+    procs = [Process(program) for program in programs]
+    if kernel_class is Kernel:
+        kernel = Kernel(round_robin_scheduler, procs, Console(stream=output), quantum, **kwargs)
+    else:
+        kernel = kernel_class(procs, Console(stream=output), quantum, **kwargs)
+    kernel.run()
+    return kernel, output.getvalue()
+
+class TestVectorKernel(unittest.TestCase):
+    def assert_same_as_kernel(self, programs, quantum: int) -> VectorKernel:
+        reference, expected = run_kernel(Kernel, programs, quantum)
+        kernel, output = run_kernel(VectorKernel, programs, quantum)
+        self.assertEqual(output, expected)
+        self.assertEqual((kernel.clock, kernel.decisions), (reference.clock, reference.decisions))
+        self.assertEqual(kernel.accounting.samples, reference.accounting.samples)
+        self.assertFalse(kernel.process_table)
+        self.assertFalse(kernel.running_procs)
+        return kernel
+
+    def test_randomized_round_robin(self):
+        """Bulk round robin matches the stepping kernel, output and accounting"""
+        rng = random.Random(23)
+        for _ in range(30):
+            programs = random_workload(rng, rng.randrange(1, 12), 30)
+            for quantum in [1, 2, 3, 7, 1000]:
+                kernel = self.assert_same_as_kernel(programs, quantum)
+                self.assertEqual(kernel.vectorized, vectorized.np is not None)
+
+    def test_lab3_reference(self):
+        """With a quantum longer than any program it matches my_run from lab 3"""
+        rng = random.Random(3)
+        reference = test_lab3.TestLab3().reference_output
+        for _ in range(20):
+            programs = random_workload(rng, rng.randrange(1, 8), 20)
+            _, output = run_kernel(VectorKernel, programs, 100)
+            myos.init(lambda procs: procs[0], [Process(program) for program in programs])
+            captured = StringIO()
+            with redirect_stdout(captured):
+                my_run()
+            self.assertEqual(output.rstrip('\n'), reference([Process(program) for program in programs]))
+            self.assertEqual(output, captured.getvalue())
+
+    def test_run_length_programs(self):
+        """Programs stored as runs are expanded correctly"""
+        for quantum in [1, 4, 50]:
+            programs = [RunLengthProgram.from_runs([(Syscall(SyscallType.SYS_WRITE, "A"), 30),
+                                                    (Syscall(SyscallType.SYS_WRITE_DOUBLE, "b"), 5),
+                                                    (Syscall(SyscallType.SYS_EXIT), 1)]),
+                        RunLengthProgram.from_runs([(Syscall(SyscallType.SYS_WRITE, "C"), 12),
+                                                    (Syscall(SyscallType.SYS_EXIT), 1)])]
+            self.assert_same_as_kernel(programs, quantum)
+
+    def test_resume_after_pause(self):
+        """A run paused by the stepping kernel finishes in bulk"""
+        programs = random_workload(random.Random(5), 6, 40)
+        _, expected = run_kernel(Kernel, programs, 3)
+        output = StringIO()
+        kernel = VectorKernel([Process(program) for program in programs], Console('exit', stream=output), 3)
+        self.assertFalse(kernel.run(max_decisions=10))
+        self.assertTrue(kernel.run())
+        self.assertEqual(output.getvalue(), expected)
+
+    def test_fallback(self):
+        """Forks, sleeps and custom handlers run step by step"""
+        workloads = [
+            [[Syscall(SyscallType.SYS_FORK), Syscall(SyscallType.SYS_WRITE, "f"), Syscall(SyscallType.SYS_EXIT)]],
+            [[Syscall(SyscallType.SYS_WRITE, "s"), Syscall(SyscallType.SYS_SLEEP, 5), Syscall(SyscallType.SYS_EXIT)],
+             [Syscall(SyscallType.SYS_WRITE, "t"), Syscall(SyscallType.SYS_EXIT)]],
+        ]
+        for programs in workloads:
+            kernel = self.assert_same_as_kernel(programs, 2)
+            self.assertFalse(kernel.vectorized)
+
+        kernel = VectorKernel([Process([Syscall(SyscallType.SYS_WRITE, "w"), Syscall(SyscallType.SYS_EXIT)])],
+                              Console(stream=StringIO()))
+        kernel.register_syscall(SyscallType.SYS_WRITE, lambda kernel, proc, call, count: kernel.console_write("!"))
+        kernel.run()
+        self.assertFalse(kernel.vectorized)
+        self.assertEqual(kernel.console.stream.getvalue(), "!\n")
+
+    def test_without_numpy(self):
+        """Without NumPy every run steps, with the same results"""
+        programs = random_workload(random.Random(7), 5, 20)
+        with mock.patch.object(vectorized, 'np', None):
+            kernel = self.assert_same_as_kernel(programs, 2)
+        self.assertFalse(kernel.vectorized)
+
+if __name__ == '__main__':
+    unittest.main()
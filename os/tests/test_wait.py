@@ -0,0 +1,171 @@
+import unittest
+import sys
+import os
+import random
+from io import BytesIO, StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.console import Console
+from src.coroutines import AsyncKernel, AsyncProcess
+from src.kernel import Kernel
+from src.process import Process, Syscall, SyscallType
+from src.schedulers import CFSScheduler, MLFQScheduler, round_robin_scheduler
+from src.smp import SMPKernel
+from examples.main import random_scheduler
+
+EXIT = Syscall(SyscallType.SYS_EXIT)
+WAIT = Syscall(SyscallType.SYS_WAIT)
+FORK = Syscall(SyscallType.SYS_FORK)
+
+def writer(char: str, length: int = 1) -> Process:
+    return Process([Syscall(SyscallType.SYS_WRITE, char)] * length + [EXIT])
+
+def fork_tree(depth: int, char: str = "x") -> Process:
+    """Forks `depth` times (2 ** depth processes), each waits for all its children, writes and exits"""
+    return Process([FORK] * depth + [WAIT] * depth + [Syscall(SyscallType.SYS_WRITE, char), EXIT])
+
+class TestProcessTable(unittest.TestCase):
+    def setUp(self):
+        self.kernel = Kernel(round_robin_scheduler, [writer("P", 5)], Console('exit', stream=StringIO()))
+        self.parent = self.kernel.process_table[0]
+
+    def spawn(self, length: int = 1) -> Process:
+        child = writer("C", length)
+        self.kernel.process_push(child, self.parent)
+        return child
+
+    def test_zombie_until_wait(self):
+        """An exited child stays in the table until its parent waits for it"""
+        child = self.spawn()
+        self.assertEqual(child.ppid, self.parent.pid)
+        self.kernel.process_exit(child)
+        self.assertIs(self.kernel.process_lookup(child.pid), child)
+        self.assertNotIn(child, self.kernel.running_procs)
+        self.assertIn(child.pid, self.kernel.zombies[self.parent.pid])
+        self.assertEqual(self.kernel.process_wait(self.parent), child.pid)
+        self.assertIsNone(self.kernel.process_lookup(child.pid))
+        self.assertFalse(self.kernel.zombies)
+        self.assertFalse(self.kernel.children)
+        self.assertEqual(self.kernel.process_wait(self.parent), -1)
+
+    def test_wait_blocks(self):
+        """Waiting for a running child takes the parent off the run queue until it exits"""
+        first, second = self.spawn(), self.spawn()
+        self.assertIsNone(self.kernel.process_wait(self.parent, second.pid))
+        self.assertNotIn(self.parent, self.kernel.running_procs)
+        self.assertEqual(self.kernel.waiters, {self.parent.pid: second.pid})
+        self.kernel.process_exit(first)
+        self.assertNotIn(self.parent, self.kernel.running_procs)
+        self.kernel.process_exit(second)
+        self.assertIn(self.parent, self.kernel.running_procs)
+        self.assertFalse(self.kernel.waiters)
+        self.assertIsNone(self.kernel.process_lookup(second.pid))
+        # The first one is still a zombie
+        self.assertEqual(self.kernel.process_wait(self.parent), first.pid)
+
+    def test_wait_for_other(self):
+        """Waiting for a process that is not a child fails at once"""
+        child = self.spawn()
+        stranger = writer("S")
+        self.kernel.process_push(stranger)
+        for pid in [stranger.pid, self.parent.pid, 1000]:
+            self.assertEqual(self.kernel.process_wait(self.parent, pid), -1)
+        self.assertEqual(self.kernel.process_wait(child, None), -1)
+        self.assertIn(self.parent, self.kernel.running_procs)
+
+    def test_orphans(self):
+        """A parent's exit reaps its zombies and hands running children to the kernel"""
+        dead, alive = self.spawn(), self.spawn()
+        grandchild = writer("G")
+        self.kernel.process_push(grandchild, alive)
+        self.kernel.process_exit(dead)
+        self.kernel.process_exit(self.parent)
+        self.assertIsNone(self.kernel.process_lookup(dead.pid))
+        self.assertIsNone(self.kernel.process_lookup(self.parent.pid))
+        self.assertEqual(alive.ppid, -1)
+        self.assertEqual(grandchild.ppid, alive.pid)
+        self.kernel.process_exit(alive)
+        self.assertIsNone(self.kernel.process_lookup(alive.pid))
+        self.kernel.process_exit(grandchild)
+        self.assertFalse(self.kernel.process_table)
+        self.assertFalse(self.kernel.children)
+        self.assertFalse(self.kernel.zombies)
+
+class TestWaitSyscall(unittest.TestCase):
+    def run_tree(self, kernel: Kernel) -> str:
+        kernel.run()
+        self.assertFalse(kernel.process_table)
+        self.assertFalse(kernel.waiters)
+        return kernel.console.stream.getvalue().strip()
+
+    def test_parents_finish_last(self):
+        """Every process writes only after all of its children have exited"""
+        kernel = Kernel(round_robin_scheduler, [fork_tree(3)], Console(stream=StringIO()))
+        exits = []
+        exit_handler = kernel.syscall_handlers[SyscallType.SYS_EXIT]
+        def recording_exit(kernel, proc, call, count):
+            exits.append((proc.pid, proc.ppid))
+            exit_handler(kernel, proc, call, count)
+        kernel.register_syscall(SyscallType.SYS_EXIT, recording_exit)
+        self.assertEqual(self.run_tree(kernel), "x" * 8)
+        order = [pid for pid, _ in exits]
+        for pid, ppid in exits:
+            if ppid >= 0:
+                self.assertLess(order.index(pid), order.index(ppid))
+        self.assertEqual(order[-1], 0)
+
+    def test_schedulers(self):
+        """Wait works with stateful schedulers, quanta and several CPUs"""
+        random.seed(4)
+        for scheduler in [random_scheduler, CFSScheduler(), MLFQScheduler()]:
+            for quantum in [1, 5]:
+                kernel = Kernel(scheduler, [fork_tree(4)], Console(stream=StringIO()), quantum)
+                self.assertEqual(self.run_tree(kernel), "x" * 16)
+            kernel = SMPKernel(scheduler, [fork_tree(4)], Console(stream=StringIO()), cpus=3)
+            self.assertEqual(self.run_tree(kernel), "x" * 16)
+
+    def test_large_tree(self):
+        """A tree of 2 ** 12 processes needs no scans of the process table"""
+        kernel = Kernel(round_robin_scheduler, [fork_tree(12)], Console('exit', stream=StringIO()),
+                        accounting=False)
+        self.assertEqual(len(self.run_tree(kernel)), 1 << 12)
+
+    def test_replay_and_snapshot(self):
+        """Blocked parents and zombies survive a snapshot, and runs with waits replay"""
+        random.seed(8)
+        trace = BytesIO()
+        kernel = Kernel(random_scheduler, [fork_tree(3), writer("A", 10)], Console('exit', stream=StringIO()))
+        kernel.record_trace(trace)
+        kernel.run()
+        replayed = Kernel(random_scheduler, [fork_tree(3), writer("A", 10)], Console('exit', stream=StringIO()))
+        replayed.replay(BytesIO(trace.getvalue()))
+        self.assertEqual(replayed.console.stream.getvalue(), kernel.console.stream.getvalue())
+
+        kernel = Kernel(round_robin_scheduler, [fork_tree(3)], Console('exit', stream=StringIO()))
+        self.assertFalse(kernel.run(max_decisions=12))
+        self.assertTrue(kernel.waiters)
+        restored = kernel.snapshot().restore(StringIO())
+        restored.run()
+        self.assertEqual(restored.console.stream.getvalue().strip(), "x" * 8)
+
+    def test_async_result(self):
+        """A coroutine process receives the pid of the child it waited for"""
+        seen = []
+
+        async def child():
+            yield Syscall(SyscallType.SYS_WRITE, "c")
+
+        async def parent():
+            pid = yield Syscall(SyscallType.SYS_FORK, child)
+            reaped = yield Syscall(SyscallType.SYS_WAIT, pid)
+            seen.append((pid, reaped))
+            seen.append((yield WAIT))
+
+        output = StringIO()
+        AsyncKernel(round_robin_scheduler, [AsyncProcess(parent())], Console(stream=output)).run()
+        self.assertEqual(seen, [(1, 1), -1])
+        self.assertEqual(output.getvalue(), "c\n")
+
+if __name__ == '__main__':
+    unittest.main()